@@ -0,0 +1,184 @@
+# Async_MQTT.py
+# asyncio layer over the paho MQTT client, so a single process and a single event loop can drive many connections
+# and many logical publishers (e.g. simulated IoT devices) without a thread or process per client.
+#   - AsyncMQTTClient wraps one paho client: its socket is serviced by the event loop, publish() is awaitable and
+#     completes when the broker acknowledges the message (QoS 1/2) or it has been written out (QoS 0), and at most
+#     max_inflight messages are outstanding per connection (further publishers wait their turn).
+#   - Connecting runs in an executor thread, so slow DNS or TCP never stalls the event loop. A dropped connection is
+#     re-established in the background with exponential backoff (MQTT_Connection's reconnect delays). While it is
+#     down, publish() raises ConnectionError without handing the message to paho, so nothing piles up in memory.
+#   - AsyncMQTTPool shares a few connections between many publishers, handing them out round-robin.
+# Broker address and credentials come from MQTT_Connection.py. It is used by Simulate_Devices.py and the load
+# benchmark; Publish_Private.py, Publish_Public.py and Private_Monitor_Client.py use paho's threaded network loop,
+# since each holds one connection and keeps its slow work off the network thread already (see the README).
+
+# Importing necessary libraries for the event loop integration.
+import asyncio                      # Event loop, futures and semaphores
+import threading                    # Moves paho callbacks made while connecting (executor thread) to the loop
+import paho.mqtt.client as mqtt     # MQTT protocol implementation
+import MQTT_Connection              # Shared broker settings
+
+# Default number of unacknowledged messages allowed per connection.
+default_max_inflight = 100
+
+# How often (in seconds) paho's housekeeping (keepalive pings, retries) runs.
+misc_interval = 1
+
+
+# Class driving one paho client from an asyncio event loop.
+class AsyncMQTTClient:
+    def __init__(self, client_id, subscriptions=(), max_inflight=default_max_inflight, on_message=None):
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.client = MQTT_Connection.create_client(client_id, subscriptions)
+        self.client.max_inflight_messages_set(max_inflight)
+        self.client.max_queued_messages_set(max_inflight)  # The semaphore below keeps paho's queue within this too
+        self.inflight = asyncio.Semaphore(max_inflight)
+        self.pending = {}                       # mid -> (future completed by on_publish, QoS)
+        self.completed_early = set()            # mids acknowledged before their future was registered
+        self.connected = self.loop.create_future()  # Result of the first connection attempt
+        self.misc_task = None
+        self.reconnect_task = None
+        self.reconnect_delay = MQTT_Connection.reconnect_min_delay
+        self.closing = False
+
+        # Hook paho's socket handling into the event loop instead of a network thread.
+        self.client.on_socket_open = self.on_socket_open
+        self.client.on_socket_close = self.on_socket_close
+        self.client.on_socket_register_write = self.on_socket_register_write
+        self.client.on_socket_unregister_write = self.on_socket_unregister_write
+        self.client.on_publish = self.on_publish
+        if on_message is not None:
+            self.client.on_message = on_message
+
+        # Resolve connected once the broker accepts the connection (after the shared on_connect has subscribed).
+        shared_on_connect = self.client.on_connect
+
+        def on_connect(client, userdata, flags, reason_code, properties):
+            shared_on_connect(client, userdata, flags, reason_code, properties)
+            if reason_code == 0:
+                self.reconnect_delay = MQTT_Connection.reconnect_min_delay
+            if not self.connected.done():
+                if reason_code == 0:
+                    self.connected.set_result(True)
+                else:
+                    self.connected.set_exception(ConnectionError(f"Connection refused: {reason_code}"))
+        self.client.on_connect = on_connect
+
+    # Function to connect to the broker and wait for it to accept the connection.
+    # The blocking connect (DNS lookup, TCP handshake) runs in the loop's default executor.
+    async def connect(self, host=None, port=None):
+        await self.loop.run_in_executor(None, lambda: self.client.connect(
+            host or MQTT_Connection.broker_host, port or MQTT_Connection.broker_port,
+            keepalive=MQTT_Connection.keepalive))
+        await self.connected
+
+    # Function to run a socket callback on the event loop: paho calls them from the executor thread while connecting.
+    def in_loop(self, callback, *arguments):
+        if threading.get_ident() == self.loop_thread:
+            callback(*arguments)
+        else:
+            self.loop.call_soon_threadsafe(callback, *arguments)
+
+    # Socket callbacks: read when the socket is readable, write while paho has data queued.
+    def on_socket_open(self, client, userdata, sock):
+        self.in_loop(self.open_socket, sock)
+
+    def open_socket(self, sock):
+        self.loop.add_reader(sock, self.client.loop_read)
+        self.misc_task = self.loop.create_task(self.misc_loop())
+
+    def on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        if self.misc_task is not None:
+            self.misc_task.cancel()
+        # QoS 1/2 messages stay queued in paho and are resent after reconnecting, so only QoS 0 ones fail here.
+        for mid, (future, qos) in list(self.pending.items()):
+            if self.closing or qos == 0:
+                del self.pending[mid]
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the broker closed"))
+        if not self.closing and self.reconnect_task is None:
+            self.reconnect_task = self.loop.create_task(self.reconnect())
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.in_loop(self.loop.add_writer, sock, client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.in_loop(self.loop.remove_writer, sock)
+
+    # Function to re-establish a dropped connection, waiting reconnect_delay seconds (doubled after every attempt,
+    # up to MQTT_Connection.reconnect_max_delay, and reset once connected) before each attempt.
+    async def reconnect(self):
+        try:
+            while not self.closing:
+                print(f"Reconnecting to the MQTT broker in {self.reconnect_delay} s...")
+                await asyncio.sleep(self.reconnect_delay)
+                self.reconnect_delay = min(self.reconnect_delay * 2, MQTT_Connection.reconnect_max_delay)
+                try:
+                    await self.loop.run_in_executor(None, self.client.reconnect)
+                    return  # The broker's answer arrives on the socket; a refusal closes it and starts over
+                except OSError as e:
+                    print(f"Could not reach the MQTT broker: {e}")
+        finally:
+            self.reconnect_task = None
+
+    # Function running paho's periodic housekeeping while the connection is open.
+    async def misc_loop(self):
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(misc_interval)
+
+    # Callback from paho when a message has been acknowledged (QoS 1/2) or written (QoS 0).
+    def on_publish(self, client, userdata, mid, reason_code, properties):
+        future, _ = self.pending.pop(mid, (None, None))
+        if future is None:
+            self.completed_early.add(mid)
+        elif not future.done():
+            future.set_result(mid)
+
+    # Function to publish a message and wait until it is complete. Waits first if max_inflight messages are
+    # already outstanding on this connection. Raises ConnectionError if the connection is down or the message
+    # could not be sent. A QoS 1/2 message paho accepted is awaited across a reconnection, since paho resends it.
+    async def publish(self, topic, payload, qos=1):
+        async with self.inflight:
+            if not self.client.is_connected():
+                raise ConnectionError(f"Failed to send message to topic `{topic}`: not connected")
+            info = self.client.publish(topic, payload, qos)
+            if info.rc != mqtt.MQTT_ERR_SUCCESS and not (qos > 0 and info.rc == mqtt.MQTT_ERR_NO_CONN):
+                raise ConnectionError(f"Failed to send message to topic `{topic}`: {mqtt.error_string(info.rc)}")
+            if info.mid in self.completed_early:
+                self.completed_early.discard(info.mid)
+                return info.mid
+            future = self.loop.create_future()
+            self.pending[info.mid] = (future, qos)
+            return await future
+
+    # Function to disconnect from the broker, without reconnecting.
+    async def disconnect(self):
+        self.closing = True
+        if self.reconnect_task is not None:
+            self.reconnect_task.cancel()
+        self.client.disconnect()
+        await asyncio.sleep(0)  # Let the event loop run the socket close callbacks
+
+
+# Class sharing a fixed number of connections between any number of publishers.
+class AsyncMQTTPool:
+    def __init__(self, client_id_prefix, size, max_inflight=default_max_inflight):
+        self.clients = [AsyncMQTTClient(f"{client_id_prefix}-{index}", max_inflight=max_inflight)
+                        for index in range(max(1, size))]
+        self.next_index = 0
+
+    # Function to connect every connection in the pool.
+    async def connect(self, host=None, port=None):
+        await asyncio.gather(*(client.connect(host, port) for client in self.clients))
+
+    # Function to hand out connections round-robin (e.g. one per simulated device).
+    def acquire(self):
+        client = self.clients[self.next_index]
+        self.next_index = (self.next_index + 1) % len(self.clients)
+        return client
+
+    # Function to disconnect every connection in the pool.
+    async def disconnect(self):
+        await asyncio.gather(*(client.disconnect() for client in self.clients))
@@ -0,0 +1,322 @@
+# Generate_Sample_Captures.py
+# Builds the sample captures Local_Sample.pcap and Local_Sample.pcapng from the packets of Local_Sample.txt, so the
+# capture input mode (Pcap_Reader.py) can be tried without a live network.
+# Every packet is rebuilt as an Ethernet frame with the addresses, ports, protocol headers and length of the text
+# export; payloads are synthetic (e.g. encrypted SSH and QUIC data is filler). Vendor-resolved MAC names such as
+# "SuperMic_c2:dd:2e" get that vendor's OUI, and hosts only known by their IP address get a stable made-up MAC.
+#
+# The pcap file uses microsecond timestamps; the pcapng file declares nanosecond timestamps on its interface, so
+# both timestamp resolutions are covered.
+#
+# Usage: python Generate_Sample_Captures.py [text export, default Local_Sample.txt]
+
+# Importing necessary libraries for building frames and writing the capture formats.
+import ipaddress                    # Parses and packs the IPv4/IPv6 addresses of the export
+import os                           # Output file paths
+import random                       # Deterministic filler payloads
+import re                           # Reads ports, flags and names back out of the Info column
+import struct                       # Packs the protocol headers and capture records
+import sys                          # Command line arguments
+import zlib                         # Stable made-up MAC addresses
+import Traffic_Parser               # Parses the lines of the export
+import Traffic_Reader               # Streams the lines of the export
+
+# Time (in whole seconds since the epoch) the export's times are counted from in the generated captures.
+capture_start = 1728000000
+
+# Link-layer settings.
+linktype_ethernet = 1
+snapshot_length = 262144
+vendor_ouis = {"SuperMic": b"\x3c\xec\xef", "IntelCor": b"\x8c\x8d\x28", "VMware": b"\x00\x50\x56"}
+
+# Port used by clients (the side that is not the well-known port) when the export does not show it.
+client_port = 51514
+
+# Patterns for the Info column.
+tcp_info_pattern = re.compile(r"(\d+) → (\d+) \[([^\]]*)\](?: Seq=(\d+))?(?: Ack=(\d+))?(?: Win=(\d+))?(?: Len=(\d+))?")
+arp_request_pattern = re.compile(r"Who has (\S+)\? Tell (\d+\.\d+\.\d+\.\d+)")
+arp_reply_pattern = re.compile(r"(\S+) is at ")
+dns_item_pattern = re.compile(r"\b(A|AAAA|PTR|TXT|SRV|HTTPS|CNAME|ANY) (.+?)(?=,| (?:A|AAAA|PTR|TXT|SRV|HTTPS|CNAME|"
+                              r"SOA|NSEC|OPT)\b|$)")
+
+# Header values.
+tcp_flag_bits = {"FIN": 0x01, "SYN": 0x02, "RST": 0x04, "PSH": 0x08, "ACK": 0x10, "URG": 0x20, "ECE": 0x40,
+                 "CWR": 0x80}
+dns_types = {"A": 1, "CNAME": 5, "PTR": 12, "TXT": 16, "AAAA": 28, "SRV": 33, "HTTPS": 65, "ANY": 255}
+quic_long_types = {"Initial": 0, "0-RTT": 1, "Handshake": 2, "Retry": 3}
+tls_records = {"Client Hello": (22, 0x0301, 1), "Server Hello": (22, 0x0303, 2),     # content type, record
+               "Change Cipher Spec": (20, 0x0303, None), "Application Data": (23, 0x0303, None)}  # version, hello
+dhcpv6_types = {"Solicit": 1, "Advertise": 2, "Request": 3, "Reply": 7}
+
+
+# Function to return the MAC address of a host of the export, as 6 bytes.
+def mac_for(name):
+    if name == "Broadcast":
+        return b"\xff" * 6
+    vendor, _, suffix = name.partition("_")
+    if suffix and re.fullmatch(r"[0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2}", suffix):
+        return vendor_ouis.get(vendor, b"\x02\x00\x00") + bytes.fromhex(suffix.replace(":", ""))
+    if re.fullmatch(r"(?:[0-9a-f]{2}:){5}[0-9a-f]{2}", name):
+        return bytes.fromhex(name.replace(":", ""))
+    address = ipaddress.ip_address(name)
+    if address.is_multicast:
+        # The multicast MAC derived from the group address
+        if address.version == 4:
+            return b"\x01\x00\x5e" + (int(address) & 0x7FFFFF).to_bytes(3, "big")
+        return b"\x33\x33" + address.packed[-4:]
+    return b"\x02" + zlib.crc32(name.encode()).to_bytes(4, "big") + b"\x01"
+
+
+# Function to compute the Internet checksum of some bytes.
+def checksum(data):
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f">{len(data) // 2}H", data))
+    while total > 0xFFFF:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+# Functions to build the headers of each layer around a payload.
+def ethernet(source, destination, ethertype, payload):
+    return mac_for(destination) + mac_for(source) + struct.pack(">H", ethertype) + payload
+
+
+def ip_packet(source, destination, protocol, payload):
+    source, destination = ipaddress.ip_address(source), ipaddress.ip_address(destination)
+    if source.version == 4:
+        header = struct.pack(">BBHHHBBH4s4s", 0x45, 0, 20 + len(payload), 0, 0x4000, 64, protocol, 0,
+                             source.packed, destination.packed)
+        header = header[:10] + struct.pack(">H", checksum(header)) + header[12:]
+        return 0x0800, header + payload
+    if protocol == 58 and destination.is_multicast:
+        # Multicast Listener messages carry a hop-by-hop Router Alert option, as real hosts send them
+        payload = struct.pack(">BB6s", 58, 0, b"\x05\x02\x00\x00\x01\x00") + payload
+        protocol = 0
+    header = struct.pack(">IHBB16s16s", 6 << 28, len(payload), protocol, 1 if protocol in (0, 58) else 64,
+                         source.packed, destination.packed)
+    return 0x86DD, header + payload
+
+
+# Wireshark shows window sizes scaled by the window scale option, so they may not fit the 16-bit header field.
+def tcp_segment(source_port, destination_port, flags, sequence, acknowledgement, window, payload):
+    return struct.pack(">HHIIHHHH", source_port, destination_port, sequence, acknowledgement, 5 << 12 | flags,
+                       min(window, 0xFFFF), 0, 0) + payload
+
+
+def udp_datagram(source_port, destination_port, payload):
+    return struct.pack(">HHHH", source_port, destination_port, 8 + len(payload), 0) + payload
+
+
+# Function to return (source port, destination port) for a client/server exchange on 'port', guessing the client
+# as the host with the private address.
+def service_ports(source, port):
+    if ipaddress.ip_address(source).is_private:
+        return client_port, port
+    return port, client_port
+
+
+# Function to return 'size' bytes of filler, the same on every run.
+def filler(size, seed):
+    return random.Random(seed).randbytes(max(0, size))
+
+
+# Function to encode a DNS name.
+def dns_name(name):
+    encoded = b""
+    for label in name.rstrip(".").split("."):
+        label = label.encode()[:63]
+        encoded += bytes([len(label)]) + label
+    return encoded + b"\x00"
+
+
+# Function to build a DNS/MDNS message from the Info column. Queries carry the records listed as questions;
+# DNS responses repeat the first one as the question, and MDNS responses carry the listed records as answers.
+def dns_message(info, mdns):
+    identifier = int(info.split("0x", 1)[1][:4], 16)
+    response = info.startswith("Standard query response")
+    items = dns_item_pattern.findall(info.split(" ", 4 if response else 3)[-1])[:8]
+    questions = answers = b""
+    question_count = answer_count = 0
+    if response and mdns:
+        for record_type, name in items:
+            data = dns_record_data(record_type, name)
+            if data is not None:
+                answers += dns_name(name) + struct.pack(">HHIH", dns_types[record_type], 0x8001, 120, len(data)) + data
+                answer_count += 1
+    else:
+        unicast = mdns and '"QU" question' in info
+        for record_type, name in items[:1] if response else items:
+            questions += dns_name(name) + struct.pack(">HH", dns_types[record_type], 0x8001 if unicast else 1)
+            question_count += 1
+    flags = (0x8400 if mdns else 0x8180) if response else (0 if mdns else 0x0100)
+    return struct.pack(">HHHHHH", identifier, flags, question_count, answer_count, 0, 0) + questions + answers
+
+
+# Function to encode the data of a DNS answer record, or None for record types the samples do not need.
+def dns_record_data(record_type, value):
+    if record_type in ("PTR", "CNAME"):
+        return dns_name(value)
+    if record_type in ("A", "AAAA"):
+        try:
+            return ipaddress.ip_address(value).packed
+        except ValueError:
+            return None
+    return None
+
+
+# Function to build the transport-layer payload and IP protocol of one IP packet of the export.
+# 'fill' is the number of filler bytes to add where the protocol allows it, to reach the exported length.
+def transport(packet, fill):
+    protocol, info, source = packet.protocol, packet.info, packet.source
+    if protocol == "TCP":
+        ports = tcp_info_pattern.match(info)
+        flags = sum(tcp_flag_bits.get(flag, 0) for flag in ports.group(3).split(", "))
+        numbers = [int(value or 0) for value in ports.group(4, 5, 6, 7)]
+        payload = filler(numbers[3], packet.no)
+        return 6, tcp_segment(int(ports.group(1)), int(ports.group(2)), flags, *numbers[:3], payload), False
+    if protocol.startswith("TLS"):
+        records = b""
+        names = [name for name in info.split(", ") if name in tls_records]
+        for index, name in enumerate(names):
+            content_type, version, hello = tls_records[name]
+            body = filler(16 + (fill if index == len(names) - 1 else 0), packet.no)
+            if hello is not None:
+                body = bytes([hello]) + (len(body) + 2).to_bytes(3, "big") + b"\x03\x03" + body
+            elif content_type == 20:
+                body = b"\x01"
+            records += struct.pack(">BHH", content_type, version, len(body)) + body
+        return 6, tcp_segment(*service_ports(source, 443), 0x18, 1, 1, 1024, records), True
+    if protocol == "SSH":
+        ports = (client_port, 22) if info.startswith("Client") else (22, client_port)
+        size = int(re.search(r"len=(\d+)", info).group(1)) if "len=" in info else 32
+        return 6, tcp_segment(*ports, 0x18, 1, 1, 1024, filler(size + fill, packet.no)), False
+    if protocol == "TELNET":
+        payload = b"\xff\xfb\x01login: " + filler(fill, packet.no)
+        return 6, tcp_segment(client_port, 23, 0x18, 1, 1, 1024, payload), True
+    if protocol == "HTTP":
+        payload = (info + "\r\n\r\n").encode()
+        return 6, tcp_segment(client_port, 80, 0x18, 1, 1, 1024, payload), False
+    if protocol in ("DNS", "MDNS"):
+        mdns = protocol == "MDNS"
+        ports = (5353, 5353) if mdns else ((53, client_port) if "response" in info else (client_port, 53))
+        return 17, udp_datagram(*ports, dns_message(info, mdns)), False
+    if protocol == "QUIC":
+        connection = re.search(r"([DS])CID=([0-9a-f]+)", info)
+        connection_id = bytes.fromhex(connection.group(2)) if connection else b""
+        long_type = info.split(",", 1)[0]
+        if long_type in quic_long_types:
+            ids = bytes([len(connection_id)]) + connection_id + b"\x00" if connection.group(1) == "D" else \
+                  b"\x00" + bytes([len(connection_id)]) + connection_id
+            header = bytes([0xC3 | quic_long_types[long_type] << 4]) + struct.pack(">I", 1) + ids
+        else:
+            key_phase = 0x04 if "(KP1)" in info else 0
+            header = bytes([0x43 | key_phase]) + connection_id
+        return 17, udp_datagram(*service_ports(source, 443), header + filler(16 + fill, packet.no)), True
+    if protocol == "DHCPv6":
+        message_type = dhcpv6_types.get(info.split()[0], 1)
+        transaction = int(re.search(r"XID: 0x([0-9a-f]+)", info).group(1), 16)
+        client_id = re.search(r"CID: ([0-9a-f]+)", info)
+        options = b""
+        if client_id:
+            duid = bytes.fromhex(client_id.group(1))
+            options = struct.pack(">HH", 1, len(duid)) + duid
+        payload = struct.pack(">I", message_type << 24 | transaction) + options
+        return 17, udp_datagram(546, 547, payload), False
+    if protocol == "ICMPv6":
+        if info.startswith("Neighbor Solicitation"):
+            target = ipaddress.ip_address(info.split()[3]).packed
+            mac = re.search(r"from ((?:[0-9a-f]{2}:){5}[0-9a-f]{2})", info)
+            option = b"\x01\x01" + bytes.fromhex(mac.group(1).replace(":", "")) if mac else b""
+            return 58, struct.pack(">BBHI16s", 135, 0, 0, 0, target) + option, False
+        return 58, struct.pack(">BBHHH", 143, 0, 0, 0, 0), False
+    return 17, udp_datagram(client_port, client_port, filler(fill, packet.no)), True
+
+
+# Function to build the Ethernet frame of one packet of the export; returns None for packets it cannot rebuild.
+def build_frame(packet):
+    if packet.protocol == "ARP":
+        request = arp_request_pattern.match(packet.info)
+        reply = arp_reply_pattern.match(packet.info)
+        if request is not None:
+            target, sender = (ipaddress.ip_address(address).packed for address in request.groups())
+            arp = struct.pack(">HHBBH6s4s6s4s", 1, 0x0800, 6, 4, 1, mac_for(packet.source), sender, b"\x00" * 6,
+                              target)
+        elif reply is not None:
+            # The requester's IPv4 address is not in the export; 0.0.0.0 stands in for it
+            sender = ipaddress.ip_address(reply.group(1)).packed
+            arp = struct.pack(">HHBBH6s4s6s4s", 1, 0x0800, 6, 4, 2, mac_for(packet.source), sender,
+                              mac_for(packet.destination), b"\x00" * 4)
+        else:
+            return None
+        frame = ethernet(packet.source, packet.destination, 0x0806, arp)
+    else:
+        try:
+            ipaddress.ip_address(packet.source)
+        except ValueError:
+            return None
+        protocol, segment, growable = transport(packet, 0)
+        ethertype, ip = ip_packet(packet.source, packet.destination, protocol, segment)
+        frame = ethernet(packet.source, packet.destination, ethertype, ip)
+        if growable and len(frame) < packet.length:
+            # Grow the payload itself to the exported length, then rebuild the headers around it
+            protocol, segment, _ = transport(packet, packet.length - len(frame))
+            ethertype, ip = ip_packet(packet.source, packet.destination, protocol, segment)
+            frame = ethernet(packet.source, packet.destination, ethertype, ip)
+    # Any remaining difference is Ethernet padding after the packet
+    return frame + b"\x00" * (packet.length - len(frame))
+
+
+# Function to build (timestamp in nanoseconds, frame) for every packet of a text export that can be rebuilt.
+def build_frames(file_path):
+    frames = []
+    for line, _ in Traffic_Reader.iter_lines(file_path):
+        packet = Traffic_Parser.parse_packet_line(line)
+        if packet is not None:
+            frame = build_frame(packet)
+            if frame is not None:
+                frames.append((capture_start * 10**9 + round(packet.time * 1e9), frame))
+    return frames
+
+
+# Function to write frames as a pcap file (little-endian, microsecond timestamps).
+def write_pcap(file_path, frames):
+    with open(file_path, 'wb') as file:
+        file.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, snapshot_length, linktype_ethernet))
+        for timestamp, frame in frames:
+            microseconds = timestamp // 1000
+            file.write(struct.pack("<IIII", microseconds // 1000000, microseconds % 1000000, len(frame), len(frame)))
+            file.write(frame)
+
+
+# Function to write one pcapng block, padding its body to a multiple of 4 bytes.
+def pcapng_block(file, block_type, body):
+    body += b"\x00" * (-len(body) % 4)
+    length = 12 + len(body)
+    file.write(struct.pack("<II", block_type, length) + body + struct.pack("<I", length))
+
+
+# Function to write frames as a pcapng file: a section header, one Ethernet interface with nanosecond timestamps
+# (if_tsresol = 9) and an enhanced packet block per frame.
+def write_pcapng(file_path, frames):
+    with open(file_path, 'wb') as file:
+        pcapng_block(file, 0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1))
+        options = struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0)
+        pcapng_block(file, 1, struct.pack("<HHI", linktype_ethernet, 0, snapshot_length) + options)
+        for timestamp, frame in frames:
+            pcapng_block(file, 6, struct.pack("<IIIII", 0, timestamp >> 32, timestamp & 0xFFFFFFFF, len(frame),
+                                              len(frame)) + frame)
+
+
+# Main function: write the pcap and pcapng versions of the export next to it.
+def run():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "Local_Sample.txt"
+    frames = build_frames(file_path)
+    base = os.path.splitext(file_path)[0]
+    write_pcap(base + ".pcap", frames)
+    write_pcapng(base + ".pcapng", frames)
+    print(f"Wrote {len(frames)} packets to {base}.pcap and {base}.pcapng")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,198 @@
+# Local_Broker.py
+# Minimal in-process MQTT 3.1.1 broker used as a local stand-in for the real broker in benchmarks and load tests,
+# so they need no network access. It supports what the scripts in this project use:
+#   CONNECT/CONNACK (credentials are accepted without checking), PUBLISH with QoS 0, 1 and 2, SUBSCRIBE with
+#   '+' and '#' wildcards, UNSUBSCRIBE, PINGREQ and DISCONNECT.
+# Messages are forwarded to subscribers at QoS 0. There are no retained messages, wills or persistent sessions.
+# A subscriber that falls more than max_write_buffer bytes behind has further messages dropped (and counted).
+#
+# Usage: python Local_Broker.py [port, default 1883]
+
+# Importing necessary libraries for the asyncio server.
+import asyncio                      # TCP server and connection handling
+import struct                       # Packs packet identifiers and lengths
+import sys                          # Command line arguments
+import threading                    # Runs the broker in a background thread for benchmarks
+
+# Most bytes queued for one subscriber before further messages to it are dropped.
+max_write_buffer = 8 * 1024 * 1024
+
+# MQTT control packet types.
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+
+# Function to encode the variable-length "remaining length" field of the fixed header.
+def encode_length(length):
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+# Function to check whether a topic matches a subscription filter with '+' and '#' wildcards.
+def topic_matches(topic_filter, topic):
+    filter_levels = topic_filter.split('/')
+    topic_levels = topic.split('/')
+    for index, level in enumerate(filter_levels):
+        if level == '#':
+            return True
+        if index >= len(topic_levels) or (level != '+' and level != topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+# Class holding the subscriptions and statistics of the broker.
+class LocalBroker:
+    def __init__(self):
+        self.subscriptions = {}         # topic filter -> set of writers
+        self.route_cache = {}           # topic -> list of writers subscribed to it
+        self.received = 0               # PUBLISH packets received
+        self.delivered = 0              # Messages written to subscribers
+        self.dropped = 0                # Messages dropped because a subscriber was too far behind
+        self.server = None
+
+    # Function to start listening; returns the port actually used (useful with port 0).
+    async def start(self, host="127.0.0.1", port=1883):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    # Function to forget cached routes whenever the subscriptions change.
+    def invalidate_routes(self):
+        self.route_cache.clear()
+
+    # Function to return the writers subscribed to a topic (cached per topic).
+    def route(self, topic):
+        writers = self.route_cache.get(topic)
+        if writers is None:
+            writers = {writer for topic_filter, subscribers in self.subscriptions.items()
+                       if topic_matches(topic_filter, topic) for writer in subscribers}
+            writers = self.route_cache[topic] = list(writers)
+        return writers
+
+    # Function to forward a message to every subscriber of its topic, at QoS 0.
+    def forward(self, topic, payload):
+        if not self.route(topic):
+            return
+        topic_bytes = topic.encode('utf-8')
+        body = struct.pack(">H", len(topic_bytes)) + topic_bytes + payload
+        packet = bytes((PUBLISH << 4,)) + encode_length(len(body)) + body
+        for writer in self.route(topic):
+            if writer.transport.get_write_buffer_size() > max_write_buffer:
+                self.dropped += 1
+            else:
+                writer.write(packet)
+                self.delivered += 1
+
+    # Function to serve one client connection until it disconnects.
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(1)
+                length, multiplier = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                if not self.handle_packet(header[0], body, writer):
+                    break
+                if writer.transport.get_write_buffer_size() > max_write_buffer:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.remove_writer(writer)
+            writer.close()
+
+    # Function to handle one control packet; returns False when the client disconnects.
+    def handle_packet(self, first_byte, body, writer):
+        packet_type, flags = first_byte >> 4, first_byte & 0x0F
+
+        if packet_type == PUBLISH:
+            self.received += 1
+            qos = (flags >> 1) & 0x03
+            (topic_length,) = struct.unpack_from(">H", body, 0)
+            topic = body[2:2 + topic_length].decode('utf-8')
+            position = 2 + topic_length
+            if qos:
+                packet_id = body[position:position + 2]
+                position += 2
+                writer.write(bytes((PUBACK << 4 if qos == 1 else PUBREC << 4, 2)) + packet_id)
+            self.forward(topic, body[position:])
+        elif packet_type == CONNECT:
+            writer.write(bytes((CONNACK << 4, 2, 0, 0)))   # Session not present, connection accepted
+        elif packet_type == PUBREL:
+            writer.write(bytes((PUBCOMP << 4, 2)) + body[:2])
+        elif packet_type == SUBSCRIBE:
+            packet_id, position, granted = body[:2], 2, bytearray()
+            while position < len(body):
+                (topic_length,) = struct.unpack_from(">H", body, position)
+                topic_filter = body[position + 2:position + 2 + topic_length].decode('utf-8')
+                position += 3 + topic_length  # Topic filter and its requested QoS byte
+                self.subscriptions.setdefault(topic_filter, set()).add(writer)
+                granted.append(0)
+            self.invalidate_routes()
+            writer.write(bytes((SUBACK << 4,)) + encode_length(2 + len(granted)) + packet_id + granted)
+        elif packet_type == UNSUBSCRIBE:
+            position = 2
+            while position < len(body):
+                (topic_length,) = struct.unpack_from(">H", body, position)
+                topic_filter = body[position + 2:position + 2 + topic_length].decode('utf-8')
+                position += 2 + topic_length
+                self.subscriptions.get(topic_filter, set()).discard(writer)
+            self.invalidate_routes()
+            writer.write(bytes((UNSUBACK << 4, 2)) + body[:2])
+        elif packet_type == PINGREQ:
+            writer.write(bytes((PINGRESP << 4, 0)))
+        elif packet_type == DISCONNECT:
+            return False
+        return True
+
+    # Function to remove a disconnected client from every subscription.
+    def remove_writer(self, writer):
+        for subscribers in self.subscriptions.values():
+            subscribers.discard(writer)
+        self.invalidate_routes()
+
+    # Function to return the broker statistics.
+    def stats(self):
+        return {"received": self.received, "delivered": self.delivered, "dropped": self.dropped}
+
+
+# Function to run a broker on its own event loop in a background thread.
+# Returns (broker, port) once it is listening; port 0 picks a free port.
+def start_in_thread(port=0):
+    broker = LocalBroker()
+    started = threading.Event()
+    result = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        result["port"] = loop.run_until_complete(broker.start(port=port))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name="local-broker", daemon=True).start()
+    started.wait()
+    return broker, result["port"]
+
+
+# Main function: run the broker in the foreground until interrupted.
+async def run(port):
+    broker = LocalBroker()
+    port = await broker.start(port=port)
+    print(f"Local MQTT broker listening on 127.0.0.1:{port}")
+    await broker.server.serve_forever()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1883))
+    except KeyboardInterrupt:
+        print("Broker stopped.")
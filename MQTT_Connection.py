@@ -0,0 +1,81 @@
+# MQTT_Connection.py
+# Connection settings and the connect_mqtt() function shared by Publish_Public.py, Publish_Private.py,
+# Private_Monitor_Client.py and the asyncio client layer (Async_MQTT.py).
+# Clients from connect_mqtt() keep reconnecting, with exponential backoff, whenever the broker is unreachable:
+# both when it cannot be reached at startup and when an established connection drops.
+
+# Importing necessary libraries for MQTT communication and waiting for the connection.
+import paho.mqtt.client as mqtt     # MQTT communication library
+import time                         # Waiting for the first connection
+
+# MQTT broker address, port and credentials (the student ID is used as both username and password).
+broker_host = "rule28.i4t.swin.edu.au"
+broker_port = 1883
+broker_username = "103818400"
+broker_password = "103818400"
+keepalive = 60
+
+# Delay (in seconds) before the first reconnection attempt, doubled after every failed attempt up to the maximum.
+reconnect_min_delay = 1
+reconnect_max_delay = 120
+
+
+# Function to create an MQTT client with the shared settings, without connecting it yet.
+# 'subscriptions' are (re)subscribed every time the connection is established.
+def create_client(client_id, subscriptions=()):
+    # Callback function executed when the connection to the broker is established.
+    def on_connect(client, userdata, flags, reason_code, properties):
+        # A reason code of 0 means the connection was successful.
+        if reason_code == 0:
+            print("Connected to MQTT Broker!")  # Successful connection message
+            for topic in subscriptions:
+                client.subscribe(topic)  # Subscribe to the requested topics
+        else:
+            print(f"Failed to connect, return code {reason_code}\n")  # Failure message with the return code
+
+    # Callback function executed when an established connection is lost; the network loop reconnects by itself.
+    def on_disconnect(client, userdata, flags, reason_code, properties):
+        if reason_code != 0:
+            print(f"Disconnected from MQTT Broker ({reason_code}), reconnecting...")
+
+    # Callback function executed when a connection attempt fails (broker unreachable); it is retried with backoff.
+    def on_connect_fail(client, userdata):
+        print("Could not reach the MQTT broker, retrying...")
+
+    # Creating a new MQTT client instance with the given client_id, using the latest CallbackAPIVersion.
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
+
+    # Setting authentication details for the MQTT broker (username and password).
+    client.username_pw_set(username=broker_username, password=broker_password)
+
+    # Assigning the on_connect callback function, which is executed when the client connects to the broker.
+    client.on_connect = on_connect
+    client.on_disconnect = on_disconnect
+    client.on_connect_fail = on_connect_fail
+    return client
+
+
+# Function to connect to the MQTT broker. Returns the client, or None if the settings are invalid.
+# The connection itself is made by the network loop once client.loop_start() is called, and retried with backoff
+# until the broker can be reached, so a broker outage at startup no longer stops the scripts.
+def connect_mqtt(client_id, subscriptions=()):
+    client = create_client(client_id, subscriptions)
+    client.reconnect_delay_set(reconnect_min_delay, reconnect_max_delay)
+
+    # Attempting to connect to the broker.
+    try:
+        print("Attempting to connect to the MQTT broker...")
+        client.connect_async(broker_host, broker_port, keepalive=keepalive)  # Connect (and reconnect) in the loop
+    except ValueError as e:
+        print(f"Invalid connection settings: {e}")  # E.g. an empty host or a negative keepalive
+        return None
+
+    return client  # Return the client, which connects once its network loop is started
+
+
+# Function to wait (up to 'timeout' seconds) for a client's network loop to connect. Returns True if connected.
+def wait_until_connected(client, timeout):
+    deadline = time.monotonic() + timeout
+    while not client.is_connected() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return client.is_connected()
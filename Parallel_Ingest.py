@@ -0,0 +1,184 @@
+# Parallel_Ingest.py
+# Multi-core ingestion of large capture files, for backfilling historical exports.
+# The file is split into byte-range chunks that start and end on line boundaries. A pool of worker processes
+# parses, classifies and formats (or binary-encodes) the packets of each chunk, and sends back compact results:
+# ready-to-publish batch frames per topic. A single publisher in the main process sends the frames through a
+# Traffic_Batcher.BatchPublisher, so QoS, spooling and metrics work as in the single-threaded path.
+#
+# With ordered=True the chunks are published in file order, so every topic receives its packets in their original
+# "No." order. With ordered=False each chunk is published as soon as it is ready, which keeps the workers busier.
+#
+# Each chunk gets a fresh TrafficClassifier, so results do not depend on which worker handled which chunk.
+# To give its sliding-window detectors (ARP scans, SYN floods, connection rates) the history they would have had
+# in a single pass, the worker first feeds them the packets of the warmup_size bytes before the chunk, without
+# publishing those. Only a detector window holding more than warmup_size bytes of capture can still differ from
+# the single-threaded result. The rule table is stateless and unaffected.
+#
+# Usage: python Parallel_Ingest.py capture.txt [--workers 4] [--unordered]
+
+# Importing necessary libraries for chunking and the process pool.
+import os                           # File size and CPU count
+import time                         # Chunk timing
+import argparse                     # Command line options
+from collections import deque       # Chunks in flight, in submission order
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED  # Worker processes
+import Traffic_Batcher              # Batch frames
+import Traffic_Classifier           # Rule table and sliding-window detectors
+import Traffic_Codec                # Compact binary encoding of packet records
+import Traffic_Metrics              # Ingestion counters and chunk timing
+import Traffic_Parser               # Parses capture lines into packet records
+import Traffic_Reader               # Streams the lines of one chunk
+
+# Default ingestion settings.
+default_workers = os.cpu_count() or 1
+chunk_size = 16 * 1024 * 1024       # Bytes of capture per chunk
+warmup_size = 1024 * 1024           # Bytes before each chunk replayed through the detectors only
+chunks_per_worker = 2               # Chunks queued or finished but unpublished per worker (bounds memory use)
+
+# Metrics for the ingestion.
+chunks_ingested = Traffic_Metrics.counter("ingest_chunks_total", "Capture chunks parsed by the worker processes")
+packets_ingested = Traffic_Metrics.counter("ingest_packets_total", "Packets parsed by the worker processes")
+lines_skipped = Traffic_Metrics.counter("ingest_lines_skipped_total", "Chunk lines that were not packets")
+chunk_latency = Traffic_Metrics.histogram("ingest_chunk_seconds", "Time for a worker to process one chunk")
+
+
+# Function to return the offset of the first line starting at or after 'position' (0 stays 0).
+def line_start_after(file, position):
+    if position <= 0:
+        return 0
+    file.seek(position - 1)
+    file.readline()                     # Skip to just after the newline ending the line containing position - 1
+    return file.tell()
+
+
+# Function to split a file into (start, end) byte ranges of about 'size' bytes, each ending just after a newline.
+def chunk_ranges(file_path, size=chunk_size):
+    file_size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as file:
+        start = 0
+        while start < file_size:
+            end = file_size if start + size >= file_size else line_start_after(file, start + size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+# Function run in a worker process: parse, classify and format the packets of one chunk, and return
+# (frames, packet count, skipped line count, seconds taken), where frames is a list of (topic, payload, count)
+# in the order the batches filled up, exactly as a BatchPublisher without linger would have sent them.
+def ingest_chunk(file_path, start, end, expected_topic, suspicious_topic, wire_format, max_batch):
+    started = time.perf_counter()
+    classifier = Traffic_Classifier.TrafficClassifier()
+    parse = Traffic_Parser.parse_packet_line
+    classify = classifier.classify
+
+    # Warm up the detectors with the packets just before the chunk.
+    with open(file_path, 'rb') as file:
+        warmup_start = line_start_after(file, start - warmup_size)
+    for line, _ in Traffic_Reader.iter_lines(file_path, warmup_start, end=start):
+        packet = parse(line)
+        if packet is not None:
+            classify(packet)
+
+    # Text messages are built from the line's columns, so the numbers are not formatted again.
+    binary = wire_format == "binary"
+    if binary:
+        expected_topic += Traffic_Codec.binary_topic_suffix
+        suspicious_topic += Traffic_Codec.binary_topic_suffix
+    encode_packet = Traffic_Codec.encode_packet
+    format_fields = Traffic_Parser.format_fields_message
+    split, to_packet = Traffic_Parser.split_packet_line, Traffic_Parser.packet_from_fields
+
+    pending = {expected_topic: [], suspicious_topic: []}
+    frames = []
+    packets = skipped = 0
+    for line, _ in Traffic_Reader.iter_lines(file_path, start, end=end):
+        fields = split(line)
+        packet = to_packet(fields) if fields is not None else None
+        if packet is None:
+            skipped += 1
+            continue
+        packets += 1
+        alert = classify(packet)
+        topic = suspicious_topic if alert else expected_topic
+        messages = pending[topic]
+        messages.append(encode_packet(packet, alert) if binary else format_fields(fields, alert))
+        if len(messages) >= max_batch:
+            frames.append((topic, frame(messages), len(messages)))
+            pending[topic] = []
+
+    # Batches still filling at the end of the chunk are sent as they are.
+    for topic, messages in pending.items():
+        if messages:
+            frames.append((topic, frame(messages), len(messages)))
+    return frames, packets, skipped, time.perf_counter() - started
+
+
+# Function to turn a list of messages into one payload, as BatchPublisher.send does.
+def frame(messages):
+    return messages[0] if len(messages) == 1 else Traffic_Batcher.encode_batch(messages)
+
+
+# Function to run every chunk through the pool and yield the results, in file order if 'ordered', otherwise as
+# they complete. At most 'window' chunks are submitted and not yet yielded at any time.
+def iter_chunk_results(executor, file_path, ranges, settings, ordered, window):
+    remaining = iter(ranges)
+    in_flight = deque()
+
+    def submit_next():
+        for start, end in remaining:
+            in_flight.append(executor.submit(ingest_chunk, file_path, start, end, *settings))
+            return
+
+    for _ in range(window):
+        submit_next()
+    while in_flight:
+        if ordered:
+            future = in_flight.popleft()
+        else:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            in_flight.remove(future)
+        result = future.result()
+        submit_next()
+        yield result
+
+
+# Function to publish a whole capture file through 'batcher' using 'workers' processes.
+# 'topics' are the (expected, suspicious) topics. Returns the number of packets published.
+def ingest(file_path, batcher, topics, workers=default_workers, ordered=True, wire_format="text",
+           max_batch=Traffic_Batcher.max_batch_limit, size=chunk_size):
+    ranges = chunk_ranges(file_path, size)
+    settings = (*topics, wire_format, max(1, min(max_batch, Traffic_Batcher.max_batch_limit)))
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for frames, packets, skipped, seconds in iter_chunk_results(executor, file_path, ranges, settings, ordered,
+                                                                    workers * chunks_per_worker):
+            for topic, payload, count in frames:
+                batcher.send_payload(topic, payload, count)
+            chunks_ingested.inc()
+            packets_ingested.inc(packets)
+            lines_skipped.inc(skipped)
+            chunk_latency.observe(seconds)
+            total += packets
+    return total
+
+
+# Main function: publish one capture file with Publish_Private.py's topics, connection, spool and settings.
+def run(file_path, workers, ordered):
+    import Publish_Private          # Imported here: Publish_Private.py uses this module for its parallel mode
+    Publish_Private.file_path = file_path
+    Publish_Private.follow_mode = False
+    Publish_Private.parallel_workers = workers
+    Publish_Private.parallel_ordered = ordered
+    Publish_Private.run(once=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Publish a large capture file using several processes.")
+    parser.add_argument("file_path")
+    parser.add_argument("--workers", type=int, default=default_workers)
+    parser.add_argument("--unordered", action="store_true", help="publish chunks as soon as they are ready")
+    arguments = parser.parse_args()
+    run(arguments.file_path, arguments.workers, not arguments.unordered)
@@ -0,0 +1,795 @@
+# Pcap_Reader.py
+# Reads packet captures (.pcap and .pcapng, as written by Wireshark, dumpcap or `tcpdump -w`) directly into the same
+# Packet records Traffic_Parser builds from a Wireshark text export, so no manual export step is needed and fields
+# such as Info no longer depend on splitting text on whitespace.
+#
+# Files are memory-mapped and decoded in place: the frame of each packet is a memoryview slice of the mapping and
+# its headers are read with struct.unpack_from, so packet bytes are never copied; only the strings of the resulting
+# Packet are created. A capture streamed on stdin (e.g. `tcpdump -U -w - | python Pcap_Reader.py -`) is decoded
+# the same way, one read at a time.
+#
+# The decoder handles Ethernet (with VLAN tags), Linux cooked (SLL and SLL2), BSD loopback and raw IP link types,
+# ARP, IPv4, IPv6 (with extension headers), TCP, UDP, ICMP, ICMPv6 and IGMP. Common application protocols are named
+# by port and payload (DNS, MDNS, QUIC, TLS, SSH, HTTP, ...). The Info column is a Wireshark-style summary of
+# those headers, not the output of Wireshark's dissectors. In particular, TCP sequence numbers are absolute, MAC
+# addresses are not resolved to vendor names, and TLS 1.3 records show as TLSv1.2, the version they carry.
+#
+# Usage: python Pcap_Reader.py capture.pcapng [--publish]   ("-" reads the capture from stdin)
+
+# Importing necessary libraries for memory-mapped access and header decoding.
+import argparse                     # Command line options
+import mmap                         # Maps the capture file into memory without reading it all
+import os                           # File size lookups
+import socket                       # Formats IPv6 addresses
+import struct                       # Reads fixed-size header fields in place
+import sys                          # Capture streamed on stdin
+import Traffic_Metrics              # Decoded and malformed packet counters, and the log
+import Traffic_Parser               # Packet record type and text message format
+import Traffic_Reader               # Shares the page release interval of the text reader
+
+# Builds a Packet straight from a tuple, skipping the Python-level NamedTuple constructor.
+_new_packet = tuple.__new__
+Packet = Traffic_Parser.Packet
+
+# Input settings.
+stdin_path = "-"                                # File path meaning "read the capture from stdin"
+capture_extensions = (".pcap", ".pcapng", ".cap")
+read_size = 1024 * 1024                         # Bytes read from a stream at a time
+max_record_size = 16 * 1024 * 1024              # A larger record means a corrupt capture, not a packet
+max_info_length = 200                           # Characters of payload text (e.g. HTTP request line) kept in Info
+max_dns_records = 16                            # DNS questions and answers listed in Info
+
+# Metrics for the decoder.
+packets_read = Traffic_Metrics.counter("pcap_packets_total", "Packets decoded from pcap/pcapng captures")
+malformed_packets = Traffic_Metrics.counter("pcap_malformed_packets_total", "Captured frames that could not be decoded")
+
+# File format constants.
+pcap_magic = {0xA1B2C3D4: 1e-6, 0xA1B23C4D: 1e-9}  # pcap magic number -> seconds per timestamp fraction unit
+default_units_per_second = 10**6                   # pcapng timestamp resolution unless an interface sets another
+pcap_header_size = 24
+pcap_record_size = 16
+pcapng_section = 0x0A0D0D0A                     # Section header block type (reads the same in either byte order)
+pcapng_byte_order = 0x1A2B3C4D
+pcapng_interface = 1
+pcapng_obsolete_packet = 2
+pcapng_simple_packet = 3
+pcapng_enhanced_packet = 6
+option_end, option_tsresol = 0, 9
+
+# Link types.
+linktype_null = 0
+linktype_ethernet = 1
+linktype_linux_sll = 113
+linktype_linux_sll2 = 276
+raw_linktypes = {12, 14, 101, 228, 229}         # Raw IPv4/IPv6 without a link-layer header
+
+# Ethernet types.
+ethertype_ipv4 = 0x0800
+ethertype_arp = 0x0806
+ethertype_ipv6 = 0x86DD
+vlan_ethertypes = {0x8100, 0x88A8, 0x9100}
+ethertype_names = {0x8035: "RARP", 0x8847: "MPLS", 0x8863: "PPPoED", 0x8864: "PPPoES", 0x888E: "EAPOL",
+                   0x88CC: "LLDP", 0x88E5: "MACsec"}
+
+# IP protocol numbers.
+ip_icmp, ip_igmp, ip_tcp, ip_udp, ip_icmpv6 = 1, 2, 6, 17, 58
+ip_protocol_names = {47: "GRE", 50: "ESP", 51: "AH", 89: "OSPF", 103: "PIM", 112: "VRRP", 132: "SCTP"}
+ipv6_extension_headers = {0, 43, 60}            # Hop-by-hop options, routing, destination options
+ipv6_fragment, ipv6_authentication = 44, 51
+
+# Application protocols recognised by port. TCP payloads that look like TLS records are recognised on any port.
+tcp_port_protocols = {21: "FTP", 22: "SSH", 23: "TELNET", 25: "SMTP", 80: "HTTP", 110: "POP", 143: "IMAP",
+                      8080: "HTTP"}
+udp_port_protocols = {53: "DNS", 67: "DHCP", 68: "DHCP", 123: "NTP", 443: "QUIC", 546: "DHCPv6", 547: "DHCPv6",
+                      1900: "SSDP", 5353: "MDNS", 5355: "LLMNR"}
+
+# Names used in the Info column.
+tcp_flag_bits = ("FIN", "SYN", "RST", "PSH", "ACK", "URG", "ECE", "CWR")
+tcp_flag_names = tuple(", ".join(name for bit, name in enumerate(tcp_flag_bits) if flags >> bit & 1)
+                       for flags in range(256))
+icmp_types = {0: "Echo (ping) reply", 3: "Destination unreachable", 5: "Redirect", 8: "Echo (ping) request",
+              11: "Time-to-live exceeded"}
+icmpv6_types = {1: "Destination Unreachable", 2: "Packet Too Big", 3: "Time Exceeded", 128: "Echo (ping) request",
+                129: "Echo (ping) reply", 130: "Multicast Listener Query", 131: "Multicast Listener Report",
+                132: "Multicast Listener Done", 133: "Router Solicitation", 134: "Router Advertisement",
+                135: "Neighbor Solicitation", 136: "Neighbor Advertisement", 137: "Redirect",
+                143: "Multicast Listener Report Message v2"}
+igmp_types = {0x11: "Membership Query", 0x16: "Membership Report", 0x17: "Leave Group", 0x22: "Membership Report"}
+dns_types = {1: "A", 2: "NS", 5: "CNAME", 6: "SOA", 12: "PTR", 15: "MX", 16: "TXT", 28: "AAAA", 33: "SRV",
+             41: "OPT", 47: "NSEC", 64: "SVCB", 65: "HTTPS", 255: "ANY"}
+dns_name_types = {2, 5, 12}                     # Record types whose data is a domain name
+dhcp_types = {1: "Discover", 2: "Offer", 3: "Request", 4: "Decline", 5: "ACK", 6: "NAK", 7: "Release", 8: "Inform"}
+dhcpv6_types = {1: "Solicit", 2: "Advertise", 3: "Request", 4: "Confirm", 5: "Renew", 6: "Rebind", 7: "Reply",
+                8: "Release", 9: "Decline", 10: "Reconfigure", 11: "Information-request"}
+ntp_modes = {1: "symmetric active", 2: "symmetric passive", 3: "client", 4: "server", 5: "broadcast"}
+quic_long_types = ("Initial", "0-RTT", "Handshake", "Retry")
+tls_versions = {0x0300: "SSLv3", 0x0301: "TLSv1", 0x0302: "TLSv1.1", 0x0303: "TLSv1.2"}
+tls_content_types = {20: "Change Cipher Spec", 21: "Alert", 23: "Application Data"}
+tls_handshake_types = {1: "Client Hello", 2: "Server Hello", 4: "New Session Ticket", 11: "Certificate",
+                       12: "Server Key Exchange", 13: "Certificate Request", 14: "Server Hello Done",
+                       15: "Certificate Verify", 16: "Client Key Exchange"}
+
+# Header layouts (network byte order).
+unpack_ushort = struct.Struct(">H").unpack_from
+unpack_uint = struct.Struct(">I").unpack_from
+unpack_ipv4_bytes = struct.Struct("4B").unpack_from
+unpack_mac_bytes = struct.Struct("6B").unpack_from
+unpack_ipv4_header = struct.Struct(">BxHxxHxB").unpack_from    # version/IHL, total length, flags/fragment, protocol
+unpack_ipv6_header = struct.Struct(">4xHB").unpack_from        # payload length, next header
+unpack_tcp_header = struct.Struct(">HHIIHH").unpack_from       # ports, seq, ack, data offset/flags, window
+unpack_udp_header = struct.Struct(">HHH").unpack_from          # ports, length
+unpack_arp_header = struct.Struct(">HHBBH").unpack_from        # hardware, protocol, sizes, opcode
+unpack_dns_header = struct.Struct(">HHHH").unpack_from         # id, flags, questions, answers
+unpack_dns_record = struct.Struct(">HHIH").unpack_from         # type, class, TTL, data length
+unpack_tls_record = struct.Struct(">BHH").unpack_from          # content type, version, length
+broadcast_mac = (0xFF,) * 6
+inet_ntop, AF_INET6 = socket.inet_ntop, socket.AF_INET6
+
+# Source and destination used when a frame carries no addresses that could be decoded.
+unknown_address = "unknown"
+
+
+# Function to check whether a file path names a packet capture (or stdin) rather than a text export.
+def is_capture_path(file_path):
+    return file_path == stdin_path or file_path.lower().endswith(capture_extensions)
+
+
+# Functions to format addresses found at 'offset' in a frame.
+def ipv4_address(frame, offset):
+    return "%d.%d.%d.%d" % unpack_ipv4_bytes(frame, offset)
+
+
+def ipv6_address(frame, offset):
+    return inet_ntop(AF_INET6, frame[offset:offset + 16])
+
+
+def mac_address(frame, offset):
+    octets = unpack_mac_bytes(frame, offset)
+    return "Broadcast" if octets == broadcast_mac else "%02x:%02x:%02x:%02x:%02x:%02x" % octets
+
+
+# Function to decode one captured frame of the given link type into (source, destination, protocol, info).
+# Raises struct.error, IndexError or ValueError if the frame is truncated or malformed.
+def decode_frame(frame, linktype):
+    if linktype == linktype_ethernet:
+        return decode_ethernet(frame)
+    if linktype in raw_linktypes:
+        return decode_ip(frame, 0)
+    if linktype == linktype_linux_sll:
+        # Packet type, link-layer address type, address length, address (8 bytes), protocol
+        packet_type = unpack_ushort(frame, 0)[0]
+        source = mac_address(frame, 6) if unpack_ushort(frame, 4)[0] == 6 else unknown_address
+        destination = "Broadcast" if packet_type == 1 else unknown_address
+        return decode_ethertype(frame, 16, unpack_ushort(frame, 14)[0], source, destination)
+    if linktype == linktype_linux_sll2:
+        # Protocol, reserved, interface index, link-layer address type, packet type, address length, address
+        source = mac_address(frame, 12) if frame[11] == 6 else unknown_address
+        destination = "Broadcast" if frame[10] == 1 else unknown_address
+        return decode_ethertype(frame, 20, unpack_ushort(frame, 0)[0], source, destination)
+    if linktype == linktype_null:
+        # A 4-byte address family in the capturing host's byte order; the IP version is read from the packet itself
+        return decode_ip(frame, 4)
+    return unknown_address, unknown_address, "LINKTYPE_%d" % linktype, "Link type %d not decoded" % linktype
+
+
+# Function to decode an Ethernet II frame, skipping any VLAN tags.
+# IP packets are addressed by their IP header, so the MAC addresses are only formatted for other frames.
+def decode_ethernet(frame):
+    ethertype = unpack_ushort(frame, 12)[0]
+    offset = 14
+    while ethertype in vlan_ethertypes:
+        ethertype = unpack_ushort(frame, offset + 2)[0]
+        offset += 4
+    if ethertype == ethertype_ipv4:
+        return decode_ipv4(frame, offset)
+    if ethertype == ethertype_ipv6:
+        return decode_ipv6(frame, offset)
+    return decode_ethertype(frame, offset, ethertype, mac_address(frame, 6), mac_address(frame, 0))
+
+
+# Function to decode the payload of a link-layer frame by its Ethernet type.
+def decode_ethertype(frame, offset, ethertype, source, destination):
+    if ethertype == ethertype_ipv4:
+        return decode_ipv4(frame, offset)
+    if ethertype == ethertype_ipv6:
+        return decode_ipv6(frame, offset)
+    if ethertype == ethertype_arp:
+        return decode_arp(frame, offset, source, destination)
+    if ethertype < 0x0600:
+        # IEEE 802.3 length field: an LLC frame, e.g. spanning tree (DSAP 0x42)
+        if frame[offset] == 0x42:
+            return source, destination, "STP", "Spanning Tree Protocol"
+        return source, destination, "LLC", "IEEE 802.3 LLC frame"
+    return source, destination, ethertype_names.get(ethertype, "0x%04x" % ethertype), "Ethernet type 0x%04x" % ethertype
+
+
+# Function to decode an IP packet without a link-layer header, by its version.
+def decode_ip(frame, offset):
+    version = frame[offset] >> 4
+    if version == 4:
+        return decode_ipv4(frame, offset)
+    if version == 6:
+        return decode_ipv6(frame, offset)
+    raise ValueError(f"Unknown IP version {version}")
+
+
+# Function to decode an ARP packet (Ethernet/IPv4 addresses); source and destination are the link-layer addresses.
+def decode_arp(frame, offset, source, destination):
+    hardware, protocol, hardware_size, protocol_size, opcode = unpack_arp_header(frame, offset)
+    if hardware_size != 6 or protocol_size != 4:
+        return source, destination, "ARP", "Opcode %d" % opcode
+    sender = ipv4_address(frame, offset + 14)
+    target = ipv4_address(frame, offset + 24)
+    if opcode == 1:
+        if sender == target:
+            info = "Gratuitous ARP for %s (Request)" % sender
+        elif sender == "0.0.0.0":
+            info = "Who has %s? (ARP Probe)" % target
+        else:
+            info = "Who has %s? Tell %s" % (target, sender)
+    elif opcode == 2:
+        info = "%s is at %s" % (sender, mac_address(frame, offset + 8))
+    else:
+        info = "Opcode %d" % opcode
+    return source, destination, "ARP", info
+
+
+# Function to decode an IPv4 packet and its transport-layer header.
+def decode_ipv4(frame, offset):
+    first, total_length, fragment, protocol = unpack_ipv4_header(frame, offset)
+    header_length = (first & 0x0F) * 4
+    source = ipv4_address(frame, offset + 12)
+    destination = ipv4_address(frame, offset + 16)
+    if fragment & 0x1FFF:
+        return source, destination, "IPv4", "Fragmented IP protocol (proto=%d, off=%d)" % (
+            protocol, (fragment & 0x1FFF) * 8)
+    # A total length of 0 is left by TCP segmentation offload: the packet runs to the end of the frame.
+    size = (total_length or len(frame) - offset) - header_length
+    return decode_transport(frame, offset + header_length, size, protocol, source, destination, "IPv4")
+
+
+# Function to decode an IPv6 packet, skipping its extension headers, and its transport-layer header.
+def decode_ipv6(frame, offset):
+    size, protocol = unpack_ipv6_header(frame, offset)
+    source = ipv6_address(frame, offset + 8)
+    destination = ipv6_address(frame, offset + 24)
+    end = offset + 40 + (size or len(frame) - offset - 40)
+    offset += 40
+    while True:
+        if protocol in ipv6_extension_headers:
+            protocol, extension_size = frame[offset], (frame[offset + 1] + 1) * 8
+        elif protocol == ipv6_authentication:
+            protocol, extension_size = frame[offset], (frame[offset + 1] + 2) * 4
+        elif protocol == ipv6_fragment:
+            fragment_offset = unpack_ushort(frame, offset + 2)[0] & 0xFFF8
+            if fragment_offset:
+                return source, destination, "IPv6", "Fragmented IP protocol (proto=%d, off=%d)" % (
+                    frame[offset], fragment_offset)
+            protocol, extension_size = frame[offset], 8
+        else:
+            break
+        offset += extension_size
+    return decode_transport(frame, offset, end - offset, protocol, source, destination, "IPv6")
+
+
+# Function to decode the transport layer of an IP packet; 'size' is its length according to the IP header.
+# A transport header cut short by the capture's snapshot length still leaves the addresses.
+def decode_transport(frame, offset, size, protocol, source, destination, network):
+    try:
+        if protocol == ip_tcp:
+            name, info = decode_tcp(frame, offset, size)
+        elif protocol == ip_udp:
+            name, info = decode_udp(frame, offset, size)
+        elif protocol == ip_icmp:
+            name, info = decode_icmp(frame, offset)
+        elif protocol == ip_icmpv6:
+            name, info = decode_icmpv6(frame, offset)
+        elif protocol == ip_igmp:
+            igmp_type = frame[offset]
+            name = "IGMPv3" if igmp_type == 0x22 else "IGMPv2"
+            info = igmp_types.get(igmp_type) or "Type 0x%02x" % igmp_type
+        else:
+            name, info = ip_protocol_names.get(protocol, network), "IP protocol %d" % protocol
+    except (struct.error, IndexError):
+        malformed_packets.inc()
+        name, info = network, "IP protocol %d [Truncated]" % protocol
+    return source, destination, name, info
+
+
+# Function to decode a TCP segment. Segments carrying data are named after their application protocol when it is
+# recognised (TLS records on any port, otherwise by port), with that protocol's Info.
+def decode_tcp(frame, offset, size):
+    source_port, destination_port, sequence, acknowledgement, offset_flags, window = unpack_tcp_header(frame, offset)
+    header_length = (offset_flags >> 12) * 4
+    length = size - header_length
+    if length > 0:
+        payload = offset + header_length
+        end = min(len(frame), offset + size)
+        if end - payload >= 5 and 20 <= frame[payload] <= 23 and frame[payload + 1] == 3:
+            protocol = "TLS"
+        else:
+            protocol = tcp_port_protocols.get(min(source_port, destination_port)) or \
+                       tcp_port_protocols.get(max(source_port, destination_port))
+        if protocol is not None and payload < end:
+            try:
+                return application_decoders[protocol](frame, payload, end, source_port, destination_port, length)
+            except (struct.error, IndexError, ValueError):
+                pass  # Not what the port suggested, or truncated: show the TCP header instead
+    flags = offset_flags & 0xFF
+    if flags & 0x10:
+        return "TCP", "%d → %d [%s] Seq=%d Ack=%d Win=%d Len=%d" % (
+            source_port, destination_port, tcp_flag_names[flags], sequence, acknowledgement, window, length)
+    return "TCP", "%d → %d [%s] Seq=%d Win=%d Len=%d" % (
+        source_port, destination_port, tcp_flag_names[flags], sequence, window, length)
+
+
+# Function to decode a UDP datagram, named after its application protocol when the port is recognised.
+def decode_udp(frame, offset, size):
+    source_port, destination_port, length = unpack_udp_header(frame, offset)
+    protocol = udp_port_protocols.get(min(source_port, destination_port)) or \
+               udp_port_protocols.get(max(source_port, destination_port))
+    payload = offset + 8
+    end = min(len(frame), offset + size)
+    if protocol is not None and payload < end:
+        try:
+            return application_decoders[protocol](frame, payload, end, source_port, destination_port, length - 8)
+        except (struct.error, IndexError, ValueError):
+            pass  # Not what the port suggested, or truncated: show the UDP header instead
+    return "UDP", "%d → %d Len=%d" % (source_port, destination_port, length - 8)
+
+
+# Function to decode an ICMP message.
+def decode_icmp(frame, offset):
+    icmp_type, code = frame[offset], frame[offset + 1]
+    name = icmp_types.get(icmp_type)
+    if name is None:
+        return "ICMP", "Type %d, code %d" % (icmp_type, code)
+    if icmp_type == 0 or icmp_type == 8:
+        identifier, sequence = unpack_ushort(frame, offset + 4)[0], unpack_ushort(frame, offset + 6)[0]
+        return "ICMP", "%s id=0x%04x, seq=%d" % (name, identifier, sequence)
+    return "ICMP", name
+
+
+# Function to decode an ICMPv6 message, with the target address of neighbor discovery messages.
+def decode_icmpv6(frame, offset):
+    icmp_type, code = frame[offset], frame[offset + 1]
+    name = icmpv6_types.get(icmp_type)
+    if name is None:
+        return "ICMPv6", "Type %d, code %d" % (icmp_type, code)
+    if icmp_type == 135:
+        return "ICMPv6", "%s for %s" % (name, ipv6_address(frame, offset + 8))
+    if icmp_type == 136:
+        return "ICMPv6", "%s %s" % (name, ipv6_address(frame, offset + 8))
+    return "ICMPv6", name
+
+
+# Application-layer decoders: each takes (frame, payload offset, payload end, source port, destination port,
+# payload length on the wire) and returns (protocol, info).
+
+# Function to return the first line of a text protocol's payload (HTTP, FTP, SMTP, ...).
+def text_info(protocol):
+    def decode(frame, payload, end, source_port, destination_port, length):
+        text = str(frame[payload:min(end, payload + max_info_length)], 'utf-8', 'replace')
+        line = text.partition('\n')[0].rstrip('\r')
+        return protocol, line if line and line.isprintable() else "Continuation"
+    return decode
+
+
+# Function to describe an SSH segment: the version banner, or the size of an encrypted packet.
+def ssh_info(frame, payload, end, source_port, destination_port, length):
+    side = "Client" if destination_port == 22 else "Server"
+    if frame[payload:payload + 4] == b"SSH-":
+        banner = str(frame[payload:min(end, payload + max_info_length)], 'utf-8', 'replace').partition('\r')[0]
+        return "SSH", "%s: Protocol (%s)" % (side, banner.rstrip('\n'))
+    return "SSH", "%s: Encrypted packet (len=%d)" % (side, length)
+
+
+# Function to describe a Telnet segment.
+def telnet_info(frame, payload, end, source_port, destination_port, length):
+    return "TELNET", "Telnet Data ..."
+
+
+# Function to list the TLS records of a segment, e.g. "Server Hello, Change Cipher Spec".
+def tls_info(frame, payload, end, source_port, destination_port, length):
+    names = []
+    version = None
+    while payload + 5 <= end:
+        content_type, record_version, record_length = unpack_tls_record(frame, payload)
+        if content_type == 22:
+            handshake_type = frame[payload + 5] if payload + 5 < end else None
+            names.append(tls_handshake_types.get(handshake_type, "Encrypted Handshake Message"))
+            if handshake_type == 1 or handshake_type == 2:
+                # Hello records often carry an older record version; the hello itself has the negotiated one
+                record_version = unpack_ushort(frame, payload + 9)[0]
+        elif content_type in tls_content_types:
+            names.append(tls_content_types[content_type])
+        else:
+            break  # The rest of the segment continues a record started in an earlier one
+        version = version or record_version
+        payload += 5 + record_length
+    if not names:
+        raise ValueError("No TLS record")
+    return tls_versions.get(version, "TLS"), ", ".join(names)
+
+
+# Function to read a (possibly compressed) domain name at 'position' of the DNS message starting at 'message'.
+# Returns the name and the position just after it.
+def dns_name(frame, message, position):
+    labels = []
+    after = None
+    for _ in range(128):                # Bounds the loop on malicious compression pointers
+        size = frame[position]
+        if size == 0:
+            return ".".join(labels) or "<Root>", after or position + 1
+        if size >= 0xC0:
+            after = after or position + 2
+            position = message + ((size & 0x3F) << 8 | frame[position + 1])
+        else:
+            labels.append(str(frame[position + 1:position + 1 + size], 'utf-8', 'replace'))
+            position += 1 + size
+    raise ValueError("DNS name too long")
+
+
+# Function to summarise a DNS, MDNS or LLMNR message: its questions, then the data of its answers.
+def dns_info(protocol):
+    mdns = protocol == "MDNS"
+
+    def decode(frame, payload, end, source_port, destination_port, length):
+        identifier, flags, questions, answers = unpack_dns_header(frame, payload)
+        parts = ["Standard query response 0x%04x" % identifier if flags & 0x8000
+                 else "Standard query 0x%04x" % identifier]
+        position = payload + 12
+        try:
+            for _ in range(min(questions, max_dns_records)):
+                name, position = dns_name(frame, payload, position)
+                record_type, record_class = unpack_ushort(frame, position)[0], unpack_ushort(frame, position + 2)[0]
+                position += 4
+                item = "%s %s" % (dns_types.get(record_type, record_type), name)
+                if mdns:
+                    item += ', "QU" question' if record_class & 0x8000 else ', "QM" question'
+                parts.append(item)
+            for _ in range(min(answers, max_dns_records)):
+                _, position = dns_name(frame, payload, position)
+                record_type, record_class, _, data_length = unpack_dns_record(frame, position)
+                data = position + 10
+                position = data + data_length
+                item = dns_types.get(record_type, str(record_type))
+                if record_type == 1 and data_length == 4:
+                    item += " " + ipv4_address(frame, data)
+                elif record_type == 28 and data_length == 16:
+                    item += " " + ipv6_address(frame, data)
+                elif record_type in dns_name_types:
+                    item += " " + dns_name(frame, payload, data)[0]
+                if mdns and record_class & 0x8000:
+                    item += ", cache flush"
+                parts.append(item)
+        except (struct.error, IndexError, ValueError):
+            pass  # Truncated by the snapshot length: keep what was decoded
+        return protocol, " ".join(parts)
+    return decode
+
+
+# Function to describe a QUIC packet: the long header type and connection ID, or a short header's key phase.
+def quic_info(frame, payload, end, source_port, destination_port, length):
+    first = frame[payload]
+    if not first & 0x40:
+        raise ValueError("QUIC fixed bit not set")
+    if not first & 0x80:
+        return "QUIC", "Protected Payload (KP%d)" % (first >> 2 & 1)
+    if unpack_uint(frame, payload + 1)[0] == 0:
+        return "QUIC", "Version Negotiation"
+    connection_id_length = frame[payload + 5]
+    if connection_id_length:
+        connection_id = "DCID=" + frame[payload + 6:payload + 6 + connection_id_length].hex()
+    else:
+        source_id = payload + 6
+        connection_id = "SCID=" + frame[source_id + 1:source_id + 1 + frame[source_id]].hex()
+    return "QUIC", "%s, %s" % (quic_long_types[first >> 4 & 3], connection_id)
+
+
+# Function to describe a DHCP message by its message type option.
+def dhcp_info(frame, payload, end, source_port, destination_port, length):
+    transaction = unpack_uint(frame, payload + 4)[0]
+    position = payload + 240            # Options follow the fixed header and the magic cookie
+    while position < end:
+        option = frame[position]
+        if option == 53:
+            message_type = frame[position + 2]
+            return "DHCP", "DHCP %s - Transaction ID 0x%08x" % (
+                dhcp_types.get(message_type, message_type), transaction)
+        if option == 255:
+            break
+        position += 1 if option == 0 else 2 + frame[position + 1]
+    return "DHCP", "BOOTP - Transaction ID 0x%08x" % transaction
+
+
+# Function to describe a DHCPv6 message by its type and transaction ID.
+def dhcpv6_info(frame, payload, end, source_port, destination_port, length):
+    message_type = frame[payload]
+    name = dhcpv6_types.get(message_type) or "Message type %d" % message_type
+    return "DHCPv6", "%s XID: 0x%06x" % (name, unpack_uint(frame, payload)[0] & 0xFFFFFF)
+
+
+# Function to describe an NTP packet by its version and mode.
+def ntp_info(frame, payload, end, source_port, destination_port, length):
+    first = frame[payload]
+    mode = first & 7
+    return "NTP", "NTP Version %d, %s" % (first >> 3 & 7, ntp_modes.get(mode) or "mode %d" % mode)
+
+
+# Application decoders by protocol name.
+application_decoders = {
+    "DHCP": dhcp_info,
+    "DHCPv6": dhcpv6_info,
+    "DNS": dns_info("DNS"),
+    "FTP": text_info("FTP"),
+    "HTTP": text_info("HTTP"),
+    "IMAP": text_info("IMAP"),
+    "LLMNR": dns_info("LLMNR"),
+    "MDNS": dns_info("MDNS"),
+    "NTP": ntp_info,
+    "POP": text_info("POP"),
+    "QUIC": quic_info,
+    "SMTP": text_info("SMTP"),
+    "SSDP": text_info("SSDP"),
+    "SSH": ssh_info,
+    "TELNET": telnet_info,
+    "TLS": tls_info,
+}
+
+
+# Class decoding the records of a pcap or pcapng capture into Packets.
+# packets() decodes every complete record in a buffer and remembers how far it got (position), so a stream can be
+# fed to it one read at a time; the file header, interfaces and packet numbering carry over between calls.
+class CaptureParser:
+    def __init__(self):
+        self.position = 0               # Offset in the last buffer just after the last complete record
+        self.format = None              # "pcap" or "pcapng", once the start of the capture has been read
+        self.number = 0                 # Frames read so far, i.e. the "No." of the last packet
+        # Timestamps are kept as (whole seconds, fraction of a second), so relative times keep their precision
+        self.first_time = None          # Timestamp of the first frame; Packet times are relative to it
+        self.last_time = (0, 0.0)       # Timestamp of the last frame, for pcapng blocks without one
+        # pcap: per-record header layout, seconds per timestamp fraction unit and the file's link type
+        self.record_header = None
+        self.resolution = 1e-6
+        self.linktype = linktype_ethernet
+        # pcapng: block layouts in the current section's byte order, and (link type, timestamp units per second)
+        # of each interface of the section
+        self.block_header = self.enhanced_packet = self.obsolete_packet = self.option_header = None
+        self.interfaces = []
+
+    # Function to yield the Packets of the complete records in 'view' from 'position'. Sets self.position to the
+    # offset just after the last record yielded; an incomplete record at the end is left for the next call.
+    def packets(self, view, position=0):
+        self.position = position
+        if self.format is None:
+            position = self.read_header(view, position)
+            if position is None:
+                return
+        if self.format == "pcap":
+            yield from self.pcap_packets(view, position)
+        else:
+            yield from self.pcapng_packets(view, position)
+
+    # Function to recognise the capture format. Returns the offset of the first record, or None if 'view' does not
+    # hold the whole file header yet. Raises ValueError if this is not a pcap or pcapng capture.
+    def read_header(self, view, position):
+        if len(view) - position < 4:
+            return None
+        if struct.unpack_from("<I", view, position)[0] == pcapng_section:
+            self.format = "pcapng"
+            return position
+        for byte_order in "<>":
+            magic = struct.unpack_from(byte_order + "I", view, position)[0]
+            if magic in pcap_magic:
+                break
+        else:
+            raise ValueError("Not a pcap or pcapng capture")
+        if len(view) - position < pcap_header_size:
+            return None
+        linktype = struct.unpack_from(byte_order + "I", view, position + 20)[0]
+        self.record_header = struct.Struct(byte_order + "IIII")   # seconds, fraction, captured, original length
+        self.resolution = pcap_magic[magic]
+        self.linktype = linktype & 0x0FFFFFFF                     # The upper bits may describe an FCS
+        self.format = "pcap"
+        self.position = position + pcap_header_size
+        return self.position
+
+    # Function to build the Packet of one frame (a memoryview of the captured bytes) captured at 'seconds' plus
+    # 'fraction' of a second.
+    def packet(self, frame, linktype, seconds, fraction, length):
+        self.number += 1
+        if self.first_time is None:
+            self.first_time = (seconds, fraction)
+        self.last_time = (seconds, fraction)
+        first_seconds, first_fraction = self.first_time
+        try:
+            source, destination, protocol, info = decode_frame(frame, linktype)
+        except (struct.error, IndexError, ValueError):
+            malformed_packets.inc()
+            source = destination = unknown_address
+            protocol, info = "Malformed", "[Malformed or truncated frame]"
+        packets_read.inc()
+        return _new_packet(Packet, (self.number, (seconds - first_seconds) + (fraction - first_fraction), source,
+                                    destination, protocol, length, info))
+
+    # Function to yield the Packets of the pcap records in 'view' from 'position'.
+    def pcap_packets(self, view, position):
+        unpack_record = self.record_header.unpack_from
+        resolution, linktype = self.resolution, self.linktype
+        size = len(view)
+        while size - position >= pcap_record_size:
+            seconds, fraction, captured, length = unpack_record(view, position)
+            if captured > max_record_size:
+                raise ValueError(f"Corrupt pcap record at offset {position} ({captured} bytes)")
+            start = position + pcap_record_size
+            position = start + captured
+            if position > size:
+                return  # Incomplete record
+            self.position = position
+            yield self.packet(view[start:position], linktype, seconds, fraction * resolution, length)
+
+    # Function to yield the Packets of the pcapng blocks in 'view' from 'position'.
+    def pcapng_packets(self, view, position):
+        size = len(view)
+        while size - position >= 12:
+            if struct.unpack_from("<I", view, position)[0] == pcapng_section:
+                self.start_section(view, position)
+            if self.block_header is None:
+                raise ValueError("pcapng capture does not start with a section header block")
+            block_type, block_length = self.block_header.unpack_from(view, position)
+            if block_length < 12 or block_length % 4 or block_length > max_record_size:
+                raise ValueError(f"Corrupt pcapng block at offset {position} ({block_length} bytes)")
+            end = position + block_length
+            if end > size:
+                return  # Incomplete block
+            body = position + 8
+            packet = None
+            if block_type == pcapng_enhanced_packet:
+                interface, high, low, captured, length = self.enhanced_packet.unpack_from(view, body)
+                linktype, units_per_second = self.interface(interface)
+                seconds, units = divmod(high << 32 | low, units_per_second)
+                packet = self.packet(self.block_data(view, body + 20, captured, end), linktype, seconds,
+                                     units / units_per_second, length)
+            elif block_type == pcapng_simple_packet:
+                length = self.block_header.unpack_from(view, body)[0]
+                linktype, _ = self.interface(0)
+                captured = min(length, block_length - 16)
+                packet = self.packet(self.block_data(view, body + 4, captured, end), linktype, *self.last_time,
+                                     length)
+            elif block_type == pcapng_obsolete_packet:
+                interface, _, high, low, captured, length = self.obsolete_packet.unpack_from(view, body)
+                linktype, units_per_second = self.interface(interface)
+                seconds, units = divmod(high << 32 | low, units_per_second)
+                packet = self.packet(self.block_data(view, body + 20, captured, end), linktype, seconds,
+                                     units / units_per_second, length)
+            elif block_type == pcapng_interface:
+                self.interfaces.append(self.read_interface(view, body, end - 4))
+            position = self.position = end
+            if packet is not None:
+                yield packet
+
+    # Function to start a new pcapng section: its byte order applies to every block up to the next section.
+    def start_section(self, view, position):
+        magic = struct.unpack_from("<I", view, position + 8)[0]
+        if magic == pcapng_byte_order:
+            byte_order = "<"
+        elif struct.unpack_from(">I", view, position + 8)[0] == pcapng_byte_order:
+            byte_order = ">"
+        else:
+            raise ValueError(f"Corrupt pcapng section header at offset {position}")
+        self.block_header = struct.Struct(byte_order + "II")                # block type, block length
+        self.enhanced_packet = struct.Struct(byte_order + "IIIII")          # interface, time, captured, length
+        self.obsolete_packet = struct.Struct(byte_order + "HHIIII")         # interface, drops, time, lengths
+        self.option_header = struct.Struct(byte_order + "HH")               # option code, option length
+        self.interfaces = []
+
+    # Function to return the (link type, timestamp units per second) of a pcapng interface.
+    def interface(self, interface):
+        if interface >= len(self.interfaces):
+            raise ValueError(f"pcapng packet for undeclared interface {interface}")
+        return self.interfaces[interface]
+
+    # Function to return the captured bytes of a pcapng packet block, checking they lie within the block.
+    @staticmethod
+    def block_data(view, start, captured, end):
+        if start + captured > end - 4:
+            raise ValueError(f"Corrupt pcapng packet block at offset {start}")
+        return view[start:start + captured]
+
+    # Function to read a pcapng interface description block: its link type and timestamp units per second.
+    def read_interface(self, view, body, end):
+        linktype = self.option_header.unpack_from(view, body)[0]
+        units_per_second = default_units_per_second
+        position = body + 8             # Link type, reserved, snapshot length, then options
+        while position + 4 <= end:
+            code, length = self.option_header.unpack_from(view, position)
+            if code == option_end:
+                break
+            if code == option_tsresol and length >= 1:
+                value = view[position + 4]
+                units_per_second = 2 ** (value & 0x7F) if value & 0x80 else 10 ** value
+            position += 4 + (length + 3) // 4 * 4
+        return linktype, units_per_second
+
+
+# Function to yield the Packets of a capture file. The file is memory-mapped and decoded in place; pages already
+# decoded are released every Traffic_Reader.release_interval bytes, so resident memory stays bounded.
+def iter_file_packets(file_path):
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return  # mmap cannot map an empty file
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            can_release = hasattr(mapping, "madvise")
+            if can_release:
+                mapping.madvise(mmap.MADV_SEQUENTIAL)  # Hint the kernel to read ahead
+            view = memoryview(mapping)
+            parser = CaptureParser()
+            packets = parser.packets(view)
+            released = 0
+            try:
+                for packet in packets:
+                    yield packet
+                    if can_release and parser.position - released >= Traffic_Reader.release_interval:
+                        release_end = parser.position - parser.position % mmap.PAGESIZE
+                        mapping.madvise(mmap.MADV_DONTNEED, released, release_end - released)
+                        released = release_end
+                if parser.format is None:
+                    raise ValueError("Not a pcap or pcapng capture")
+                if parser.position < len(view):
+                    Traffic_Metrics.log.always("Ignoring an incomplete record at the end of %s", file_path)
+            finally:
+                packets.close()
+                view.release()  # The mapping cannot be closed while a view of it exists
+
+
+# Function to yield the Packets of a capture read from a binary stream, such as the output of `tcpdump -U -w -`.
+# Packets are yielded as soon as their record has been read; only an incomplete record is carried between reads.
+def iter_stream_packets(stream):
+    read = getattr(stream, "read1", stream.read)    # read1 returns what is available instead of waiting for more
+    parser = CaptureParser()
+    pending = b""
+    while True:
+        data = read(read_size)
+        if not data:
+            break
+        buffer = pending + data if pending else data
+        yield from parser.packets(memoryview(buffer))
+        pending = buffer[parser.position:]
+    if parser.format is None and pending:
+        raise ValueError("Not a pcap or pcapng capture")
+    if pending:
+        Traffic_Metrics.log.always("Ignoring %d bytes of an incomplete record at the end of the capture stream",
+                                   len(pending))
+
+
+# Function to yield the Packets of a capture file, or of the capture streamed on stdin when file_path is "-".
+def read_packets(file_path):
+    if file_path == stdin_path:
+        return iter_stream_packets(sys.stdin.buffer)
+    return iter_file_packets(file_path)
+
+
+# Main function: print the packets of a capture as the text messages the publishers send, or publish them with
+# Publish_Private.py's topics, connection, spool and settings.
+def run(file_path, publish=False):
+    if publish:
+        import Publish_Private      # Imported here: Publish_Private.py uses this module to read captures
+        Publish_Private.file_path = file_path
+        Publish_Private.run(once=True)
+        return
+    try:
+        for packet in read_packets(file_path):
+            print(Traffic_Parser.format_packet_message(packet))
+    except FileNotFoundError:
+        print(f"Error: The file '{file_path}' was not found.")
+    except (IOError, ValueError) as e:
+        print(f"Error reading the capture: {e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Decode a pcap/pcapng capture into packet records.")
+    parser.add_argument("file_path", help='capture file, or "-" to read it from stdin')
+    parser.add_argument("--publish", action="store_true", help="publish the packets like Publish_Private.py")
+    arguments = parser.parse_args()
+    run(arguments.file_path, arguments.publish)
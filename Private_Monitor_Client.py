@@ -6,100 +6,188 @@
 import paho.mqtt.client as mqtt     # For MQTT communication (publish/subscribe to topics)
 import time                         # Used to introduce delays in execution (e.g., between message publishing)
 import random                       # Used to generate unique client IDs for MQTT connections
-import socket                       # Handles network-related errors (e.g., connection issues)
+import MQTT_Connection              # Shared broker settings and connection handling
+import struct                       # Error raised when a binary record is truncated
+import Recommendation_Store         # Cached recommendations, indexed by alert category
+import Response_Pipeline            # Worker pool that sends responses off the MQTT network thread
+import Traffic_Analytics            # Per-protocol counts and top talkers of the received traffic
+import Traffic_Batcher              # Unpacks batches of messages sent by Publish_Private.py
+import Traffic_Codec                # Decodes binary packet records
+import Traffic_Metrics              # Counters, latency histograms and the sampled log
+import Traffic_Parser               # Parses text messages and formats decoded packets as text
 
 # Generating a unique client ID
 client_id = f'publish-{random.randint(0, 100)}'  # Creates a random ID to distinguish this client instance
 
 # Defining the private subscription topics for incoming messages
+private_sub_topic1 = f'{103818400}/Expected Traffic'  # Topic to subscribe to expected traffic (for the analytics)
 private_sub_topic2 = f'{103818400}/Suspicious Traffic'  # Topic to subscribe to suspicious traffic notifications
 private_sub_topic3 = f'{103818400}/Solutions'  # Topic for publishing/receiving solution or recommendation messages
+private_pub_topic_summary = f'{103818400}/Summary'  # Topic for the periodic traffic summaries (see Traffic_Analytics.py)
 
 # Define the file path for recommendations to be published
 recommendations_file_path = "Recommendations.txt"  # Path where the recommendation messages are stored in a file
 
-# Variable to keep track of whether all recommendations have been published
-all_recommendations_published = False  # Set to False initially, changes when all recommendations are sent
-
-# Establish an MQTT connection
+# Recommendations are loaded once into memory, indexed by alert category, and re-read only when the file changes.
+# A (source, alert category) pair that was answered is not answered again for memo_ttl seconds.
+recommendation_store = Recommendation_Store.RecommendationStore(recommendations_file_path,
+                                                                Recommendation_Store.memo_ttl)
+
+# Delay (in seconds) between recommendations of one response. Responses are sent from worker threads,
+# so this only paces the Solutions topic and never holds up incoming messages.
+recommendation_interval = 0
+
+# Responses to suspicious traffic are queued and handled by a pool of worker threads (see Response_Pipeline.py).
+response_workers = 2                            # Number of worker threads
+response_queue_size = 100                       # Most responses waiting at once
+response_policy = Response_Pipeline.drop_oldest # What to do when the queue is full: drop_oldest or drop_newest
+
+# Most seconds to wait for the broker at startup before publishing the recommendations.
+connect_timeout = 5
+
+# How often (in seconds) the response pipeline statistics, including receipt-to-publish latency, are printed.
+stats_interval = 60
+
+# Port of the local metrics endpoint (http://127.0.0.1:<port>/metrics and /metrics.json), None to disable it.
+metrics_port = None
+
+# Streaming analytics of all received traffic: per-protocol counts and bytes over tumbling and sliding windows,
+# and the top talkers and conversations, in fixed memory. A compact JSON summary is published on the Summary topic
+# every summary_interval seconds, so dashboards need not subscribe to the raw traffic topics.
+traffic_analytics = Traffic_Analytics.TrafficAnalytics()
+summary_interval = Traffic_Analytics.summary_interval
+
+# Metrics for the receiving hot path, instead of printing every message.
+messages_received = Traffic_Metrics.counter("messages_received_total", "Packet messages received")
+malformed_messages = Traffic_Metrics.counter("malformed_messages_total", "Batches or records that could not be decoded")
+alerts_received = Traffic_Metrics.counter("alerts_received_total", "Received messages queued for a response")
+handle_latency = Traffic_Metrics.histogram("on_message_seconds", "Time to handle one MQTT message (batch)")
+recommendations_sent = Traffic_Metrics.counter("recommendations_sent_total", "Recommendations published")
+recommendation_failures = Traffic_Metrics.counter("recommendation_failures_total", "Recommendations not published")
+summaries_sent = Traffic_Metrics.counter("summaries_sent_total", "Traffic summaries published")
+
+# Establish an MQTT connection (see MQTT_Connection.py for the broker address and credentials).
+# The traffic topics (text and binary) and the solutions topic are subscribed once connected.
 def connect_mqtt():
-    # Inner function to handle the event when a connection is established
-    def on_connect(client, userdata, flags, rc):
-        if rc == 0:  # rc == 0 indicates a successful connection
-            print("Connected to MQTT Broker!")  # Print confirmation of successful connection
-
-            # Subscribe to topics to receive incoming messages
-            client.subscribe(private_sub_topic2)  # Subscribes to receive suspicious traffic notifications
-            client.subscribe(private_sub_topic3)  # Subscribes to receive solutions/recommendations
-        else:
-            print(f"Failed to connect, return code {rc}\n")  # Prints error if connection fails with error code
-
-    # Create an MQTT client instance with a unique client ID
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
-
-    # Set the username and password for MQTT broker authentication
-    client.username_pw_set(username="103818400", password="103818400")  # Authenticate with the broker
-
-    # Set the on_connect function as the handler for the connection event
-    client.on_connect = on_connect
-
-    try:
-        print("Attempting to connect to the MQTT broker...")
-        # Attempt to connect to the broker using its address, port, and keepalive time (60 seconds)
-        client.connect("rule28.i4t.swin.edu.au", 1883, keepalive=60)
-    except socket.timeout:
-        # Catch timeout exception if the broker is unreachable or there's a network issue
-        print("Connection attempt timed out. The broker might be unreachable or there might be network issues.")
-        return None
-    except socket.error as e:
-        # Catch any socket-related errors (e.g., network failure) and print the error message
-        print(f"Socket error occurred: {e}")
-        return None
-    except Exception as e:
-        # Catch any other unexpected exceptions and print the error message
-        print(f"An unexpected error occurred while connecting: {e}")
-        return None
-
-    return client  # Return the client object if the connection is successful
-
-# Function to handle incoming messages from subscribed topics
+    return MQTT_Connection.connect_mqtt(client_id, [
+        private_sub_topic1,                                     # Expected traffic, for the analytics only
+        private_sub_topic1 + Traffic_Codec.binary_topic_suffix, # Same, as binary records
+        private_sub_topic2,                                     # Suspicious traffic notifications
+        private_sub_topic2 + Traffic_Codec.binary_topic_suffix, # Same, as binary records
+        private_sub_topic3,                                     # Solutions/recommendations
+    ])
+
+# A decoded binary record, formatted as its text message only if the sampled log actually prints it.
+class PacketMessage:
+    __slots__ = ("packet", "alert")
+
+    def __init__(self, packet, alert):
+        self.packet = packet
+        self.alert = alert
+
+    def __str__(self):
+        return Traffic_Parser.format_packet_message(self.packet, self.alert)
+
+# Function to handle incoming messages from subscribed topics.
+# This runs on paho's network thread, so it must not block: responses are only queued here (userdata is the
+# response pipeline) and are sent by the pipeline's worker threads.
 def on_message(client, userdata, msg):
-    message = msg.payload.decode()  # Decode the incoming message payload from bytes to string
-    print(f"Received `{message}` from `{msg.topic}` topic")  # Display the received message and the topic
-
-    # Check if the message contains more than one comma to identify specific messages for recommendations
-    if message.count(',') > 1:
-        publish_recommendations(client)  # Call the function to publish recommendations
-
-# Function to publish recommendations read from a file
-def publish_recommendations(client):
+    started = time.perf_counter()
+    # A payload may be a batch of several messages framed by the publisher; unpack it into the individual messages.
     try:
-        # Open the file containing recommendations in read mode
-        with open(recommendations_file_path, 'r') as file:
-            recommendations = file.readlines()  # Read all lines (recommendations) from the file
-            
-            # Iterate through each recommendation in the file
-            for recommendation in recommendations:
-                # Publish each recommendation to the Solutions topic, stripping any leading/trailing whitespace
-                result, _ = client.publish(private_sub_topic3, recommendation.strip())
-                
-                # Check if the message was successfully published (result should be MQTT_ERR_SUCCESS)
-                if result == mqtt.MQTT_ERR_SUCCESS:
-                    print(f"Recommendation sent to topic `{private_sub_topic3}`: {recommendation.strip()}")  # Notify success
-                else:
-                    print(f"Failed to send recommendation to topic `{private_sub_topic3}`")  # Notify failure
-                
-                time.sleep(1)  # Introduce a delay between sending recommendations
-
-            # After sending all recommendations, mark all as published
-            global all_recommendations_published  # Reference the global variable
-            all_recommendations_published = True  # Set the flag to True
-    except FileNotFoundError:
-        # Handle the case where the file does not exist
-        print(f"Error: The file '{recommendations_file_path}' was not found.")
-    except IOError as e:
-        # Handle any file reading issues
-        print(f"Error reading the file: {e}")
+        messages = Traffic_Batcher.decode_batch(msg.payload)
+    except ValueError as e:
+        malformed_messages.inc()
+        Traffic_Metrics.log.always("Discarding malformed batch from `%s` topic: %s", msg.topic, e)
+        return
+
+    binary = msg.topic.endswith(Traffic_Codec.binary_topic_suffix)
+    traffic = msg.topic.startswith((private_sub_topic1, private_sub_topic2))
+    expected = msg.topic.startswith(private_sub_topic1)
+    for payload in messages:
+        if binary:
+            # Decode the binary packet record; its fields and alert are used as they are, without going through text
+            try:
+                packet, alert = Traffic_Codec.decode_record(payload)
+            except (ValueError, IndexError, struct.error) as e:
+                malformed_messages.inc()
+                Traffic_Metrics.log.always("Discarding malformed record from `%s` topic: %s", msg.topic, e)
+                continue
+            messages_received.inc()
+            Traffic_Metrics.log.sample("Received `%s` from `%s` topic", PacketMessage(packet, alert), msg.topic)
+            traffic_analytics.observe(packet)
+
+            # Every record is a packet; queue a response for the source host of the suspicious ones
+            if not expected:
+                userdata.submit(packet.source, alert)
+                alerts_received.inc()
+            continue
+
+        try:
+            message = payload.decode()  # Decode the incoming message payload from bytes to string
+        except UnicodeDecodeError as e:
+            malformed_messages.inc()
+            Traffic_Metrics.log.always("Discarding malformed message from `%s` topic: %s", msg.topic, e)
+            continue
+        packet = Traffic_Parser.parse_packet_message(message) if traffic else None
+        messages_received.inc()
+        Traffic_Metrics.log.sample("Received `%s` from `%s` topic", message, msg.topic)  # Show a sample of them
+        if packet is not None:
+            traffic_analytics.observe(packet)
+
+        # Check if the message contains more than one comma to identify specific messages for recommendations;
+        # expected traffic is only counted by the analytics.
+        if not expected and message.count(',') > 1:
+            # Queue a response for the packet's source host; repeated alerts from the same host are merged
+            if packet is None:
+                packet = Traffic_Parser.parse_packet_message(message)
+            source = packet.source if packet is not None else msg.topic
+            userdata.submit(source, Traffic_Parser.message_alert(message))
+            alerts_received.inc()
+
+    handle_latency.observe(time.perf_counter() - started)
+
+# Function to publish recommendations to the Solutions topic; by default, every recommendation in the file.
+# The recommendations come from the in-memory store, which only re-reads the file when it changes.
+# Returns True if every recommendation was published.
+def publish_recommendations(client, recommendations=None):
+    if recommendations is None:
+        recommendations = recommendation_store.all()
+    published = True
+
+    # Iterate through each recommendation
+    for recommendation in recommendations:
+        # Publish each recommendation to the Solutions topic
+        result, _ = client.publish(private_sub_topic3, recommendation)
+
+        # Check if the message was successfully published (result should be MQTT_ERR_SUCCESS)
+        if result == mqtt.MQTT_ERR_SUCCESS:
+            recommendations_sent.inc()
+            Traffic_Metrics.log.sample("Recommendation sent to topic `%s`: %s", private_sub_topic3, recommendation)
+        else:
+            recommendation_failures.inc()
+            Traffic_Metrics.log.always("Failed to send recommendation to topic `%s`", private_sub_topic3)
+            published = False
+
+        if recommendation_interval:
+            time.sleep(recommendation_interval)  # Introduce a delay between sending recommendations
+    return published
+
+# Function to respond to the alerts from one source (a Response_Pipeline job), run on a worker thread.
+# Only the recommendations relevant to the alert categories are sent, and categories already answered for this
+# source within the memo window are skipped. The categories are only remembered as answered once the
+# recommendations have been published, so a failure (e.g. while reconnecting) is answered again next time.
+# Returns True if the recommendations were published, False if publishing failed, and None if there was nothing to send.
+def respond_to_alerts(client, job):
+    categories = sorted(job.alerts)
+    recommendations = recommendation_store.for_alerts(job.source, categories)
+    if not recommendations:
+        Traffic_Metrics.log.sample("Alerts from `%s` were answered recently, no recommendations sent", job.source)
+        return None
+    if not publish_recommendations(client, recommendations):
+        return False
+    recommendation_store.remember(job.source, categories)
+    return True
 
 # Main function to run the MQTT client
 def run():
@@ -108,25 +196,54 @@ def run():
         print("Failed to establish connection. Exiting...")  # Exit if connection was unsuccessful
         return
 
-    client.loop_start()  # Start the MQTT client loop to process incoming/outgoing network traffic
+    # Responses are sent by worker threads; the message handler only queues them through this pipeline.
+    pipeline = Response_Pipeline.ResponsePipeline(lambda job: respond_to_alerts(client, job), response_workers,
+                                                  response_queue_size, response_policy)
+    client.user_data_set(pipeline)  # Passed to on_message as userdata
+
     client.on_message = on_message  # Set the message handler for incoming messages
-    
-    # Publish recommendations immediately after connecting
+    client.loop_start()  # Start the MQTT client loop to process incoming/outgoing network traffic
+    if metrics_port is not None:
+        Traffic_Metrics.start_http_server(metrics_port)  # Serve the metrics locally
+
+    # Publish recommendations immediately after connecting; the network loop connects in the background,
+    # so wait for it first, otherwise every recommendation fails with "not connected"
+    if not MQTT_Connection.wait_until_connected(client, connect_timeout):
+        Traffic_Metrics.log.always("Not connected after %d s, publishing recommendations anyway", connect_timeout)
     publish_recommendations(client)  # Call function to publish recommendations
-    
+
+    # Publish a traffic summary every summary_interval seconds from a background thread
+    summary_publisher = Traffic_Analytics.SummaryPublisher(
+        traffic_analytics, lambda summary: publish_summary(client, summary), summary_interval)
+
     try:
-        # Continue the program until all recommendations are published
-        while not all_recommendations_published:
-            time.sleep(1)  # Sleep to reduce CPU usage while waiting
+        # Keep monitoring until interrupted, reporting the response pipeline statistics periodically
+        while True:
+            time.sleep(stats_interval)
+            print(f"Response pipeline: {pipeline.stats()}")
+            print(f"Metrics: {Traffic_Metrics.snapshot()}")
     except KeyboardInterrupt:
         # Gracefully handle the program exit if interrupted (e.g., Ctrl+C)
         print("Program interrupted by user. Disconnecting...")
     finally:
-        # Stop the MQTT client loop and disconnect from the broker
+        # Let queued responses finish, then stop the MQTT client loop and disconnect from the broker
         print("Stopping MQTT loop and exiting...")
+        summary_publisher.close()
+        pipeline.close()
+        Traffic_Metrics.log.flush()  # Print the last sampled messages
+        print(f"Response pipeline: {pipeline.stats()}")
+        print(f"Metrics: {Traffic_Metrics.snapshot()}")
         client.loop_stop()
         client.disconnect()  # Disconnect from the MQTT broker
 
+# Function to publish one traffic summary (compact JSON) to the Summary topic.
+def publish_summary(client, summary):
+    result = client.publish(private_pub_topic_summary, summary)
+    if result[0] == mqtt.MQTT_ERR_SUCCESS:
+        summaries_sent.inc()
+    else:
+        Traffic_Metrics.log.always("Failed to send traffic summary to topic %s", private_pub_topic_summary)
+
 # Execute the MQTT client when this script is run directly
 if __name__ == '__main__':
     run()  # Call the main function to start the program
@@ -7,7 +7,17 @@
 import paho.mqtt.client as mqtt     # MQTT communication library
 import time                         # Used to introduce time delays
 import random                       # To generate random unique client IDs
-import socket                       # Handles socket-related errors for network communication
+import MQTT_Connection              # Shared broker settings and connection handling
+import Parallel_Ingest              # Parses and classifies large capture files in several processes
+import Pcap_Reader                  # Decodes .pcap/.pcapng captures and capture streams on stdin
+import Publish_Spool                # Keeps unsent batches on disk while the broker is unreachable
+import Traffic_Batcher              # Coalesces packets into one framed MQTT message per topic
+import Traffic_Classifier           # Rule table and sliding-window detectors for suspicious traffic
+import Traffic_Codec                # Compact binary encoding of packet records
+import Traffic_Metrics              # Counters, latency histograms and the sampled log
+import Traffic_Parser               # Parses capture lines into structured packet records
+import Traffic_Reader               # Streams lines from the capture file without loading it all into memory
+import Traffic_Tail                 # Follows the capture file and remembers how far it has been published
 
 # Generating a unique client ID for this session.
 # 'subscribe-' is prefixed to differentiate between publisher and subscriber clients, followed by a random number.
@@ -18,41 +28,9 @@ client_id = f'subscribe-{random.randint(0, 100)}'
 private_sub_topic1 = f'{103818400}/Expected Traffic'  # Topic for expected traffic
 private_sub_topic2 = f'{103818400}/Suspicious Traffic'  # Topic for suspicious traffic
 
-# Function to connect to the MQTT broker
+# Function to connect to the MQTT broker (see MQTT_Connection.py for the broker address and credentials)
 def connect_mqtt():
-    # Callback function executed when the connection to the broker is established.
-    def on_connect(client, userdata, flags, rc):
-        # rc (result code) 0 means connection successful.
-        if rc == 0:
-            print("Connected to MQTT Broker!")  # Successful connection message
-        else:
-            print(f"Failed to connect, return code {rc}\n")  # Failure message with the return code
-
-    # Creating a new MQTT client instance with the generated client_id.
-    # Using the latest CallbackAPIVersion.
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
-
-    # Setting authentication details for the MQTT broker (username and password).
-    client.username_pw_set(username="103818400", password="103818400")
-    
-    # Assigning the on_connect callback function, which is executed when the client connects to the broker.
-    client.on_connect = on_connect
-
-    # Attempting to connect to the broker located at "rule28.i4t.swin.edu.au" on port 1883.
-    try:
-        print("Attempting to connect to the MQTT broker...")
-        client.connect("rule28.i4t.swin.edu.au", 1883, keepalive=60)  # Establish connection with keepalive
-    except socket.timeout:
-        print("Connection attempt timed out. The broker might be unreachable or there might be network issues.")
-        return None  # Return None if connection fails
-    except socket.error as e:
-        print(f"Socket error occurred: {e}")  # Handle any socket-related errors
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred while connecting: {e}")  # Catch any other errors
-        return None
-
-    return client  # Return the connected client
+    return MQTT_Connection.connect_mqtt(client_id)
 
 # Function to subscribe to the relevant MQTT topics
 def subscribe(client: mqtt):
@@ -62,62 +40,170 @@ def subscribe(client: mqtt):
         print(f"Received `{msg.payload.decode()}` from `{msg.topic}` topic")
 
 # File path where the local network traffic data is stored.
+# This can also be a .pcap/.pcapng capture, which is decoded directly (see Pcap_Reader.py), or "-" to read a
+# capture streamed on stdin, e.g. `tcpdump -U -w - | python Pcap_Reader.py - --publish`.
 file_path = "Local_Sample.txt"
 
+# Follow mode only publishes lines appended to the file since the last pass, instead of the whole file every cycle.
+# The position reached is stored in the checkpoint file so a restart does not publish the same traffic again.
+follow_mode = True
+checkpoint_file_path = "Publish_Private.checkpoint"
+
+# Longest time (in seconds) to wait for new data before checking the file again.
+publish_interval = 10
+
+# Packets are batched per topic and sent as one framed message once max_batch packets are waiting or the linger
+# time (in milliseconds) has passed. Suspicious traffic uses a much shorter linger so alerts are not held back.
+# Set max_batch to 1 to send every packet as its own message again.
+max_batch = 50
+linger_ms = 1000
+suspicious_linger_ms = 50
+
+# Format of the published packets: "text" sends the labelled "No.: ..., Time: ..." message on the topics above,
+# "binary" sends compact binary records (see Traffic_Codec.py) on the same topics with "/binary" appended,
+# so subscribers of the text topics keep working unchanged.
+wire_format = "text"
+
+# QoS used to publish the batches. With QoS 1 the broker acknowledges every batch, which is what the PUBACK
+# latency and in-flight metrics measure; with QoS 0 they only track the hand-off to the network.
+publish_qos = 1
+
+# Batches that cannot be published while the broker is unreachable are kept in this spool file and replayed after
+# reconnecting (see Publish_Spool.py). When the spool is full, Expected Traffic is evicted before Suspicious Traffic.
+spool_file_path = "Publish_Private.spool"
+spool_max_bytes = Publish_Spool.spool_max_bytes
+
+# Most seconds to wait for the broker at startup before publishing into the spool.
+connect_timeout = 5
+
+# Most seconds to wait at exit for the broker to acknowledge the batches already sent.
+drain_timeout = 10
+
+# Number of worker processes used to parse and classify the capture when it is published as a whole (not in follow
+# mode), e.g. to backfill a large historical export; 0 parses on this thread. With parallel_ordered, every topic
+# receives its packets in the capture's "No." order. See Parallel_Ingest.py (also runnable on its own).
+parallel_workers = 0
+parallel_ordered = True
+
+# Port of the local metrics endpoint (http://127.0.0.1:<port>/metrics and /metrics.json), None to disable it.
+metrics_port = None
+
+# Metrics for the publishing hot path, instead of printing every packet.
+packets_published = {
+    private_sub_topic1: Traffic_Metrics.counter("packets_published_total", "Packets queued for publishing",
+                                                topic="expected"),
+    private_sub_topic2: Traffic_Metrics.counter("packets_published_total", "Packets queued for publishing",
+                                                topic="suspicious"),
+}
+packets_skipped = Traffic_Metrics.counter("lines_skipped_total", "Capture lines that were not packets")
+publish_failures = Traffic_Metrics.counter("publish_failures_total", "Packets that could not be queued")
+parse_latency = Traffic_Metrics.histogram("parse_seconds", "Time to parse one capture line")
+classify_latency = Traffic_Metrics.histogram("classify_seconds", "Time to classify one packet")
+enqueue_latency = Traffic_Metrics.histogram("publish_enqueue_seconds", "Time to queue one packet for publishing")
+
+# Classifier deciding which packets are suspicious. It keeps sliding-window state (ARP scans, SYN floods,
+# connection rates) across calls, so a single instance is shared by every pass over the capture.
+classifier = Traffic_Classifier.TrafficClassifier()
+
 # Function to read network traffic data from a file.
+# This is a generator: lines are streamed from a memory-mapped file one at a time, so memory use does not grow
+# with the size of the capture and publishing can start as soon as the first line has been read.
 def read_network_traffic_from_file(file_path):
     try:
-        # Open the file and read each line, ignoring lines that are empty.
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            return [line.strip() for line in file if line.strip()]  # Return list of non-empty lines
+        # Yield each non-empty line, skipping the Wireshark header row.
+        for line, _ in Traffic_Reader.iter_lines(file_path):
+            yield line
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")  # Handle the case where the file doesn't exist
-        return []
     except IOError as e:
         print(f"Error reading the file: {e}")  # Handle any IO errors
-        return []
+
+# Function to read the packets of a .pcap/.pcapng capture, or of a capture streamed on stdin.
+# Like read_network_traffic_from_file, this is a generator over a memory-mapped file (or the stream).
+def read_packets_from_capture(file_path):
+    try:
+        yield from Pcap_Reader.read_packets(file_path)
+    except FileNotFoundError:
+        print(f"Error: The file '{file_path}' was not found.")  # Handle the case where the file doesn't exist
+    except (IOError, ValueError) as e:
+        print(f"Error reading the capture: {e}")  # Handle IO errors and files that are not captures
 
 # Function to publish network traffic data to the appropriate MQTT topic.
-def publish_network_traffic(client, protocol, message):
-    # Determine the topic to publish the message to, based on the protocol.
-    # Suspicious traffic uses SSH or TELNET protocols, everything else is expected traffic.
-    topic = private_sub_topic2 if protocol in ["SSH", "TELNET"] else private_sub_topic1
+def publish_network_traffic(client, alert, message):
+    # Determine the topic to publish the message to, based on the classifier's alert.
+    # Packets with an alert category (SSH, TELNET, ARP scan, ...) are suspicious, everything else is expected traffic.
+    topic = private_sub_topic2 if alert else private_sub_topic1
+
+    # Binary records go to a separate topic so text subscribers never receive them.
+    if isinstance(message, bytes):
+        topic += Traffic_Codec.binary_topic_suffix
 
     # Publish the message to the selected topic.
+    started = time.perf_counter()
     result, _ = client.publish(topic, message)
+    enqueue_latency.observe(time.perf_counter() - started)
 
-    # If the message was successfully published, notify the user.
+    # If the message was successfully queued, count it and show a sample of the queued messages.
     if result == mqtt.MQTT_ERR_SUCCESS:
-        print(f"Message sent to topic `{topic}`: {message}")
+        packets_published[private_sub_topic2 if alert else private_sub_topic1].inc()
+        if isinstance(message, str):
+            Traffic_Metrics.log.sample("Message queued for topic `%s`: %s", topic, message)
+        else:
+            Traffic_Metrics.log.sample("Message queued for topic `%s`: %d bytes", topic, len(message))
     # If the message couldn't be sent, notify the user of the failure.
     else:
-        print(f"Failed to send message to topic `{topic}`")
+        publish_failures.inc()
+        Traffic_Metrics.log.always("Failed to send message to topic `%s`", topic)
 
 # Function to process each line of network traffic data.
 def process_network_traffic_line(client, line):
-    # Split the line into individual components based on spaces.
-    elements = line.split()
+    # Parse the line into a Packet (number, time, source, destination, protocol, length, info).
+    # Lines that are not packets, such as the Wireshark header row, are skipped.
+    # The columns are kept, so the text message is built from them without formatting the numbers again.
+    started = time.perf_counter()
+    fields = Traffic_Parser.split_packet_line(line)
+    packet = Traffic_Parser.packet_from_fields(fields) if fields is not None else None
+    parsed = time.perf_counter()
+    parse_latency.observe(parsed - started)
 
-    # Ensure that there are at least 7 elements in the line (to avoid index errors).
-    if len(elements) >= 7:
-        no = elements[0]  # First element is the packet number.
-        time = elements[1]  # Second element is the timestamp.
-        source = elements[2]  # Third element is the source address.
-        destination = elements[3]  # Fourth element is the destination address.
-        protocol = elements[4]  # Fifth element is the protocol used.
-        length = elements[5]  # Sixth element is the packet length.
+    if packet is None:
+        packets_skipped.inc()
+    else:
+        process_packet(client, packet, fields)
 
-        # Remaining elements form the "Info" field.
-        info = ' '.join(elements[6:])
+# Function to classify and publish one Packet, whether parsed from a text line (with its columns, 'fields')
+# or decoded from a capture.
+def process_packet(client, packet, fields=None):
+    # Classify the packet: returns an alert category such as "ssh" or "arp_scan", or None if it looks normal.
+    started = time.perf_counter()
+    alert = classifier.classify(packet)
+    classify_latency.observe(time.perf_counter() - started)
 
-        # Format the data into a message string to be published.
-        message = f"No.: {no}, Time: {time}, Source: {source}, Destination: {destination}, Protocol: {protocol}, Length: {length}, Info: {info}"
+    # Encode the packet as a binary record, or format it into a message string, to be published.
+    if wire_format == "binary":
+        message = Traffic_Codec.encode_packet(packet, alert)
+    elif fields is not None:
+        message = Traffic_Parser.format_fields_message(fields, alert)
+    else:
+        message = Traffic_Parser.format_packet_message(packet, alert)
 
-        # Publish the formatted message to the relevant topic.
-        publish_network_traffic(client, protocol, message)
+    # Publish the formatted message to the relevant topic.
+    publish_network_traffic(client, alert, message)
 
 # Function to read, process, and publish the network traffic data.
 def publish(client):
+    # Binary captures are decoded straight into packets, without a text export.
+    if Pcap_Reader.is_capture_path(file_path):
+        for packet in read_packets_from_capture(file_path):
+            process_packet(client, packet)
+        return
+
+    # Large captures can be parsed and classified by several processes instead (client is then the batcher).
+    if parallel_workers:
+        Parallel_Ingest.ingest(file_path, client, (private_sub_topic1, private_sub_topic2), parallel_workers,
+                               parallel_ordered, wire_format, max_batch)
+        return
+
     # Read the network traffic data from the file.
     network_traffic = read_network_traffic_from_file(file_path)
     
@@ -125,25 +211,91 @@ def publish(client):
     for line in network_traffic:
         process_network_traffic_line(client, line)
 
-# Main function to run the MQTT client
-def run():
+# Function to publish only the network traffic appended since the last pass (follow mode).
+# A trailing line without a newline is only published with flush_partial, once the file has stopped changing.
+# 'checkpoint' only moves forward once every line of the pass has been handed to the batcher, so an interrupted
+# pass is read again (rather than skipped) after a restart.
+def publish_new_traffic(batcher, spooled, checkpoint, flush_partial=False):
+    position = dict(checkpoint)
+    network_traffic = Traffic_Tail.read_appended_lines(file_path, position, flush_partial)
+
+    for line in network_traffic:
+        process_network_traffic_line(batcher, line)
+    checkpoint.update(position)
+
+    # Remember how far we got, so a restart resumes from here, but only once the lines are safe: the batches have
+    # been sent and the broker has acknowledged them, or they are in the spool. Otherwise it is saved on a later pass.
+    batcher.flush()
+    if spooled.wait_accepted(drain_timeout):
+        Traffic_Tail.save_checkpoint(checkpoint_file_path, checkpoint)
+
+# Function to follow the capture file, publishing new lines as soon as they are appended.
+def follow(batcher, spooled, checkpoint):
+    watcher = Traffic_Tail.TrafficFileWatcher(file_path)
+    try:
+        while True:
+            # An unterminated last line is only taken as complete once the file has not changed for a long quiet
+            # period (Traffic_Tail.partial_line_quiet_period); until then the checkpoint stays before it.
+            quiet = watcher.unchanged_for() >= Traffic_Tail.partial_line_quiet_period
+            publish_new_traffic(batcher, spooled, checkpoint, flush_partial=quiet)
+            watcher.wait(publish_interval)  # Wake up on new data, or after publish_interval seconds
+    finally:
+        watcher.close()
+
+# Main function to run the MQTT client; with 'once', the capture is published a single time (not in follow mode).
+def run(once=False):
     client = connect_mqtt()  # Establish connection with the MQTT broker
     if client is None:
         print("Failed to establish connection. Exiting...")  # Exit if connection fails
         return
 
-    client.loop_start()  # Start the MQTT network loop
+    # Packets are published through the batcher, which forwards them in batches to the spooled publisher, which
+    # sends them to the client when connected and keeps them in the spool otherwise.
+    # The tracker measures how long the broker takes to acknowledge each batch.
+    tracker = Traffic_Metrics.PublishTracker(client)
+    spool = Publish_Spool.PublishSpool(spool_file_path, spool_max_bytes)
+    suspicious_topics = (private_sub_topic2, private_sub_topic2 + Traffic_Codec.binary_topic_suffix)
+    spooled = Publish_Spool.SpooledPublisher(
+        client, spool, {topic: Publish_Spool.priority_suspicious for topic in suspicious_topics})
+    batcher = Traffic_Batcher.BatchPublisher(spooled, max_batch, linger_ms, {private_sub_topic2: suspicious_linger_ms},
+                                             publish_qos, tracker)
+
+    client.loop_start()  # Start the MQTT network loop, which connects and reconnects to the broker
     subscribe(client)  # Subscribe to the relevant topics
+    # Give the first connection a moment, so packets are not spooled (and rate-limited on replay) needlessly.
+    MQTT_Connection.wait_until_connected(client, connect_timeout)
+    if metrics_port is not None:
+        Traffic_Metrics.start_http_server(metrics_port)  # Serve the metrics locally
 
+    # Binary captures and stdin streams are published once; follow mode only applies to text exports.
+    capture = Pcap_Reader.is_capture_path(file_path)
+    checkpoint = Traffic_Tail.load_checkpoint(checkpoint_file_path) if follow_mode and not capture else None
     try:
-        # Continuously read and publish network traffic data every 10 seconds
-        while True:
-            publish(client)  # Publish the data
-            time.sleep(10)  # Wait 10 seconds between each publish cycle
+        if checkpoint is not None:
+            # Publish new network traffic as it is appended to the file
+            follow(batcher, spooled, checkpoint)
+        elif once or capture:
+            publish(batcher)  # Publish the data a single time
+        else:
+            # Continuously read and publish network traffic data every 10 seconds
+            while True:
+                publish(batcher)  # Publish the data
+                time.sleep(publish_interval)  # Wait between each publish cycle
     except KeyboardInterrupt:
         print("Program interrupted by user. Disconnecting...")  # Handle user interruption
     finally:
         print("Stopping MQTT loop and exiting...")  # Cleanup before exiting
+        batcher.close()  # Send any packets still waiting in a batch
+        left = spooled.drain(drain_timeout)  # Let the broker acknowledge what was sent and the spool be replayed
+        if left:
+            Traffic_Metrics.log.always("%d messages not delivered within %d s; spooled ones are sent on the next run",
+                                       left, drain_timeout)
+        if checkpoint is not None and spooled.wait_accepted(0):
+            Traffic_Tail.save_checkpoint(checkpoint_file_path, checkpoint)  # The last pass is safe now too
+        spooled.close()  # Stop replaying; anything still spooled is sent on the next run
+        spool.close()
+        Traffic_Metrics.log.flush()  # Print the last sampled messages
+        print(f"Metrics: {Traffic_Metrics.snapshot()}")  # Final counters and latencies
         client.loop_stop()  # Stop the MQTT network loop
         client.disconnect()  # Disconnect from the MQTT broker
 
@@ -6,7 +6,8 @@
 import paho.mqtt.client as mqtt     # MQTT communication library to handle publish-subscribe messaging
 import time                         # Provides time-related functions like sleep (for delays)
 import random                       # Generates random numbers, used here to create unique client IDs
-import socket                       # Handles low-level networking interfaces, used here to manage socket errors
+import MQTT_Connection              # Shared broker settings and connection handling
+import Traffic_Metrics              # Message counters and the sampled log
 
 # Generating a random client ID 
 client_id = f'subscribe-{random.randint(0, 100)}'    # Create a unique client ID for each session, randomizing between 0 and 100
@@ -14,47 +15,23 @@ client_id = f'subscribe-{random.randint(0, 100)}'    # Create a unique client ID
 # Define topic that the client will subscribe to and publish messages to
 public_topic = 'public'         # The topic is set to "public", meaning all clients subscribing to 'public' will receive these messages
 
-# Connect the client to the MQTT broker
-def connect_mqtt():
-    # This function will be called when the client tries to connect to the broker
-    def on_connect(client, userdata, flags, rc):
-        # 'rc' is the result code: if it's 0, the connection was successful; any other code means failure
-        if rc == 0:
-            print("Connected to MQTT Broker!")       # Connection successful message
-        else:
-            print(f"Failed to connect, return code {rc}\n")   # Display error code if connection fails
-
-    # Create a new MQTT client instance using the generated client ID
-    # Version 2 of the Callback API is used here for compatibility
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
-
-    # Authenticate with the broker using your student ID as the username and password
-    client.username_pw_set(username="103818400", password="103818400")
+# Counters for the messages sent and received, instead of relying on a print for every message
+messages_sent = Traffic_Metrics.counter("public_messages_sent_total", "Messages published to the public topic")
+messages_failed = Traffic_Metrics.counter("public_messages_failed_total", "Messages that could not be published")
+messages_received = Traffic_Metrics.counter("public_messages_received_total", "Messages received from public/#")
 
-    # Attempt to connect to the MQTT broker at the specified server and port
-    try:
-        print("Attempting to connect to the MQTT broker...")   # Log the connection attempt
-        client.connect("rule28.i4t.swin.edu.au", 1883, keepalive=60)  # Connect to the broker at port 1883 with a 60-second keepalive
-    except socket.timeout:        # Handle connection timeouts
-        print("Connection attempt timed out. The broker might be unreachable or there might be network issues.")
-        return None
-    except socket.error as e:     # Handle general socket errors
-        print(f"Socket error occurred: {e}")
-        return None
-    except Exception as e:        # Handle any other unexpected exceptions
-        print(f"An unexpected error occurred while connecting: {e}")
-        return None
-
-    return client   # Return the client object if the connection was successful
+# Connect the client to the MQTT broker (the broker address and credentials are shared, see MQTT_Connection.py)
+# All subtopics under the 'public' topic (e.g., 'public/messages', 'public/updates') are subscribed once connected,
+# and again after every reconnection
+def connect_mqtt():
+    return MQTT_Connection.connect_mqtt(client_id, [public_topic + '/#'])
 
-# Subscribe the client to topics and handle incoming messages
+# Handle incoming messages on the subscribed topics
 def subscribe(client: mqtt):
     # This function will be triggered whenever a message is received on a subscribed topic
     def on_message(client, userdata, msg):
-        print(f"Received `{msg.payload.decode()}` from `{msg.topic}` topic")  # Decode and print the received message and the topic
-
-    # Subscribe to all subtopics under the 'public' topic (e.g., 'public/messages', 'public/updates')
-    client.subscribe(public_topic + '/#')
+        messages_received.inc()
+        Traffic_Metrics.log.sample("Received `%s` from `%s` topic", msg.payload.decode(), msg.topic)  # Show a sample of the received messages
 
     # Set the on_message callback to handle incoming messages
     client.on_message = on_message
@@ -72,9 +49,11 @@ def publish(client):
         
         # If the message was successfully sent, log the success; otherwise, report failure
         if status == 0:
-            print(f"Sent `{msg}` to topic `{public_topic}`")   # Log successful message sending
+            messages_sent.inc()
+            Traffic_Metrics.log.sample("Sent `%s` to topic `%s`", msg, public_topic)   # Log successful message sending
         else:
-            print(f"Failed to send message to topic {public_topic}")   # Log failure in sending message
+            messages_failed.inc()
+            Traffic_Metrics.log.always("Failed to send message to topic %s", public_topic)   # Log failure in sending message
         msg_count += 1   # Increment the message count for the next message
 
 # Main function to tie everything together and run the MQTT client
@@ -85,8 +64,8 @@ def run():
         print("Failed to establish connection. Exiting...")
         return
     
+    subscribe(client)      # Handle the messages of the public topic, subscribed once connected
     client.loop_start()    # Start the network loop to handle communication
-    subscribe(client)      # Subscribe to the public topic to receive messages
 
     # Continuously publish messages to the public topic
     try:
@@ -0,0 +1,300 @@
+# Publish_Spool.py
+# Durable on-disk spool for messages that cannot be published while the broker is unreachable.
+# SpooledPublisher sits between the batcher and the paho client and has the same publish(topic, payload, qos) call.
+#   - While the client is connected and nothing is spooled, messages go straight to the client.
+#   - Otherwise they are appended to the spool, an SQLite database in WAL mode, so they survive a restart.
+#   - The spool has a size limit. When it is full, the oldest low-priority (Expected Traffic) messages are evicted
+#     first, and Suspicious Traffic is only evicted once no Expected Traffic is left.
+#   - Once connected, a replay thread sends the spooled messages, Suspicious Traffic first and otherwise oldest first.
+#     At most replay_window replayed messages are unacknowledged at a time, and at most replay_rate are sent per
+#     second, so a large backlog does not overwhelm the broker.
+#   - At most direct_window directly published messages wait for an acknowledgement at a time; beyond that,
+#     publish() waits, so a fast producer (e.g. a backfill) cannot queue an unbounded backlog in paho's memory.
+#   - A spooled message is only deleted when the broker acknowledges it (QoS 1). Delivery is at-least-once, so a
+#     crash during replay can send a message twice.
+
+# Importing necessary libraries for the database, the replay thread and rate limiting.
+import sqlite3                      # Durable storage of the spooled messages
+import threading                    # Replay thread and locking
+import time                         # Rate limiting
+import paho.mqtt.client as mqtt     # Result codes returned by publish
+import Traffic_Metrics              # Spool counters and the sampled log
+
+# Default spool settings.
+spool_max_bytes = 256 * 1024 * 1024 # Largest total payload size kept in the spool
+replay_window = 20                  # Replayed messages allowed to wait for an acknowledgement at once
+direct_window = 1000                # Directly published messages allowed to wait for an acknowledgement at once
+replay_rate = 100                   # Most replayed messages sent per second
+replay_chunk = 100                  # Messages read from the spool at a time while replaying
+early_ack_ttl = 60                  # Seconds an acknowledgement is kept while waiting for register() to claim it
+
+# Message priorities; higher priorities are replayed first and evicted last.
+priority_expected = 0
+priority_suspicious = 1
+
+# Function to check whether paho kept a message passed to client.publish: besides a success, a QoS 1/2 message
+# that could not be sent because the connection is down is queued by paho and sent after reconnecting, so it must
+# not be spooled (or replayed) as well. Only a full queue (MQTT_ERR_QUEUE_SIZE) or a QoS 0 message is dropped.
+def kept_by_client(info, qos):
+    return info.rc == mqtt.MQTT_ERR_SUCCESS or (qos > 0 and info.rc == mqtt.MQTT_ERR_NO_CONN)
+
+
+# Metrics for the spool.
+spooled_messages = Traffic_Metrics.counter("spool_added_total", "Messages written to the spool")
+replayed_messages = Traffic_Metrics.counter("spool_replayed_total", "Spooled messages acknowledged after replay")
+evicted_messages = Traffic_Metrics.counter("spool_evicted_total", "Spooled messages evicted because it was full")
+
+
+# Class storing spooled messages in an SQLite database (WAL mode), bounded to max_bytes of payload.
+class PublishSpool:
+    def __init__(self, file_path, max_bytes=spool_max_bytes):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.database = sqlite3.connect(file_path, check_same_thread=False, isolation_level=None)
+        self.database.execute("PRAGMA journal_mode=WAL")
+        self.database.execute("PRAGMA synchronous=NORMAL")  # Durable across process crashes, fast to append
+        self.database.execute("""CREATE TABLE IF NOT EXISTS spool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            priority INTEGER NOT NULL,
+            topic TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            qos INTEGER NOT NULL)""")
+        self.database.execute("CREATE INDEX IF NOT EXISTS spool_order ON spool (priority DESC, id)")
+        self.count, self.size = self.database.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM spool").fetchone()
+        Traffic_Metrics.gauge("spool_messages", "Messages waiting in the spool").set_function(lambda: self.count)
+        Traffic_Metrics.gauge("spool_bytes", "Payload bytes waiting in the spool").set_function(lambda: self.size)
+
+    # Function to append a message, evicting older ones if the spool is over its size limit.
+    def add(self, topic, payload, qos, priority):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        with self.lock:
+            self.database.execute("INSERT INTO spool (priority, topic, payload, qos) VALUES (?, ?, ?, ?)",
+                                  (priority, topic, payload, qos))
+            self.count += 1
+            self.size += len(payload)
+            if self.size > self.max_bytes:
+                self.evict()
+        spooled_messages.inc()
+
+    # Function to delete the oldest messages of the lowest priority until the spool fits its size limit again
+    # (caller holds the lock).
+    def evict(self):
+        rows = self.database.execute("SELECT id, LENGTH(payload) FROM spool ORDER BY priority, id")
+        evicted, freed = [], 0
+        for row_id, length in rows:
+            if self.size - freed <= self.max_bytes:
+                break
+            evicted.append((row_id,))
+            freed += length
+        self.database.executemany("DELETE FROM spool WHERE id = ?", evicted)
+        self.count -= len(evicted)
+        self.size -= freed
+        evicted_messages.inc(len(evicted))
+        Traffic_Metrics.log.sample("Spool full: evicted %d message(s)", len(evicted))
+
+    # Function to return up to 'limit' spooled messages in replay order, skipping the ids in 'exclude'.
+    # Each message is (id, topic, payload, qos).
+    def next_messages(self, limit, exclude=()):
+        with self.lock:
+            rows = self.database.execute("SELECT id, topic, payload, qos FROM spool ORDER BY priority DESC, id "
+                                         "LIMIT ?", (limit + len(exclude),)).fetchall()
+        return [row for row in rows if row[0] not in exclude][:limit]
+
+    # Function to delete a message once the broker has acknowledged it.
+    def remove(self, row_id):
+        with self.lock:
+            row = self.database.execute("SELECT LENGTH(payload) FROM spool WHERE id = ?", (row_id,)).fetchone()
+            if row is not None:
+                self.database.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+                self.count -= 1
+                self.size -= row[0]
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        with self.lock:
+            self.database.close()
+
+
+# Class publishing through the client when it can, and through the spool when it cannot.
+# It exposes the same publish(topic, payload, qos) call as the paho client, so it can be wrapped by the batcher.
+# 'priorities' maps topics to spool priorities (unlisted topics are priority_expected).
+# Every message for the client must go through this class, since it matches all acknowledgements to messages.
+class SpooledPublisher:
+    def __init__(self, client, spool, priorities=None, window=replay_window, rate=replay_rate,
+                 direct=direct_window):
+        self.client = client
+        self.spool = spool
+        self.priorities = priorities or {}
+        self.window = threading.Semaphore(window)
+        self.direct_window = threading.Semaphore(direct)
+        self.interval = 1 / rate if rate else 0
+        self.pending = {}               # mid -> spool id of a replayed message, or None for a direct one
+        self.replaying_ids = set()      # Spool ids of the replayed messages waiting for an acknowledgement
+        self.acknowledged_early = {}    # mid -> (time, on_publish arguments), for acks that beat register(), oldest first
+        self.lock = threading.Lock()    # Never held while calling the client (paho calls on_publish with its own lock)
+        self.wakeup = threading.Event()
+        self.closed = False
+
+        # Acknowledgements of replayed messages are handled here; those of direct messages are passed on to the
+        # previous on_publish callback (e.g. a Traffic_Metrics.PublishTracker). Connecting wakes up the replay thread.
+        self.next_on_publish = client.on_publish
+        client.on_publish = self.on_publish
+        shared_on_connect = client.on_connect
+
+        def on_connect(client, userdata, flags, reason_code, properties):
+            shared_on_connect(client, userdata, flags, reason_code, properties)
+            if reason_code == 0:
+                self.wakeup.set()
+        client.on_connect = on_connect
+
+        self.replayer = threading.Thread(target=self.replay, name="spool-replay", daemon=True)
+        self.replayer.start()
+
+    # Function to publish a message, or spool it if the client is disconnected or a backlog is still being
+    # replayed (so messages on a topic stay in order). Returns (result code, mid); mid is None when spooled.
+    # Waits while direct_window direct messages are unacknowledged, unless the connection drops meanwhile.
+    def publish(self, topic, payload, qos=1):
+        if self.client.is_connected() and not len(self.spool):
+            while not self.direct_window.acquire(timeout=1):
+                if not self.client.is_connected():
+                    break
+            else:
+                info = self.client.publish(topic, payload, qos)
+                if kept_by_client(info, qos):
+                    self.register(info.mid, None)
+                    return mqtt.MQTT_ERR_SUCCESS, info.mid
+                self.direct_window.release()
+        self.spool.add(topic, payload, qos, self.priorities.get(topic, priority_expected))
+        self.wakeup.set()
+        return mqtt.MQTT_ERR_SUCCESS, None
+
+    # Function to remember which message a mid belongs to, once client.publish has returned it.
+    # The broker may already have acknowledged it, in which case the acknowledgement is handled now.
+    def register(self, mid, row_id):
+        with self.lock:
+            early = self.acknowledged_early.pop(mid, None)
+            if early is not None and time.monotonic() - early[0] > early_ack_ttl:
+                early = None    # Left over from an earlier message with the same (reused) mid
+            if early is None:
+                self.pending[mid] = row_id
+                if row_id is not None:
+                    self.replaying_ids.add(row_id)
+                return
+        self.acknowledge(row_id, *early[1])
+
+    # paho callback (network thread): a message was acknowledged.
+    def on_publish(self, client, userdata, mid, reason_code, properties):
+        with self.lock:
+            if mid not in self.pending:
+                now = time.monotonic()
+                self.acknowledged_early.pop(mid, None)  # Re-insert at the end, keeping the oldest first
+                self.acknowledged_early[mid] = (now, (client, userdata, mid, reason_code, properties))
+                self.expire_early_acknowledgements(now)
+                return
+            row_id = self.pending.pop(mid)
+            self.replaying_ids.discard(row_id)
+        self.acknowledge(row_id, client, userdata, mid, reason_code, properties)
+
+    # Function to forget acknowledgements that no register() call claimed within early_ack_ttl seconds, e.g. of
+    # messages published around this class (caller holds the lock).
+    def expire_early_acknowledgements(self, now):
+        early = self.acknowledged_early
+        while early:
+            mid = next(iter(early))
+            if now - early[mid][0] <= early_ack_ttl:
+                break
+            del early[mid]
+
+    # Function to handle an acknowledgement: a replayed message leaves the spool, a direct one is passed on.
+    def acknowledge(self, row_id, client, userdata, mid, reason_code, properties):
+        if row_id is None:
+            self.direct_window.release()
+            if self.next_on_publish is not None:
+                self.next_on_publish(client, userdata, mid, reason_code, properties)
+            return
+        self.spool.remove(row_id)
+        self.window.release()
+        replayed_messages.inc()
+        if not len(self.spool):
+            Traffic_Metrics.log.always("Spool replayed, publishing directly again")
+
+    # Background loop: while connected, send the spooled messages within the window and rate limit.
+    # Messages that were sent but not acknowledged when the connection drops are kept by paho and resent by it
+    # after reconnecting, so they are not replayed a second time.
+    def replay(self):
+        while not self.closed:
+            self.wakeup.wait(1)
+            self.wakeup.clear()
+            next_send = time.monotonic()
+            while self.replay_ready():
+                with self.lock:
+                    exclude = set(self.replaying_ids)
+                messages = self.spool.next_messages(replay_chunk, exclude)
+                if not messages:
+                    break
+                for row_id, topic, payload, qos in messages:
+                    # Wait for a free slot in the window, then for the rate limit.
+                    while not self.window.acquire(timeout=1):
+                        if not self.replay_ready():
+                            break
+                    else:
+                        delay = next_send - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                        next_send = max(next_send, time.monotonic() - 1) + self.interval
+                        info = self.client.publish(topic, payload, max(qos, 1))  # QoS 1 to know when to delete it
+                        if kept_by_client(info, 1):
+                            # Queued by paho if the connection just dropped: it is resent (and deleted once
+                            # acknowledged) after reconnecting, so it is not replayed again meanwhile.
+                            self.register(info.mid, row_id)
+                            if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                                continue
+                        else:
+                            self.window.release()
+                    break   # Disconnected or closed: the rest waits for the next connection
+
+    # Function to check whether replaying can continue.
+    def replay_ready(self):
+        return not self.closed and self.client.is_connected()
+
+    # Function to wait (up to 'timeout' seconds, while connected) until every message published directly has been
+    # acknowledged. Spooled messages are already on disk, so once this returns True everything published so far
+    # survives a restart (e.g. the caller may save its read position). Returns True if no direct message is left.
+    def wait_accepted(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.unacknowledged_direct() and self.client.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self.unacknowledged_direct()
+
+    # Function to check whether a message published directly (not from the spool) is still unacknowledged.
+    def unacknowledged_direct(self):
+        with self.lock:
+            return any(row_id is None for row_id in self.pending.values())
+
+    # Function to wait (up to 'timeout' seconds, while connected) until every message handed to the client has been
+    # acknowledged, since paho only keeps unacknowledged messages in memory, and the spool has been replayed.
+    # Returns the number of messages left (still spooled or unacknowledged), 0 if everything was delivered.
+    def drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.undelivered() and self.client.is_connected() and time.monotonic() < deadline:
+            self.wakeup.set()   # Replay what is left now rather than at the next periodic wake-up
+            time.sleep(0.05)
+        return self.undelivered()
+
+    # Function to count the messages not yet delivered: the spooled ones (including those being replayed) and the
+    # ones published directly that are still unacknowledged.
+    def undelivered(self):
+        with self.lock:
+            direct = sum(1 for row_id in self.pending.values() if row_id is None)
+        return len(self.spool) + direct
+
+    # Function to stop the replay thread; spooled messages stay on disk for the next run.
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        self.replayer.join()
@@ -0,0 +1,111 @@
+# Recommendation_Store.py
+# In-memory store of the recommendations in Recommendations.txt, indexed by alert category.
+# The file is read once and only re-read when its modification time changes, so responding to an alert does no
+# file I/O. Each alert category (see Traffic_Classifier.py) maps to the recommendations relevant to it, and a
+# time-to-live memo stops the same (source, category) pair from being answered again within a window. A pair is only
+# remembered once its response has been published, so a failed publish does not suppress the next response.
+
+# Importing necessary libraries for file status checks and the expiring memo.
+import os                           # Modification time of the recommendations file
+import threading                    # The store is shared by the response worker threads
+import time                         # Monotonic clock for the memo
+from collections import OrderedDict # Memo entries in expiry order
+
+# Keywords (case-insensitive) selecting the recommendations relevant to each alert category.
+# Matching on the text rather than the number keeps the index correct if the file is reordered.
+category_keywords = {
+    "ssh": ("password", "multi-factor", "access control"),
+    "telnet": ("multi-factor", "software updates", "access control"),
+    "cleartext_credentials": ("password", "multi-factor", "security training"),
+    "arp_scan": ("segmentation", "intrusion detection"),
+    "syn_flood": ("intrusion detection", "segmentation"),
+    "connection_rate": ("intrusion detection", "access control", "security assessments"),
+    "smb": ("software updates", "access control", "data backup"),
+    "rdp": ("multi-factor", "software updates", "access control"),
+    "vnc": ("password", "access control"),
+}
+
+# How long (in seconds) a (source, category) pair is remembered after it has been answered,
+# and the most pairs remembered at once.
+memo_ttl = 300
+max_memo_entries = 10000
+
+
+# Class holding the parsed recommendations, the category index and the response memo.
+class RecommendationStore:
+    def __init__(self, file_path, ttl=memo_ttl):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.mtime = None           # Modification time of the loaded file, None if not loaded
+        self.recommendations = []   # All recommendations, in file order
+        self.index = {}             # category -> recommendations relevant to it
+        self.memo = OrderedDict()   # (source, category) -> time after which it may be answered again
+
+    # Function to (re)load the file if it changed since it was last read. Called with the lock held.
+    def refresh(self):
+        try:
+            mtime = os.stat(self.file_path).st_mtime_ns
+            if mtime == self.mtime:
+                return
+            with open(self.file_path, 'r') as file:
+                recommendations = [line.strip() for line in file if line.strip()]
+        except FileNotFoundError:
+            print(f"Error: The file '{self.file_path}' was not found.")
+            return
+        except IOError as e:
+            print(f"Error reading the file: {e}")
+            return
+
+        self.recommendations = recommendations
+        self.index = {
+            category: [text for text in recommendations if any(keyword in text.lower() for keyword in keywords)]
+            for category, keywords in category_keywords.items()
+        }
+        self.mtime = mtime
+
+    # Function to return every recommendation (e.g. for the startup broadcast).
+    def all(self):
+        with self.lock:
+            self.refresh()
+            return list(self.recommendations)
+
+    # Function to return the recommendations for an alert category; unknown or missing categories get all of them.
+    def for_category(self, category):
+        with self.lock:
+            self.refresh()
+            return list(self.index.get(category) or self.recommendations)
+
+    # Function to check whether a (source, category) pair should be answered now, i.e. was not answered within the
+    # memo window.
+    def should_respond(self, source, category):
+        now = time.monotonic()
+        with self.lock:
+            # Entries are kept in expiry order, so expired ones are always at the front.
+            while self.memo and next(iter(self.memo.values())) <= now:
+                self.memo.popitem(last=False)
+            return (source, category) not in self.memo
+
+    # Function to remember that the alert categories of a source were answered. Call it only once the response has
+    # been published. Pairs already remembered keep their expiry time.
+    def remember(self, source, categories):
+        expires = time.monotonic() + self.ttl   # Later than every entry, so the memo stays in expiry order
+        with self.lock:
+            for category in categories or [None]:
+                key = (source, category)
+                if key in self.memo:
+                    continue
+                if len(self.memo) >= max_memo_entries:
+                    self.memo.popitem(last=False)
+                self.memo[key] = expires
+
+    # Function to return the recommendations to send in response to alerts from a source: the union of those for
+    # each category not answered within the memo window, in file order. Empty if everything was answered recently.
+    # Nothing is remembered here; see remember().
+    def for_alerts(self, source, categories):
+        categories = categories or [None]
+        selected = set()
+        for category in categories:
+            if self.should_respond(source, category):
+                selected.update(self.for_category(category))
+        return [text for text in self.all() if text in selected]
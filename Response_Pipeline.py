@@ -0,0 +1,165 @@
+# Response_Pipeline.py
+# Moves the responses to suspicious traffic off the MQTT network thread.
+# The on_message callback only calls submit(), which queues a job and returns immediately; a small pool of worker
+# threads takes jobs off the queue and runs the (slow) response handler.
+#   - The queue is bounded. When it is full, the backpressure policy decides what happens to an alert from a host
+#     with no waiting job:
+#       "drop-oldest": the oldest waiting job is discarded to make room;
+#       "drop-newest": the new alert is discarded, so the jobs already waiting are kept.
+#     Either way the alert of one host is never merged into another host's job, and the drops are counted.
+#   - Jobs are deduplicated per source: while a response for a host is waiting, further alerts from that host are
+#     merged into it, so a burst of alerts from one host triggers one response. Once a worker has taken the job, its
+#     alert categories are fixed: a new alert from that host queues a new job, which is not started before the
+#     running one has finished.
+#   - The handler returns True when it published a response, False when publishing failed, and None when it had
+#     nothing to send (for example the host was answered recently). Only published responses count as processed and
+#     have their latency from message receipt to response publish recorded; the others are counted as suppressed or
+#     failed (a handler that raises also counts as failed).
+
+# Importing necessary libraries for the worker threads and latency measurement.
+import threading                    # Worker threads and the lock protecting the queue
+import time                         # Monotonic clock for latency measurement
+from collections import OrderedDict, deque  # Waiting jobs in arrival order, and recent latency samples
+
+# Backpressure policies.
+drop_oldest = "drop-oldest"
+drop_newest = "drop-newest"
+
+# Number of recent latency samples kept for the percentiles.
+latency_samples = 1000
+
+
+# A queued response: the host it is about, the alert categories seen, how many alerts it covers,
+# and when the first of them was received.
+class ResponseJob:
+    __slots__ = ("source", "alerts", "count", "received_at")
+
+    def __init__(self, source, alert, received_at):
+        self.source = source
+        self.alerts = {alert} if alert else set()
+        self.count = 1
+        self.received_at = received_at
+
+    # Function to merge another alert into this job.
+    def merge(self, alert):
+        if alert:
+            self.alerts.add(alert)
+        self.count += 1
+
+
+# Class running the response handler on worker threads, fed through a bounded, deduplicating queue.
+class ResponsePipeline:
+    def __init__(self, handler, workers=2, max_queue=100, policy=drop_oldest):
+        if policy not in (drop_oldest, drop_newest):
+            raise ValueError(f"Unknown backpressure policy '{policy}'")
+        self.handler = handler                  # Called as handler(job) on a worker thread
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.waiting = OrderedDict()            # source -> ResponseJob, oldest first
+        self.running = {}                       # source -> ResponseJob currently being handled
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # Counters and recent latencies, reported by stats().
+        self.received = self.processed = self.deduplicated = self.dropped = self.suppressed = self.failed = 0
+        self.latencies = deque(maxlen=latency_samples)
+
+        self.workers = [threading.Thread(target=self.work, name=f"response-worker-{index}", daemon=True)
+                        for index in range(max(1, workers))]
+        for worker in self.workers:
+            worker.start()
+
+    # Function called from the MQTT callback: queue a response for the source and return immediately.
+    def submit(self, source, alert=None):
+        received_at = time.monotonic()
+        with self.condition:
+            if self.closed:
+                return
+            self.received += 1
+
+            # Deduplicate: merge into a response for the same host that is still waiting. A running job has already
+            # been handed to the handler, so anything merged into it would never be acted on.
+            job = self.waiting.get(source)
+            if job is not None:
+                job.merge(alert)
+                self.deduplicated += 1
+                return
+
+            # Backpressure: the queue is full.
+            if len(self.waiting) >= self.max_queue:
+                self.dropped += 1
+                if self.policy == drop_newest:
+                    return
+                self.waiting.popitem(last=False)
+
+            self.waiting[source] = ResponseJob(source, alert, received_at)
+            self.condition.notify()
+
+    # Function to return the oldest waiting job whose host has no job running, or None (caller holds the lock).
+    def next_job(self):
+        for source, job in self.waiting.items():
+            if source not in self.running:
+                return job
+        return None
+
+    # Worker loop: take the oldest waiting job, run the handler and record the outcome and latency.
+    # Jobs of one host run one after the other, in the order they were queued.
+    def work(self):
+        while True:
+            with self.condition:
+                job = self.next_job()
+                while job is None and not (self.closed and not self.waiting):
+                    self.condition.wait()
+                    job = self.next_job()
+                if job is None:
+                    return
+                source = job.source
+                del self.waiting[source]
+                self.running[source] = job
+
+            try:
+                published = self.handler(job)
+            except Exception as e:
+                print(f"Response to `{source}` failed: {e}")
+                published = False
+
+            with self.condition:
+                del self.running[source]
+                if published:
+                    self.processed += 1
+                    self.latencies.append(time.monotonic() - job.received_at)
+                elif published is None:
+                    self.suppressed += 1
+                else:
+                    self.failed += 1
+                self.condition.notify_all()  # Wakes close() waiting for the queue to drain
+
+    # Function to return the pipeline counters and the receipt-to-publish latency percentiles (in milliseconds).
+    def stats(self):
+        with self.condition:
+            latencies = sorted(self.latencies)
+            stats = {
+                "received": self.received,
+                "processed": self.processed,
+                "deduplicated": self.deduplicated,
+                "dropped": self.dropped,
+                "suppressed": self.suppressed,
+                "failed": self.failed,
+                "waiting": len(self.waiting),
+            }
+        for name, fraction in (("p50_ms", 0.5), ("p99_ms", 0.99), ("max_ms", 1.0)):
+            index = min(len(latencies) - 1, int(fraction * len(latencies)))
+            stats[name] = round(latencies[index] * 1000, 2) if latencies else None
+        return stats
+
+    # Function to stop accepting jobs, let the workers finish what is queued (up to timeout seconds) and stop them.
+    def close(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while (self.waiting or self.running) and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+            self.closed = True
+            self.waiting.clear()
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,94 @@
+# Simulate_Devices.py
+# Simulates many IoT devices publishing network traffic from a single process.
+# Every simulated device is a coroutine on one asyncio event loop; the devices share a small pool of MQTT
+# connections (Async_MQTT.py) instead of each needing its own process and connection.
+# Each device replays the packets of Local_Sample.txt, classified and formatted exactly as Publish_Private.py does,
+# to the Expected Traffic / Suspicious Traffic topics. Every device has its own classifier, so the sliding-window
+# detectors (ARP scans, SYN floods, connection rates) only see that device's traffic.
+# This is a simulation and load-testing harness: Publish_Private.py and Publish_Public.py use the threaded client.
+#
+# Usage: python Simulate_Devices.py [--devices 500] [--connections 4] [--interval 1] [--duration 0]
+#                                   [--host HOST] [--port PORT]
+
+# Importing necessary libraries for the event loop, argument parsing and pacing.
+import argparse                     # Command line options
+import asyncio                      # Event loop driving every simulated device
+import random                       # Spreads the devices' start times and client IDs
+import time                         # Measures the run time
+import Async_MQTT                   # asyncio MQTT client layer and connection pool
+import Publish_Private              # Topics and message format used by the real publisher
+import Traffic_Classifier           # Per-device rule table and sliding-window detectors
+import Traffic_Parser               # Parses and formats packets
+import Traffic_Reader               # Reads the sample capture
+
+# Default simulation settings.
+device_count = 500                  # Number of simulated devices
+connection_count = 4                # MQTT connections shared by all devices
+device_interval = 1.0               # Seconds between two messages from the same device
+max_inflight = Async_MQTT.default_max_inflight  # Unacknowledged messages allowed per connection
+
+# Client ID prefix for the pooled connections.
+client_id = f'devices-{random.randint(0, 100)}'
+
+
+# Function to load the sample packets every device replays.
+def load_packets(file_path=Publish_Private.file_path):
+    packets = (Traffic_Parser.parse_packet_line(line) for line, _ in Traffic_Reader.iter_lines(file_path))
+    return [packet for packet in packets if packet is not None]
+
+
+# Coroutine for one simulated device: publish the next sample packet every 'interval' seconds until stop_at.
+async def simulate_device(index, client, packets, interval, stop_at, counters):
+    classifier = Traffic_Classifier.TrafficClassifier()  # Detector state of this device only
+    position = index % len(packets)             # Devices start at different points of the capture
+    await asyncio.sleep(random.uniform(0, interval))  # Spread the devices out instead of publishing in lock step
+    while stop_at is None or time.monotonic() < stop_at:
+        packet = packets[position]
+        position = (position + 1) % len(packets)
+
+        alert = classifier.classify(packet)
+        topic = Publish_Private.private_sub_topic2 if alert else Publish_Private.private_sub_topic1
+        try:
+            await client.publish(topic, Traffic_Parser.format_packet_message(packet, alert))
+            counters["sent"] += 1
+        except ConnectionError as e:
+            counters["failed"] += 1
+            print(f"Device {index}: {e}")
+        await asyncio.sleep(interval)
+
+
+# Main coroutine: connect the pool, start every device and wait until the duration has passed (0 = forever).
+async def run(devices, connections, interval, duration, host=None, port=None):
+    packets = load_packets()
+    pool = Async_MQTT.AsyncMQTTPool(client_id, connections, max_inflight)
+    await pool.connect(host, port)
+    print(f"Simulating {devices} devices over {connections} connection(s) in one process...")
+
+    counters = {"sent": 0, "failed": 0}
+    started = time.monotonic()
+    stop_at = started + duration if duration else None
+    try:
+        await asyncio.gather(*(simulate_device(index, pool.acquire(), packets, interval, stop_at, counters)
+                               for index in range(devices)))
+    finally:
+        elapsed = time.monotonic() - started
+        print(f"Sent {counters['sent']} messages ({counters['failed']} failed) in {elapsed:.1f} s "
+              f"({counters['sent'] / elapsed:.0f} messages/s)")
+        await pool.disconnect()
+    return counters
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate many IoT devices publishing from one process.")
+    parser.add_argument("--devices", type=int, default=device_count)
+    parser.add_argument("--connections", type=int, default=connection_count)
+    parser.add_argument("--interval", type=float, default=device_interval)
+    parser.add_argument("--duration", type=float, default=0, help="seconds to run, 0 runs until interrupted")
+    parser.add_argument("--host", default=None, help="broker address (default from MQTT_Connection.py)")
+    parser.add_argument("--port", type=int, default=None)
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(run(arguments.devices, arguments.connections, arguments.interval, arguments.duration,
+                        arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        print("Program interrupted by user. Disconnecting...")
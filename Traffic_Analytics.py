@@ -0,0 +1,155 @@
+# Traffic_Analytics.py
+# Streaming analytics over the packets received by the monitor, in fixed memory.
+#   - Per-protocol packet counts and byte totals (from the Length field) over a tumbling window (the current
+#     summary interval) and a sliding window (the last 'sliding_windows' tumbling windows).
+#   - Top talkers (by source address) and top conversations (address pairs, both directions together) by bytes,
+#     tracked with the space-saving heavy-hitter algorithm: a fixed number of counters, so memory does not grow with
+#     the number of distinct MAC/IPv4/IPv6 addresses seen.
+#   - SummaryPublisher closes the tumbling window every interval and publishes a compact JSON summary, so dashboards
+#     can subscribe to it instead of the raw traffic topics.
+
+# Importing necessary libraries for the heavy-hitter heap, the summary thread and JSON output.
+import heapq                        # Finds the smallest counter to replace in the space-saving summary
+import json                         # Compact summary messages
+import threading                    # Summary thread and the lock shared with the MQTT callback
+import time                         # Window timestamps
+from collections import deque       # Recent tumbling windows making up the sliding window
+
+# Default analytics settings.
+summary_interval = 10               # Seconds per tumbling window (and between two summaries)
+sliding_windows = 6                 # Tumbling windows in the sliding window (6 x 10 s = the last minute)
+max_protocols = 64                  # Distinct protocols counted separately; any others are counted as "other"
+heavy_hitter_capacity = 100         # Counters per space-saving summary
+top_n = 10                          # Entries listed in each top-N of the summary
+
+# Protocol name used once max_protocols distinct protocols are being counted.
+other_protocol = "other"
+
+
+# Class finding the heaviest keys of a stream with the space-saving algorithm (Metwally et al.).
+# It keeps 'capacity' counters. A new key takes over the smallest counter, inheriting its count as the error bound,
+# so every key whose true weight exceeds total / capacity is guaranteed to be tracked, and reported weights
+# overestimate by at most the recorded error.
+class SpaceSaving:
+    def __init__(self, capacity=heavy_hitter_capacity):
+        self.capacity = capacity
+        self.counters = {}              # key -> [weight, error, packets]
+        self.heap = []                  # (weight, key) entries, possibly stale; the smallest current one is evicted
+        self.total = 0
+
+    # Function to add 'weight' (e.g. bytes) for a key.
+    def add(self, key, weight):
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[key] = [0, 0, 0]
+            else:
+                # Replace the key with the smallest weight; heap entries that no longer match are stale.
+                while True:
+                    smallest, smallest_key = heapq.heappop(self.heap)
+                    current = self.counters.get(smallest_key)
+                    if current is not None and current[0] == smallest:
+                        break
+                del self.counters[smallest_key]
+                counter = self.counters[key] = [smallest, smallest, 0]
+        counter[0] += weight
+        counter[2] += 1
+        heapq.heappush(self.heap, (counter[0], key))
+        # Drop the stale entries once they outnumber the live ones, keeping the heap's size bounded.
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(counter[0], key) for key, counter in self.counters.items()]
+            heapq.heapify(self.heap)
+
+    # Function to return the n heaviest keys as [key, weight, packets, error] lists, heaviest first.
+    def top(self, n=top_n):
+        heaviest = heapq.nlargest(n, self.counters.items(), key=lambda item: item[1][0])
+        return [[key, weight, packets, error] for key, (weight, error, packets) in heaviest]
+
+
+# Class keeping the per-protocol counts and heavy hitters of the packets received, window by window.
+# observe() is called from the MQTT callback and rotate() from the summary thread, so they share a lock.
+class TrafficAnalytics:
+    def __init__(self, windows=sliding_windows, capacity=heavy_hitter_capacity):
+        self.lock = threading.Lock()
+        self.capacity = capacity
+        self.recent = deque(maxlen=windows)  # Closed tumbling windows: (start time, protocol -> [packets, bytes])
+        self.start_window()
+
+    # Function to start a new, empty tumbling window (caller holds the lock or is the constructor).
+    def start_window(self):
+        self.protocols = {}             # protocol -> [packets, bytes]
+        self.talkers = SpaceSaving(self.capacity)
+        self.conversations = SpaceSaving(self.capacity)
+        self.window_started = time.time()
+
+    # Function to account for one received Packet.
+    def observe(self, packet):
+        length = packet.length
+        source, destination = packet.source, packet.destination
+        conversation = f"{source} <-> {destination}" if source <= destination else f"{destination} <-> {source}"
+        with self.lock:
+            counts = self.protocols.get(packet.protocol)
+            if counts is None:
+                protocol = packet.protocol if len(self.protocols) < max_protocols else other_protocol
+                counts = self.protocols.setdefault(protocol, [0, 0])
+            counts[0] += 1
+            counts[1] += length
+            self.talkers.add(source, length)
+            self.conversations.add(conversation, length)
+
+    # Function to close the current tumbling window and return the summary of it, with the sliding window totals.
+    def rotate(self):
+        with self.lock:
+            protocols, talkers, conversations = self.protocols, self.talkers, self.conversations
+            started = self.window_started
+            self.recent.append((started, protocols))
+            self.start_window()
+            ended = self.window_started
+            recent = list(self.recent)
+
+        sliding = {}
+        for _, window in recent:
+            for protocol, (packets, length) in window.items():
+                totals = sliding.setdefault(protocol, [0, 0])
+                totals[0] += packets
+                totals[1] += length
+
+        return {
+            "start": round(started, 3),
+            "end": round(ended, 3),
+            "packets": sum(packets for packets, _ in protocols.values()),
+            "bytes": sum(length for _, length in protocols.values()),
+            "protocols": protocols,                         # Tumbling window: protocol -> [packets, bytes]
+            "sliding_seconds": round(ended - recent[0][0], 3),
+            "sliding": sliding,                             # Sliding window: protocol -> [packets, bytes]
+            "top_talkers": talkers.top(),                   # [address, bytes, packets, error]
+            "top_conversations": conversations.top(),       # ["a <-> b", bytes, packets, error]
+        }
+
+
+# Function to encode a summary as compact JSON.
+def encode_summary(summary):
+    return json.dumps(summary, separators=(",", ":"))
+
+
+# Class publishing a summary of the analytics every 'interval' seconds from a background thread.
+# 'publish' is called with the JSON summary, e.g. lambda payload: client.publish(summary_topic, payload).
+class SummaryPublisher:
+    def __init__(self, analytics, publish, interval=summary_interval):
+        self.analytics = analytics
+        self.publish = publish
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="summary-publisher", daemon=True)
+        self.thread.start()
+
+    # Background loop: close a window and publish its summary every interval, until closed.
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.publish(encode_summary(self.analytics.rotate()))
+
+    # Function to stop the background thread.
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
@@ -0,0 +1,174 @@
+# Traffic_Batcher.py
+# Coalesces many small MQTT messages into one framed payload per topic.
+# Messages are collected per topic until either max_batch messages are waiting or the topic's linger time has
+# passed since the first one arrived, and are then sent with a single client.publish call.
+#
+# Batch frame layout (all integers big-endian):
+#   magic  "TBAT"  4 bytes
+#   version        1 byte  (currently 1)
+#   count          2 bytes (number of messages in the batch)
+#   count x [ length 4 bytes, message bytes ]
+
+# Importing necessary libraries for framing, timing and the background flush thread.
+import struct                       # Packs the batch header and message lengths
+import threading                    # Background thread that flushes batches when their linger time expires
+import time                         # Monotonic clock for linger deadlines
+import paho.mqtt.client as mqtt     # Result codes returned by publish
+import Traffic_Metrics              # Counters, send latency and the sampled log
+
+# Batch frame constants.
+batch_magic = b"TBAT"
+batch_version = 1
+batch_header = struct.Struct(">4sBH")   # magic, version, count
+message_length = struct.Struct(">I")    # length prefix of each message
+max_batch_limit = 0xFFFF                # Largest count the header can hold
+
+# Metrics for the batches handed to the MQTT client.
+batches_sent = Traffic_Metrics.counter("batches_sent_total", "Batches handed to the MQTT client")
+batched_messages = Traffic_Metrics.counter("batched_messages_total", "Messages sent inside batches")
+batch_failures = Traffic_Metrics.counter("batch_failures_total", "Batches the MQTT client refused")
+batch_send_latency = Traffic_Metrics.histogram("batch_send_seconds", "Time spent in client.publish for one batch")
+
+
+# Function to pack a list of messages (str or bytes) into one batch frame.
+def encode_batch(messages):
+    parts = [batch_header.pack(batch_magic, batch_version, len(messages))]
+    for message in messages:
+        data = message.encode('utf-8') if isinstance(message, str) else message
+        parts.append(message_length.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+# Function to check whether a payload is a batch frame.
+def is_batch(payload):
+    return payload[:4] == batch_magic
+
+
+# Function to unpack a payload into its messages (as bytes).
+# Payloads that are not batch frames are returned unchanged as a single message, so unbatched publishers keep working.
+# Raises ValueError if a batch frame is truncated or its lengths do not match its contents.
+def decode_batch(payload):
+    if not is_batch(payload):
+        return [payload]
+    size = len(payload)
+    if size < batch_header.size:
+        raise ValueError("Malformed batch: truncated header")
+    magic, version, count = batch_header.unpack_from(payload, 0)
+    if version != batch_version:
+        raise ValueError(f"Unsupported batch version {version}")
+
+    view = memoryview(payload)
+    messages = []
+    position = batch_header.size
+    for _ in range(count):
+        if position + message_length.size > size:
+            raise ValueError("Malformed batch: truncated length prefix")
+        (length,) = message_length.unpack_from(payload, position)
+        position += message_length.size
+        if position + length > size:
+            raise ValueError("Malformed batch: message runs past the end of the frame")
+        messages.append(bytes(view[position:position + length]))
+        position += length
+    if position != len(payload):
+        raise ValueError("Malformed batch: length does not match its contents")
+    return messages
+
+
+# Class that sits in front of an MQTT client and batches the messages published through it.
+# It exposes the same publish(topic, payload) call as the paho client, so it can be passed wherever a client is used.
+# Batches are sent with the given QoS; with a Traffic_Metrics.PublishTracker, the time each batch waits for the
+# broker's acknowledgement is measured too.
+class BatchPublisher:
+    def __init__(self, client, max_batch=50, linger_ms=1000, topic_linger_ms=None, qos=0, tracker=None):
+        self.client = client
+        self.qos = qos
+        self.tracker = tracker
+        self.max_batch = max(1, min(max_batch, max_batch_limit))
+        self.linger = linger_ms / 1000
+        # Per-topic linger overrides, e.g. a much shorter linger for suspicious traffic so alerts are not delayed.
+        self.topic_linger = {topic: ms / 1000 for topic, ms in (topic_linger_ms or {}).items()}
+        self.pending = {}               # topic -> list of messages waiting to be sent
+        self.deadlines = {}             # topic -> monotonic time at which the batch must be sent
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # Background thread that sends batches whose linger time has expired.
+        self.flusher = threading.Thread(target=self.flush_expired, name="batch-flusher", daemon=True)
+        self.flusher.start()
+
+    # Function to queue a message for the topic. Returns (result code, None) like client.publish.
+    def publish(self, topic, payload):
+        with self.condition:
+            if self.closed:
+                return mqtt.MQTT_ERR_NO_CONN, None
+            messages = self.pending.get(topic)
+            if messages is None:
+                messages = self.pending[topic] = []
+                self.deadlines[topic] = time.monotonic() + self.topic_linger.get(topic, self.linger)
+                self.condition.notify()  # The flusher may need to wake up earlier for this topic
+            messages.append(payload)
+            if len(messages) < self.max_batch:
+                return mqtt.MQTT_ERR_SUCCESS, None
+            return self.send(topic, self.take(topic)), None
+
+    # Function to remove and return the pending messages for a topic (caller holds the lock).
+    def take(self, topic):
+        self.deadlines.pop(topic, None)
+        return self.pending.pop(topic, [])
+
+    # Function to send one batch. A single message is sent as-is, without a batch frame.
+    # Called with the lock held, so batches for the same topic always leave in order
+    # (client.publish only queues the message, so this does not block for long).
+    def send(self, topic, messages):
+        if not messages:
+            return mqtt.MQTT_ERR_SUCCESS
+        payload = messages[0] if len(messages) == 1 else encode_batch(messages)
+        return self.send_payload(topic, payload, len(messages))
+
+    # Function to send a payload that is already framed and holds 'count' messages (e.g. built by
+    # Parallel_Ingest.py), with the same QoS, acknowledgement tracking and metrics as the batches built here.
+    def send_payload(self, topic, payload, count):
+        started = time.perf_counter()
+        result, mid = self.client.publish(topic, payload, self.qos)
+        batch_send_latency.observe(time.perf_counter() - started)
+        if result == mqtt.MQTT_ERR_SUCCESS:
+            if self.tracker is not None and mid is not None:  # No mid when the client spooled the batch
+                self.tracker.sent(mid)
+            batches_sent.inc()
+            batched_messages.inc(count)
+            Traffic_Metrics.log.sample("Batch of %d message(s) sent to topic `%s`", count, topic)
+        else:
+            batch_failures.inc()
+            Traffic_Metrics.log.always("Failed to send batch of %d message(s) to topic `%s`", count, topic)
+        return result
+
+    # Background loop: sleep until the earliest deadline, then send every batch that is due.
+    def flush_expired(self):
+        while True:
+            with self.condition:
+                while not self.closed:
+                    now = time.monotonic()
+                    due = [topic for topic, deadline in self.deadlines.items() if deadline <= now]
+                    if due:
+                        break
+                    timeout = min(self.deadlines.values(), default=now + 1) - now
+                    self.condition.wait(timeout)
+                if self.closed:
+                    return
+                for topic in due:
+                    self.send(topic, self.take(topic))
+
+    # Function to send everything that is waiting, regardless of linger time.
+    def flush(self):
+        with self.condition:
+            for topic in list(self.pending):
+                self.send(topic, self.take(topic))
+
+    # Function to flush the remaining messages and stop the background thread.
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.flusher.join()
@@ -0,0 +1,165 @@
+# Traffic_Classifier.py
+# Decides whether a packet is suspicious, and why.
+# Two kinds of checks are combined:
+#   - a compiled rule table, looked up by protocol, TCP/UDP port and Info keyword through dicts;
+#   - stateful sliding-window detectors for ARP scans, SYN floods and per-source connection rates.
+# classify() returns an alert category (e.g. "ssh", "arp_scan") for suspicious packets, or None.
+
+# Importing necessary libraries for the sliding windows.
+from collections import OrderedDict, deque  # Bounded per-key state and the ring buffers of recent events
+
+# Alert categories raised by the rule table, keyed by protocol name.
+protocol_rules = {
+    "SSH": "ssh",
+    "SSHv2": "ssh",
+    "TELNET": "telnet",
+}
+
+# Alert categories raised by destination port (for TCP/UDP packets whose Info starts with "src → dst").
+port_rules = {
+    22: "ssh",
+    23: "telnet",
+    2323: "telnet",
+    445: "smb",
+    3389: "rdp",
+    5900: "vnc",
+}
+
+# Alert categories raised by keywords in the Info column, looked up per protocol.
+# Only protocols listed here have their Info tokenised, so the long MDNS/DNS Info fields cost nothing.
+keyword_rules = {
+    "FTP": {"USER": "cleartext_credentials", "PASS": "cleartext_credentials"},
+    "HTTP": {"Authorization:": "cleartext_credentials"},
+    "POP": {"USER": "cleartext_credentials", "PASS": "cleartext_credentials"},
+    "IMAP": {"LOGIN": "cleartext_credentials"},
+}
+
+# Protocols whose Info column starts with "source port → destination port".
+port_protocols = {"TCP", "UDP"}
+port_arrows = {"→", ">"}
+
+# Detector settings: an alert is raised when 'threshold' events are seen within 'window' seconds (capture time).
+arp_scan_window, arp_scan_threshold = 5.0, 10               # Distinct addresses asked for by one host
+syn_flood_window, syn_flood_threshold = 1.0, 100            # Half-open connection attempts to one destination
+connection_rate_window, connection_rate_threshold = 10.0, 50  # Connection attempts made by one source
+
+# Most keys (hosts) each detector keeps state for; the least recently seen key is forgotten beyond this.
+max_tracked_keys = 4096
+
+
+# Function to extract the destination port from the Info column of a TCP/UDP packet, or None.
+def destination_port(info):
+    fields = info.split(None, 3)
+    if len(fields) >= 3 and fields[1] in port_arrows and fields[2].isdigit():
+        return int(fields[2])
+    return None
+
+
+# Function to check whether a TCP packet opens a connection (SYN without ACK).
+def is_syn(info):
+    flags_start = info.find('[')
+    if flags_start < 0:
+        return False
+    flags = info[flags_start + 1:info.find(']', flags_start)]
+    return "SYN" in flags and "ACK" not in flags
+
+
+# Class that counts events per key over a sliding window of capture time, in bounded memory.
+# Each key has a ring buffer of (time, value) events; events older than the window are expired from the front,
+# so each event is added and removed once (O(1) amortised). With distinct=True the window counts distinct values.
+# Capture time is expected to move forward. An event more than a window older than the key's last one (e.g. a
+# rotated or truncated capture starting again from 0) starts the key's window over, since the events it holds belong
+# to another timeline; slight reordering within a window is kept as is.
+class SlidingWindowCounter:
+    def __init__(self, window, threshold, distinct=False, max_keys=max_tracked_keys):
+        self.window = window
+        self.threshold = threshold
+        self.distinct = distinct
+        self.max_keys = max_keys
+        self.max_events = threshold * 4     # Cap per key: enough to stay above the threshold, never unbounded
+        self.keys = OrderedDict()           # key -> (deque of (time, value), dict of value -> count)
+
+    # Function to record an event and return True if the key is now over the threshold.
+    def add(self, key, time, value=None):
+        state = self.keys.get(key)
+        if state is None:
+            if len(self.keys) >= self.max_keys:
+                self.keys.popitem(last=False)   # Forget the least recently seen key
+            state = self.keys[key] = (deque(), {})
+        else:
+            self.keys.move_to_end(key)
+        events, counts = state
+
+        # Time went backwards: forget the key's events rather than keeping them in the window forever.
+        if events and time < events[-1][0] - self.window:
+            events.clear()
+            counts.clear()
+
+        # Expire events that have left the window, and the oldest one if the buffer is full.
+        horizon = time - self.window
+        while events and (events[0][0] < horizon or len(events) >= self.max_events):
+            self.forget(events.popleft()[1], counts)
+
+        events.append((time, value))
+        counts[value] = counts.get(value, 0) + 1
+        return (len(counts) if self.distinct else len(events)) >= self.threshold
+
+    # Function to remove one value from the per-value counts.
+    @staticmethod
+    def forget(value, counts):
+        remaining = counts[value] - 1
+        if remaining:
+            counts[value] = remaining
+        else:
+            del counts[value]
+
+
+# Class holding the rule table and detector state used to classify a stream of packets.
+class TrafficClassifier:
+    def __init__(self):
+        self.arp_scans = SlidingWindowCounter(arp_scan_window, arp_scan_threshold, distinct=True)
+        self.syn_floods = SlidingWindowCounter(syn_flood_window, syn_flood_threshold)
+        self.connection_rates = SlidingWindowCounter(connection_rate_window, connection_rate_threshold)
+
+    # Function to classify one Packet, returning its alert category or None for expected traffic.
+    def classify(self, packet):
+        protocol = packet.protocol
+        info = packet.info
+
+        # Stateful detectors run first, so their windows see every packet even when a rule also matches.
+        alert = None
+        if protocol == "ARP":
+            alert = self.check_arp(packet, info)
+        elif protocol == "TCP" and is_syn(info):
+            alert = self.check_syn(packet)
+
+        # Rule table: protocol, then destination port, then Info keywords.
+        rule = protocol_rules.get(protocol)
+        if rule is None and protocol in port_protocols:
+            rule = port_rules.get(destination_port(info))
+        if rule is None:
+            keywords = keyword_rules.get(protocol)
+            if keywords:
+                rule = next(filter(None, map(keywords.get, info.split())), None)
+        return rule or alert
+
+    # Function to track ARP requests ("Who has X? Tell Y") by the asking host Y and the distinct addresses X.
+    def check_arp(self, packet, info):
+        if not info.startswith("Who has "):
+            return None
+        target, _, sender = info[8:].partition("? Tell ")
+        if not sender:
+            return None
+        if self.arp_scans.add(sender.split()[0], packet.time, target):
+            return "arp_scan"
+        return None
+
+    # Function to track connection attempts per destination (SYN flood) and per source (connection rate).
+    def check_syn(self, packet):
+        flood = self.syn_floods.add(packet.destination, packet.time)
+        rate = self.connection_rates.add(packet.source, packet.time)
+        if flood:
+            return "syn_flood"
+        if rate:
+            return "connection_rate"
+        return None
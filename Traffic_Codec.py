@@ -0,0 +1,188 @@
+# Traffic_Codec.py
+# Compact, versioned binary encoding of packet records, as an alternative to the labelled text message
+# ("No.: ..., Time: ..., Source: ..., ...") built by Traffic_Parser.format_packet_message.
+#
+# Binary records are published on the traffic topics with binary_topic_suffix appended
+# (e.g. "103818400/Expected Traffic/binary"), so subscribers of the text topics never receive them.
+#
+# Record layout, version 2 (all integers big-endian):
+#   magic     1 byte   0xA5
+#   version   1 byte   2
+#   flags     1 byte   bit 0: an alert category follows the protocol; other bits reserved (0)
+#   no        4 bytes  packet number
+#   time      8 bytes  seconds since the start of the capture (float64)
+#   length    4 bytes  frame length
+#   protocol  1 byte   index into protocol_names, or 0xFF followed by a short string
+#   alert     short string, only present when flag bit 0 is set
+#   source, destination: 1 byte address kind, then
+#       kind 4: 4 bytes IPv4 | kind 6: 16 bytes IPv6 | kind 8: 6 bytes MAC | kind 0: short string
+#   info      2 bytes length + UTF-8 text
+# A short string is 1 byte length + UTF-8 text.
+# Version 1 records are the same without the alert field: all their flags are reserved, so they are still decoded
+# (with no alert). Records with a flag bit their version does not define are rejected, not misread.
+
+# Importing necessary libraries for packing records and recognising addresses.
+import struct                       # Fixed-size fields of the record
+import ipaddress                    # Recognises and packs IPv4/IPv6 addresses
+from functools import lru_cache     # Addresses repeat constantly, so their encodings are cached
+from Traffic_Parser import Packet   # Record type returned by the decoder
+
+# Builds a Packet straight from a tuple, skipping the Python-level NamedTuple constructor.
+_new_packet = tuple.__new__
+
+# Topic suffix used for binary records.
+binary_topic_suffix = "/binary"
+
+# Record constants.
+record_magic = 0xA5
+record_version = 2
+record_header = struct.Struct(">BBBIdIB")   # magic, version, flags, no, time, length, protocol
+info_length = struct.Struct(">H")
+unpack_header = record_header.unpack_from
+unpack_info_length = info_length.unpack_from
+max_info_bytes = 0xFFFF
+max_short_string = 0xFF
+
+# Protocol names sent as a single byte. New names may only be appended, never reordered, within a version.
+protocol_names = (
+    "TCP", "UDP", "ARP", "ICMP", "ICMPv6", "DNS", "MDNS", "LLMNR", "NBNS", "SSDP", "DHCP", "DHCPv6", "QUIC",
+    "HTTP", "HTTP/JSON", "TLSv1", "TLSv1.2", "TLSv1.3", "SSH", "SSHv2", "TELNET", "FTP", "SMB", "SMB2", "NTP",
+    "SNMP", "MQTT", "IGMPv2", "IGMPv3", "LLDP", "STP", "CoAP", "IPv4", "IPv6",
+)
+protocol_ids = {name: index for index, name in enumerate(protocol_names)}
+custom_protocol = 0xFF
+
+# Record flags, and the flags each version that can still be decoded defines.
+flag_alert = 0x01
+version_flags = {1: 0, 2: flag_alert}
+
+# Address kinds.
+address_string, address_ipv4, address_ipv6, address_mac = 0, 4, 6, 8
+
+
+# Function to encode a short string (1 byte length + UTF-8), truncated to 255 bytes.
+def encode_short_string(text):
+    data = text.encode('utf-8')[:max_short_string]
+    return bytes((len(data),)) + data
+
+
+# Function to encode an address, packing it as raw bytes when it is an IPv4, IPv6 or MAC address.
+# Addresses are only packed when decoding gives back exactly the same text, so the encoding is lossless.
+@lru_cache(maxsize=4096)
+def encode_address(address):
+    if address.count(':') == 5 and len(address) == 17:
+        try:
+            data = bytes.fromhex(address.replace(':', ''))
+            if len(data) == 6 and data.hex(':') == address:
+                return bytes((address_mac,)) + data
+        except ValueError:
+            pass  # Vendor-resolved names such as "SuperMic_c2:dd:2e" are sent as strings
+    try:
+        ip = ipaddress.ip_address(address)
+        if str(ip) == address:
+            return bytes((address_ipv4 if ip.version == 4 else address_ipv6,)) + ip.packed
+    except ValueError:
+        pass
+    return bytes((address_string,)) + encode_short_string(address)
+
+
+# Size of the raw address that follows each address kind byte (strings carry their own length byte).
+address_sizes = {address_ipv4: 4, address_ipv6: 16, address_mac: 6}
+
+# Cache of encoded address bytes -> text; addresses repeat constantly, so most lookups hit.
+decoded_addresses = {}
+max_cached_addresses = 4096
+
+
+# Function to decode an address starting at position; returns the text and the position after it.
+def decode_address(payload, position):
+    kind = payload[position]
+    if kind == address_string:
+        end = position + 2 + payload[position + 1]
+    else:
+        size = address_sizes.get(kind)
+        if size is None:
+            raise ValueError(f"Unknown address kind {kind}")
+        end = position + 1 + size
+
+    encoded = payload[position:end]
+    address = decoded_addresses.get(encoded)
+    if address is None:
+        address = decode_raw_address(kind, encoded[1:])
+        if len(decoded_addresses) >= max_cached_addresses:
+            decoded_addresses.clear()  # Keep the cache bounded
+        decoded_addresses[encoded] = address
+    return address, end
+
+
+# Function to turn raw address bytes back into text.
+def decode_raw_address(kind, data):
+    if kind == address_ipv4:
+        return str(ipaddress.IPv4Address(data))
+    if kind == address_ipv6:
+        return str(ipaddress.IPv6Address(data))
+    if kind == address_mac:
+        return data.hex(':')
+    return data[1:].decode('utf-8', errors='ignore')  # Skip the length byte of the short string
+
+
+# Function to encode a Packet as a binary record, with its alert category if any.
+def encode_packet(packet, alert=None):
+    protocol_id = protocol_ids.get(packet.protocol, custom_protocol)
+    flags = flag_alert if alert else 0
+    parts = [record_header.pack(record_magic, record_version, flags, packet.no, packet.time, packet.length,
+                                protocol_id)]
+    if protocol_id == custom_protocol:
+        parts.append(encode_short_string(packet.protocol))
+    if alert:
+        parts.append(encode_short_string(alert))
+    parts.append(encode_address(packet.source))
+    parts.append(encode_address(packet.destination))
+    info = packet.info.encode('utf-8')[:max_info_bytes]
+    parts.append(info_length.pack(len(info)))
+    parts.append(info)
+    return b''.join(parts)
+
+
+# Function to check whether a payload is a binary record.
+def is_binary_record(payload):
+    return len(payload) >= record_header.size and payload[0] == record_magic
+
+
+# Function to decode a binary record back into a Packet.
+# Raises ValueError (or struct.error / IndexError for truncated records) if the payload is not a valid record.
+def decode_packet(payload):
+    return decode_record(payload)[0]
+
+
+# Function to decode a binary record into a (Packet, alert category or None) pair.
+def decode_record(payload):
+    payload = bytes(payload)  # Accepts a memoryview too; a bytes object is used as-is
+    magic, version, flags, no, time, length, protocol_id = unpack_header(payload)
+    if magic != record_magic or version not in version_flags:
+        raise ValueError(f"Unsupported record (magic {magic:#x}, version {version})")
+    if flags & ~version_flags[version]:
+        raise ValueError(f"Unsupported flags {flags:#x} in a version {version} record")
+    position = record_header.size
+
+    if protocol_id < len(protocol_names):
+        protocol = protocol_names[protocol_id]
+    elif protocol_id == custom_protocol:
+        size = payload[position]
+        protocol = payload[position + 1:position + 1 + size].decode('utf-8', errors='ignore')
+        position += 1 + size
+    else:
+        raise ValueError(f"Unknown protocol id {protocol_id}")
+
+    alert = None
+    if flags & flag_alert:
+        size = payload[position]
+        alert = payload[position + 1:position + 1 + size].decode('utf-8', errors='ignore')
+        position += 1 + size
+
+    source, position = decode_address(payload, position)
+    destination, position = decode_address(payload, position)
+    (size,) = unpack_info_length(payload, position)
+    position += info_length.size
+    info = payload[position:position + size].decode('utf-8', errors='ignore')
+    return _new_packet(Packet, (no, time, source, destination, protocol, length, info)), alert
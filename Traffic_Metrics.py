@@ -0,0 +1,316 @@
+# Traffic_Metrics.py
+# Low-overhead instrumentation for the publish/receive hot paths, replacing a print() per message.
+#   - Counters, gauges and histograms (fixed log-scale buckets) kept in a process-wide registry.
+#   - PublishTracker measures PUBACK latency per message id through paho's on_publish callback and keeps an
+#     in-flight gauge.
+#   - SampledLog prints at most one message of each kind per second, buffered and written out by a background
+#     thread, so stdout is no longer written synchronously for every message.
+#   - snapshot() / prometheus_text() export everything, and start_http_server() serves them locally on
+#     /metrics (Prometheus text format) and /metrics.json.
+
+# Importing necessary libraries for the metric types, the log buffer and the snapshot endpoint.
+import sys                          # Standard output for the sampled log
+import json                         # JSON snapshot format
+import time                         # Timestamps, latency measurement and log flush interval
+import atexit                       # Flushes the sampled log when the program exits
+import bisect                       # Finds the histogram bucket of a value
+import threading                    # Locks, and the snapshot server thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Local snapshot endpoint
+
+# Histogram bucket upper bounds, in seconds: 1, 2.5 and 5 for every decade from 1 microsecond to 10 seconds.
+latency_buckets = tuple(float(f"{multiplier}e{exponent}") for exponent in range(-6, 2) for multiplier in (1, 2.5, 5))
+
+# Sampled log settings: at most one message of each kind is printed every 'sample_interval' seconds, and the
+# buffered lines are written out every 'flush_interval' seconds.
+sample_interval = 1.0
+flush_interval = 0.5
+
+# Seconds an acknowledgement that arrived before PublishTracker.sent() is kept for it. paho reuses message ids, so
+# an older one would otherwise be matched to a later message with the same id.
+early_ack_ttl = 60
+
+# Metric updates are deliberately not locked, so they cost well under a microsecond and can stay on in production.
+# Each metric on the hot paths is written by one thread; a metric written from several threads at once could in
+# rare cases lose an update, which only makes that count slightly low. Values that must stay exact across threads
+# (such as messages in flight) are computed when they are read instead.
+
+# Registry of every metric, keyed by (name, labels).
+registry = {}
+registry_lock = threading.Lock()
+
+
+# Function to turn keyword labels into a hashable, ordered key.
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+# Function to format labels in the Prometheus text format, e.g. {topic="x"}.
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in pairs) + "}"
+
+
+# A value that only goes up (messages published, failures, ...).
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, labels, help_text):
+        self.name, self.labels, self.help = name, labels, help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+    def prometheus(self):
+        return [f"{self.name}{format_labels(self.labels)} {self.snapshot()}"]
+
+
+# A value that goes up and down (messages in flight, queue length, ...). Either set directly, or computed by a
+# function each time it is read.
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name, labels, help_text):
+        super().__init__(name, labels, help_text)
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        self.function = function
+
+    def snapshot(self):
+        return self.function() if self.function is not None else self.value
+
+
+# A distribution of values (latencies in seconds) over fixed buckets, with count, sum and estimated percentiles.
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, labels, help_text, buckets=latency_buckets):
+        self.name, self.labels, self.help = name, labels, help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot counts values above the largest bucket
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    # Function to estimate a percentile as the upper bound of the bucket it falls in.
+    def percentile(self, counts, fraction):
+        target = fraction * sum(counts)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return None
+
+    def snapshot(self):
+        counts, total = list(self.counts), self.total
+        count = sum(counts)
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.percentile(counts, 0.5),
+            "p99": self.percentile(counts, 0.99),
+            "p999": self.percentile(counts, 0.999),
+        }
+
+    def prometheus(self):
+        counts, total = list(self.counts), self.total
+        count = sum(counts)
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labels)} {total}")
+        lines.append(f"{self.name}_count{format_labels(self.labels)} {count}")
+        return lines
+
+
+# Function to get (or create) a metric of the given type from the registry.
+def get_metric(metric_type, name, help_text, labels):
+    key = (name, label_key(labels))
+    metric = registry.get(key)
+    if metric is None:
+        with registry_lock:
+            metric = registry.get(key)
+            if metric is None:
+                metric = registry[key] = metric_type(name, key[1], help_text)
+    return metric
+
+
+def counter(name, help_text="", **labels):
+    return get_metric(Counter, name, help_text, labels)
+
+
+def gauge(name, help_text="", **labels):
+    return get_metric(Gauge, name, help_text, labels)
+
+
+def histogram(name, help_text="", **labels):
+    return get_metric(Histogram, name, help_text, labels)
+
+
+# Function to return every metric as a JSON-friendly dict.
+def snapshot():
+    result = {}
+    for (name, labels), metric in list(registry.items()):
+        key = name + format_labels(labels)
+        result[key] = metric.snapshot()
+    return result
+
+
+# Function to return every metric in the Prometheus text exposition format.
+def prometheus_text():
+    lines, described = [], set()
+    for (name, _), metric in sorted(registry.items(), key=lambda item: item[0]):
+        if name not in described:
+            described.add(name)
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+        lines.extend(metric.prometheus())
+    return "\n".join(lines) + "\n"
+
+
+# Class measuring how long the broker takes to acknowledge each published message (PUBACK for QoS 1),
+# by message id, through the client's on_publish callback. The in-flight gauge is the number of messages sent and
+# not yet acknowledged. sent() and on_publish run on different threads, so they share a lock (taken once per
+# message, not per packet). Acknowledgements that beat sent() are kept for early_ack_ttl seconds only.
+class PublishTracker:
+    def __init__(self, client, name="publish"):
+        self.started = {}                       # mid -> perf_counter() when the message was handed to paho
+        self.acknowledged_early = {}            # mid -> monotonic time of an ack that beat sent(), oldest first
+        self.lock = threading.Lock()
+        self.latency = histogram(f"{name}_puback_seconds", "Time from publish to broker acknowledgement")
+        self.acknowledged = counter(f"{name}_acknowledged_total", "Messages acknowledged by the broker")
+        gauge(f"{name}_in_flight", "Messages published but not yet acknowledged").set_function(
+            lambda: len(self.started))
+        client.on_publish = self.on_publish
+
+    # Function to record that the message with this id was handed to paho.
+    def sent(self, mid):
+        now = time.perf_counter()
+        with self.lock:
+            early = self.acknowledged_early.pop(mid, None)
+            if early is not None and time.monotonic() - early <= early_ack_ttl:
+                self.acknowledged.inc()
+            else:
+                self.started[mid] = now     # No ack yet, or only a stale one left over from a reused mid
+
+    # paho callback (network thread): the broker acknowledged the message.
+    def on_publish(self, client, userdata, mid, reason_code, properties):
+        now = time.perf_counter()
+        with self.lock:
+            started = self.started.pop(mid, None)
+            if started is None:
+                received = time.monotonic()
+                self.acknowledged_early.pop(mid, None)  # Re-insert at the end, keeping the oldest first
+                self.acknowledged_early[mid] = received
+                self.expire_early_acknowledgements(received)
+                return
+            self.acknowledged.inc()
+        self.latency.observe(now - started)
+
+    # Function to forget early acknowledgements older than early_ack_ttl, e.g. of messages published without
+    # calling sent() (caller holds the lock).
+    def expire_early_acknowledgements(self, now):
+        early = self.acknowledged_early
+        while early:
+            mid = next(iter(early))
+            if now - early[mid] <= early_ack_ttl:
+                break
+            del early[mid]
+
+
+# Class printing only a sample of repetitive messages, through a buffer written out in the background.
+# Each kind of message (identified by its format string) is printed at most once per sample_interval seconds,
+# so a slow stream is shown in full and a fast one is reduced to a line per second with a count of what was skipped.
+# Messages are only formatted when they are printed, so skipped ones cost almost nothing.
+class SampledLog:
+    def __init__(self, interval=None):
+        self.interval = sample_interval if interval is None else interval
+        self.last_printed = {}          # format string -> [monotonic time last printed, messages skipped since]
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.flusher = None
+
+    # Function to log a message unless one of the same kind was printed less than 'interval' seconds ago.
+    def sample(self, message_format, *arguments):
+        now = time.monotonic()
+        state = self.last_printed.get(message_format)
+        if state is not None and now - state[0] < self.interval:
+            state[1] += 1
+            return
+        skipped = state[1] if state is not None else 0
+        self.last_printed[message_format] = [now, 0]
+        line = message_format % arguments
+        self.write(f"{line} ({skipped} similar message(s) not shown)" if skipped else line)
+
+    # Function to always log a message (errors and other rare events), still through the buffer.
+    def always(self, message_format, *arguments):
+        self.write(message_format % arguments)
+
+    def write(self, line):
+        with self.lock:
+            self.buffer.append(line)
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self.flush_periodically, name="log-flusher", daemon=True)
+                self.flusher.start()
+
+    # Background loop writing out the buffer every flush_interval seconds.
+    def flush_periodically(self):
+        while True:
+            time.sleep(flush_interval)
+            self.flush()
+
+    # Function to write out everything still buffered, in a single write.
+    def flush(self):
+        with self.lock:
+            lines, self.buffer = self.buffer, []
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+
+# The shared sampled log used by the scripts; flushed when the program exits.
+log = SampledLog()
+atexit.register(log.flush)
+
+
+# Request handler for the snapshot endpoint.
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *arguments):
+        pass  # Keep request logging out of the program output
+
+
+# Function to serve /metrics and /metrics.json on localhost in a background thread. Returns the server.
+def start_http_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics available on http://{host}:{server.server_address[1]}/metrics")
+    return server
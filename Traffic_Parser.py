@@ -0,0 +1,176 @@
+# Traffic_Parser.py
+# Parser for lines of a Wireshark text export (Local_Sample.txt) into structured packet records.
+# A line looks like:
+#   No.  Time      Source        Destination   Protocol Length Info
+#   166  0.864600  SuperMic_c2:dd:2e  IntelCor_e6:4d:0d  ARP  56  Who has 172.20.5.196? Tell 172.20.0.1
+
+# Importing necessary libraries for the record type and the columnar batch format.
+from array import array             # Compact typed columns for batch parsing
+from typing import NamedTuple       # Lightweight immutable record type (no per-instance __dict__)
+
+# NumPy is optional: it is only needed to convert batches into NumPy arrays for analytics.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# A single packet from the capture, with typed numeric fields.
+class Packet(NamedTuple):
+    no: int             # Packet number
+    time: float         # Seconds since the start of the capture
+    source: str         # Source address (IPv4, IPv6, MAC or vendor-resolved name)
+    destination: str    # Destination address
+    protocol: str       # Highest protocol Wireshark decoded (ARP, TCP, MDNS, ...)
+    length: int         # Frame length in bytes
+    info: str           # Free-text Info column
+
+
+# A batch of packets stored column by column: numeric columns are typed arrays, text columns are lists.
+class PacketColumns(NamedTuple):
+    no: array
+    time: array
+    source: list
+    destination: list
+    protocol: list
+    length: array
+    info: list
+
+
+# Builds a Packet straight from a tuple, skipping the Python-level NamedTuple constructor on the hot path.
+_new_packet = tuple.__new__
+
+# Text message published to the MQTT topics, filled in from a Packet with the % operator.
+# Suspicious packets carry their alert category in an extra "Alert" field just before Info.
+message_format = "No.: %d, Time: %.6f, Source: %s, Destination: %s, Protocol: %s, Length: %d, Info: %s"
+alert_message_format = ("No.: %d, Time: %.6f, Source: %s, Destination: %s, Protocol: %s, Length: %d, "
+                        "Alert: %s, Info: %s")
+
+
+# Function to parse one line into a Packet. Returns None for lines that are not packets (header, short lines).
+def parse_packet_line(line):
+    # Split off the six fixed columns in one pass; everything after them is the Info column, left untouched.
+    fields = line.split(None, 6)
+    if len(fields) < 7:
+        return None
+    try:
+        return _new_packet(Packet, (int(fields[0]), float(fields[1]), fields[2], fields[3], fields[4],
+                                    int(fields[5]), fields[6]))
+    except ValueError:
+        return None  # Non-numeric No./Time/Length, e.g. the Wireshark header row
+
+
+# Function to split one line into its seven text columns. Returns None for lines too short to be packets.
+# Used with packet_from_fields and format_fields_message when a line is both classified and republished as text.
+def split_packet_line(line):
+    fields = line.split(None, 6)
+    return fields if len(fields) == 7 else None
+
+
+# Function to build a Packet from the columns of split_packet_line. Returns None if No., Time or Length is not a
+# number, e.g. on the Wireshark header row.
+def packet_from_fields(fields):
+    try:
+        return _new_packet(Packet, (int(fields[0]), float(fields[1]), fields[2], fields[3], fields[4],
+                                    int(fields[5]), fields[6]))
+    except ValueError:
+        return None
+
+
+# Function to format a Packet as the text message published to the MQTT topics, with its alert category if any.
+def format_packet_message(packet, alert=None):
+    if alert:
+        return alert_message_format % (*packet[:6], alert, packet.info)
+    return message_format % packet
+
+
+# Function to format the columns of a line as the same text message, with its alert category if any.
+# No., Time and Length are copied as they appear in the capture, so the numbers are not formatted again.
+def format_fields_message(fields, alert=None):
+    no, time, source, destination, protocol, length, info = fields
+    if alert:
+        return (f"No.: {no}, Time: {time}, Source: {source}, Destination: {destination}, Protocol: {protocol}, "
+                f"Length: {length}, Alert: {alert}, Info: {info}")
+    return (f"No.: {no}, Time: {time}, Source: {source}, Destination: {destination}, Protocol: {protocol}, "
+            f"Length: {length}, Info: {info}")
+
+
+# Function to return the alert category of a text message, or None if it has none.
+def message_alert(message):
+    head, separator, _ = message.partition(", Info: ")
+    alert_start = head.find(", Alert: ")
+    if not separator or alert_start < 0:
+        return None
+    return head[alert_start + 9:]
+
+
+# Field labels of the text message, in order.
+message_labels = ("No.: ", "Time: ", "Source: ", "Destination: ", "Protocol: ", "Length: ", "Info: ")
+
+
+# Function to parse a text message built by format_packet_message back into a Packet.
+# Returns None if the text is not a packet message (e.g. a recommendation or a public counter message).
+def parse_packet_message(message):
+    # The first six fields never contain ", ", so everything after the sixth separator is the Info field
+    # (preceded by the Alert field on suspicious packets, which is dropped here; see message_alert).
+    fields = message.split(", ", 6)
+    if len(fields) < 7:
+        return None
+    if fields[6].startswith("Alert: "):
+        fields[6] = fields[6].partition(", ")[2]
+    values = []
+    for field, label in zip(fields, message_labels):
+        if not field.startswith(label):
+            return None
+        values.append(field[len(label):])
+    try:
+        return _new_packet(Packet, (int(values[0]), float(values[1]), values[2], values[3], values[4],
+                                    int(values[5]), values[6]))
+    except ValueError:
+        return None
+
+
+# Function to parse a chunk of lines into columns. Lines that are not packets are skipped.
+def parse_packet_batch(lines):
+    columns = PacketColumns(array('q'), array('d'), [], [], [], array('q'), [])
+    # Bind the append methods once, outside the loop.
+    append_no, append_time = columns.no.append, columns.time.append
+    append_source, append_destination = columns.source.append, columns.destination.append
+    append_protocol, append_length, append_info = columns.protocol.append, columns.length.append, columns.info.append
+
+    for line in lines:
+        fields = line.split(None, 6)
+        if len(fields) < 7:
+            continue
+        try:
+            no, time, length = int(fields[0]), float(fields[1]), int(fields[5])
+        except ValueError:
+            continue
+        append_no(no)
+        append_time(time)
+        append_source(fields[2])
+        append_destination(fields[3])
+        append_protocol(fields[4])
+        append_length(length)
+        append_info(fields[6])
+    return columns
+
+
+# Function to iterate over the packets stored in a batch, one Packet at a time.
+def iter_packets(columns):
+    return map(Packet._make, zip(*columns))
+
+
+# Function to convert a batch into a dict of NumPy arrays (numeric columns zero-copy, text columns as objects).
+def to_numpy(columns):
+    if numpy is None:
+        raise ImportError("NumPy is required for to_numpy(); install it with 'pip install numpy'.")
+    return {
+        "no": numpy.frombuffer(columns.no, dtype=numpy.int64),
+        "time": numpy.frombuffer(columns.time, dtype=numpy.float64),
+        "source": numpy.array(columns.source, dtype=object),
+        "destination": numpy.array(columns.destination, dtype=object),
+        "protocol": numpy.array(columns.protocol, dtype=object),
+        "length": numpy.frombuffer(columns.length, dtype=numpy.int64),
+        "info": numpy.array(columns.info, dtype=object),
+    }
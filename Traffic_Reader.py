@@ -0,0 +1,57 @@
+# Traffic_Reader.py
+# Streaming reader for Wireshark text exports such as Local_Sample.txt.
+# The file is memory-mapped and split into lines one at a time, so memory use stays constant regardless of the
+# file size and the first line is available immediately instead of after the whole file has been read.
+
+# Importing necessary libraries for memory-mapped file access.
+import mmap                         # Maps the capture file into memory without reading it all
+import os                           # File size lookups
+
+# Pages of the mapping that have already been consumed are released every this many bytes,
+# so resident memory does not grow with the file even though the whole file is mapped.
+release_interval = 32 * 1024 * 1024
+
+# The column header row written by Wireshark at the top of the export ("No.     Time     Source ...").
+header_prefix = "No."
+
+
+# Function to check whether a line is the Wireshark column header row.
+def is_header_line(line):
+    return line.startswith(header_prefix)
+
+
+# Function to yield every non-empty line of the file from the byte offset 'start', together with the byte offset
+# just after it (useful for checkpointing). Lines are decoded lazily using UTF-8 with errors ignored.
+# An unterminated last line is only yielded when flush_partial is True, since it may still be being written.
+# The header row is skipped when reading from the start of the file.
+# With 'end', only the lines starting before that byte offset are read (used to split a file into chunks).
+def iter_lines(file_path, start=0, flush_partial=True, end=None):
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        stop = size if end is None else min(end, size)
+        if stop <= start:
+            return  # Nothing (new) to read; mmap cannot map an empty file anyway
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            if hasattr(mapping, "madvise"):
+                mapping.madvise(mmap.MADV_SEQUENTIAL)  # Hint the kernel to read ahead
+
+            position = start
+            released = start - start % mmap.PAGESIZE
+            while position < stop:
+                newline = mapping.find(b'\n', position, size)
+                if newline < 0:
+                    if not flush_partial:
+                        return  # Leave the incomplete last line for the next pass
+                    newline = size
+                line = mapping[position:newline].decode('utf-8', errors='ignore').strip()
+                line_start, position = position, newline + 1
+
+                if line and not (line_start == 0 and is_header_line(line)):
+                    yield line, min(position, size)
+
+                # Drop the pages we have finished with, keeping resident memory bounded.
+                if position - released >= release_interval and hasattr(mapping, "madvise"):
+                    release_end = position - position % mmap.PAGESIZE
+                    mapping.madvise(mmap.MADV_DONTNEED, released, release_end - released)
+                    released = release_end
@@ -0,0 +1,210 @@
+# Traffic_Tail.py
+# Follow/tail support for the network traffic capture export used by Publish_Private.py.
+# Keeps track of how far into the capture file we have already published, stores that position in a small
+# checkpoint file so restarts resume where they left off, and wakes up as soon as new data is appended.
+
+# Importing necessary libraries for file access, checkpoint storage and waiting on file system events.
+import os                           # File status (inode, size) and atomic checkpoint replacement
+import json                         # Checkpoint file format
+import time                         # Used for the polling fallback and wait deadlines
+import select                       # Waits on the inotify file descriptor with a timeout
+import struct                       # Decodes raw inotify events
+import ctypes                       # Access to the Linux inotify system calls
+import ctypes.util                  # Locates the C library
+import Traffic_Reader               # Streams lines from the memory-mapped capture file
+
+# Number of bytes at the start of the file used to recognise it again after a restart.
+# If these bytes change, the file was replaced (rotated) rather than appended to.
+fingerprint_size = 64
+
+# How often the polling fallback checks the file for changes (in seconds).
+poll_interval = 0.5
+
+# How long (in seconds) the file must stay unchanged before an unterminated last line is taken as complete.
+# This is much longer than the wait between passes, so a slow writer is not cut off in the middle of a line.
+partial_line_quiet_period = 60
+
+# Linux inotify constants (see inotify(7)).
+IN_MODIFY = 0x00000002        # File was modified
+IN_CLOSE_WRITE = 0x00000008   # File opened for writing was closed
+IN_MOVED_FROM = 0x00000040    # File was moved out of the watched directory
+IN_MOVED_TO = 0x00000080      # File was moved into the watched directory (rotation)
+IN_CREATE = 0x00000100        # File was created in the watched directory (rotation)
+IN_DELETE = 0x00000200        # File was deleted from the watched directory
+inotify_event_header = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+# Function to read the first bytes of a file, used to detect whether the file has been replaced.
+def read_fingerprint(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read(fingerprint_size).hex()
+
+
+# Function to load the saved position from the checkpoint file.
+# A missing or unreadable checkpoint simply means "start from the beginning".
+def load_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+        return {
+            "inode": int(checkpoint.get("inode", 0)),
+            "offset": int(checkpoint.get("offset", 0)),
+            "fingerprint": str(checkpoint.get("fingerprint", "")),
+        }
+    except FileNotFoundError:
+        return {"inode": 0, "offset": 0, "fingerprint": ""}
+    except (IOError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint '{checkpoint_path}': {e}")
+        return {"inode": 0, "offset": 0, "fingerprint": ""}
+
+
+# Function to store the current position in the checkpoint file.
+# The checkpoint is written to a temporary file first and then renamed, so a crash never leaves a half-written file.
+def save_checkpoint(checkpoint_path, checkpoint):
+    temporary_path = f"{checkpoint_path}.tmp"
+    try:
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(checkpoint, file)
+        os.replace(temporary_path, checkpoint_path)
+    except IOError as e:
+        print(f"Error writing the checkpoint file: {e}")
+
+
+# Function to work out where reading should resume, resetting the position if the file was truncated or rotated.
+def resolve_start_offset(file_path, checkpoint):
+    status = os.stat(file_path)
+
+    # A different inode means the file at this path was replaced (e.g. log rotation).
+    if checkpoint["inode"] and checkpoint["inode"] != status.st_ino:
+        print(f"'{file_path}' was rotated, reading it from the beginning.")
+        return 0, status
+
+    # A file smaller than our position has been truncated.
+    if status.st_size < checkpoint["offset"]:
+        print(f"'{file_path}' was truncated, reading it from the beginning.")
+        return 0, status
+
+    # Same inode and size, but different leading bytes: rewritten in place (copy-truncate rotation).
+    if checkpoint["offset"] and checkpoint["fingerprint"] and status.st_size >= fingerprint_size:
+        if read_fingerprint(file_path) != checkpoint["fingerprint"]:
+            print(f"'{file_path}' was replaced, reading it from the beginning.")
+            return 0, status
+
+    return checkpoint["offset"], status
+
+
+# Function to yield the lines appended to the file since the last checkpoint.
+# The checkpoint is updated in place as each line is yielded, so it is always safe to save.
+# An unterminated last line is normally left for the next pass, and the checkpoint stays before it (it may still be
+# in the middle of being written); pass flush_partial=True to consume it anyway, only once the file has stayed
+# unchanged for partial_line_quiet_period seconds (see TrafficFileWatcher.unchanged_for).
+def read_appended_lines(file_path, checkpoint, flush_partial=False):
+    try:
+        offset, status = resolve_start_offset(file_path, checkpoint)
+        checkpoint["inode"] = status.st_ino
+        checkpoint["offset"] = offset
+
+        # (Re)record the leading bytes once the file is long enough, or whenever we started over from the beginning.
+        if offset == 0 or not checkpoint["fingerprint"]:
+            checkpoint["fingerprint"] = read_fingerprint(file_path) if status.st_size >= fingerprint_size else ""
+
+        # Stream the new lines straight from the memory-mapped file.
+        for line, next_offset in Traffic_Reader.iter_lines(file_path, offset, flush_partial):
+            checkpoint["offset"] = next_offset
+            yield line
+    except FileNotFoundError:
+        print(f"Error: The file '{file_path}' was not found.")
+    except IOError as e:
+        print(f"Error reading the file: {e}")
+
+
+# Class that blocks until the watched file changes, using inotify where available and polling otherwise.
+class TrafficFileWatcher:
+    def __init__(self, file_path):
+        self.file_path = os.path.abspath(file_path)
+        self.file_name = os.path.basename(self.file_path).encode()
+        self.inotify_fd = None
+        self.last_status = self.stat_file()
+        self.stable_status = self.last_status          # Status seen by unchanged_for(), and since when
+        self.stable_since = time.monotonic()
+
+        # Try to set up inotify on the directory, so that rotations (new file created or moved in) are seen too.
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            if libc.inotify_add_watch(fd, os.path.dirname(self.file_path).encode(), mask) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+            self.inotify_fd = fd
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), falling back to polling every {poll_interval} seconds.")
+
+    # Function to return the (inode, size, mtime) triple used by the polling fallback.
+    def stat_file(self):
+        try:
+            status = os.stat(self.file_path)
+            return status.st_ino, status.st_size, status.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    # Function to return how long (in seconds) the file's inode, size and modification time have stayed the same.
+    # Changes are only noticed when this is called, so it must be called at least once per wait.
+    def unchanged_for(self):
+        status = self.stat_file()
+        now = time.monotonic()
+        if status != self.stable_status:
+            self.stable_status, self.stable_since = status, now
+        return now - self.stable_since
+
+    # Function to wait until the file changes or the timeout expires.
+    # Returns True if a change was seen and False on timeout.
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        if self.inotify_fd is None:
+            return self.poll(deadline)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self.inotify_fd], [], [], remaining)
+            if not readable:
+                return False
+            if self.drain_events():
+                return True
+
+    # Function to read all pending inotify events, returning True if any of them concern the watched file.
+    def drain_events(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self.inotify_fd, 4096)
+            except BlockingIOError:
+                return changed
+            position = 0
+            while position < len(data):
+                _, _, _, name_length = inotify_event_header.unpack_from(data, position)
+                position += inotify_event_header.size
+                name = data[position:position + name_length].rstrip(b'\0')
+                position += name_length
+                if name == self.file_name:
+                    changed = True
+
+    # Function to poll the file status until it changes or the deadline passes.
+    def poll(self, deadline):
+        while time.monotonic() < deadline:
+            status = self.stat_file()
+            if status != self.last_status:
+                self.last_status = status
+                return True
+            time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+        return False
+
+    # Function to release the inotify file descriptor.
+    def close(self):
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
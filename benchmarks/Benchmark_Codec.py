@@ -0,0 +1,67 @@
+# Benchmark_Codec.py
+# Compares the binary packet records of Traffic_Codec.py with the labelled text message, in size on the wire
+# and in encode/decode speed, on the packets of Local_Sample.txt repeated 1000 times.
+#
+# Usage: python benchmarks/Benchmark_Codec.py [scale, default 1000]
+
+# Importing necessary libraries for timing and locating the project modules.
+import os                           # File paths
+import sys                          # Command line arguments and module path
+import time                         # Timing of encoding and decoding
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+import Traffic_Codec                # Binary encoding being measured
+import Traffic_Parser               # Text encoding it is compared with
+import Traffic_Reader               # Reads the sample capture
+
+
+# Text format: encode is format + UTF-8 encode, decode is UTF-8 decode + parse back into a Packet.
+def encode_text(packet):
+    return Traffic_Parser.format_packet_message(packet).encode('utf-8')
+
+
+def decode_text(payload):
+    return Traffic_Parser.parse_packet_message(payload.decode('utf-8'))
+
+
+# Function to time a function over all items and return (items per second, results).
+def measure(function, items):
+    start = time.perf_counter()
+    results = [function(item) for item in items]
+    return len(items) / (time.perf_counter() - start), results
+
+
+# Main function: compare sizes, then encode/decode throughput of both formats.
+def run():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sample = [Traffic_Parser.parse_packet_line(line)
+              for line, _ in Traffic_Reader.iter_lines(os.path.join(project_path, "Local_Sample.txt"))]
+    packets = [packet for packet in sample if packet is not None] * scale
+    print(f"{len(packets):,} packets ({len(packets) // scale} sample packets x {scale})\n")
+
+    print(f"{'format':<8} {'bytes/record':>13} {'total MB':>10} {'encode rec/s':>14} {'decode rec/s':>14}")
+    totals = {}
+    for name, encode, decode in (("text", encode_text, decode_text),
+                                 ("binary", Traffic_Codec.encode_packet, Traffic_Codec.decode_packet)):
+        encode_rate, payloads = measure(encode, packets)
+        decode_rate, decoded = measure(decode, payloads)
+        assert decoded == packets, f"{name} format does not round-trip"
+        totals[name] = sum(map(len, payloads))
+        print(f"{name:<8} {totals[name] / len(packets):>13.1f} {totals[name] / 1024 / 1024:>10.2f} "
+              f"{encode_rate:>14,.0f} {decode_rate:>14,.0f}")
+
+    print(f"\nBinary records are {100 * (1 - totals['binary'] / totals['text']):.1f}% smaller than text messages.")
+
+    # The Info column dominates for MDNS; show the saving on the fixed fields alone as well.
+    without_info = [packet._replace(info="") for packet in packets[:len(sample)]]
+    text_fixed = sum(len(encode_text(packet)) for packet in without_info)
+    binary_fixed = sum(len(Traffic_Codec.encode_packet(packet)) for packet in without_info)
+    print(f"Excluding the Info column: {text_fixed / len(without_info):.1f} -> "
+          f"{binary_fixed / len(without_info):.1f} bytes/record ({100 * (1 - binary_fixed / text_fixed):.1f}% smaller).")
+
+
+if __name__ == '__main__':
+    run()
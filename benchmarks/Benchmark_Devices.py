@@ -0,0 +1,102 @@
+# Benchmark_Devices.py
+# Compares the memory needed to simulate many IoT devices with one blocking client per process (the way
+# Publish_Private.py runs today) against one process driving every device on an asyncio event loop
+# (Simulate_Devices.py). Both run against the in-process stand-in broker (Local_Broker.py), so no network is used.
+#
+# The per-process figure is measured on a sample of real processes and multiplied out to the target device count.
+#
+# Usage: python benchmarks/Benchmark_Devices.py [devices, default 500] [sampled processes, default 20]
+
+# Importing necessary libraries for running the clients in subprocesses and measuring their memory.
+import os                           # File paths
+import sys                          # Command line arguments and the current interpreter
+import time                         # Pacing of the single-device publisher
+import resource                     # Peak resident memory of a process
+import asyncio                      # Runs the device simulation in the child process
+import subprocess                   # Runs each configuration in fresh processes
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+os.chdir(project_path)  # The scripts read Local_Sample.txt from the working directory
+
+import Local_Broker                 # In-process MQTT broker stand-in
+import MQTT_Connection              # Shared broker settings
+
+# How long (in seconds) each configuration runs.
+duration = 10
+
+
+# Function to return the peak RSS of the current process in MB.
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Child process: one blocking client with a network thread, publishing one packet per second (like Publish_Private).
+def child_single_device(port):
+    import Publish_Private
+    MQTT_Connection.broker_host, MQTT_Connection.broker_port = "127.0.0.1", port
+    client = Publish_Private.connect_mqtt()
+    client.loop_start()
+    lines = list(Publish_Private.read_network_traffic_from_file(Publish_Private.file_path))
+    stop_at = time.monotonic() + duration
+    index = 0
+    while time.monotonic() < stop_at:
+        packet = Publish_Private.Traffic_Parser.parse_packet_line(lines[index % len(lines)])
+        client.publish(Publish_Private.private_sub_topic1, Publish_Private.Traffic_Parser.format_packet_message(packet))
+        index += 1
+        time.sleep(1)
+    client.loop_stop()
+    client.disconnect()
+    print(f"{peak_rss_mb():.1f}")
+
+
+# Child process: every device on one event loop, sharing a few connections.
+def child_simulation(port, devices):
+    import Simulate_Devices
+    asyncio.run(Simulate_Devices.run(devices, Simulate_Devices.connection_count, 1.0, duration, "127.0.0.1", port))
+    print(f"{peak_rss_mb():.1f}")
+
+
+# Function to start a child process of this script in the given mode.
+def spawn(*arguments):
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), *map(str, arguments)],
+                            stdout=subprocess.PIPE, text=True)
+
+
+# Function to wait for a child and return the peak RSS it reported on its last line of output.
+def reported_rss(process):
+    output, _ = process.communicate()
+    return float(output.strip().splitlines()[-1])
+
+
+# Main function: measure both configurations and report the savings.
+def run():
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sampled = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    broker, port = Local_Broker.start_in_thread()
+
+    print(f"Running {sampled} single-device processes for {duration} s...")
+    processes = [spawn("--single", port) for _ in range(sampled)]
+    per_process = sum(reported_rss(process) for process in processes) / sampled
+
+    print(f"Running {devices} devices in one asyncio process for {duration} s...")
+    simulation = reported_rss(spawn("--simulate", port, devices))
+
+    process_total = per_process * devices
+    print(f"\n{'configuration':<34} {'processes':>10} {'threads':>8} {'peak RSS MB':>12}")
+    print(f"{'one blocking client per process':<34} {devices:>10} {devices * 2:>8} {process_total:>12.0f}"
+          f"   ({per_process:.1f} MB x {devices}, measured on {sampled})")
+    print(f"{'asyncio, one process':<34} {1:>10} {1:>8} {simulation:>12.1f}")
+    print(f"\nSavings: {devices - 1} processes, {process_total - simulation:.0f} MB "
+          f"({process_total / simulation:.0f}x less memory). Broker: {broker.stats()}")
+    print("RSS counts shared interpreter pages in every process, so the multi-process total is an upper bound.")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--single":
+        child_single_device(int(sys.argv[2]))
+    elif len(sys.argv) == 4 and sys.argv[1] == "--simulate":
+        child_simulation(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        run()
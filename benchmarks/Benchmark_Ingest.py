@@ -0,0 +1,99 @@
+# Benchmark_Ingest.py
+# Measures how parallel ingestion (Parallel_Ingest.py) scales with the number of worker processes on a synthetic
+# multi-GB capture built from Local_Sample.txt (packets renumbered so "No." keeps increasing), compared with parsing,
+# classifying and formatting the same file on a single thread. Published frames go to a sink that only counts them,
+# so the numbers show the ingestion itself, not the broker.
+#
+# Usage: python benchmarks/Benchmark_Ingest.py [size in MB, default 2048] [worker counts, default 1,2,4,8]
+
+# Importing necessary libraries for timing and locating the project modules.
+import os                           # File paths, sizes and CPU count
+import sys                          # Command line arguments and module path
+import time                         # Timing of each run
+import tempfile                     # Location of the synthetic capture file
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+import Parallel_Ingest              # The ingestion being measured
+import Traffic_Reader               # Reads the sample capture
+
+# Topics and batch size used for the runs (the values do not affect the speed).
+topics = ("Expected Traffic", "Suspicious Traffic")
+max_batch = 50
+
+
+# Sink standing in for the BatchPublisher: counts what would be published.
+class CountingSink:
+    def __init__(self):
+        self.frames = self.messages = 0
+
+    def send_payload(self, topic, payload, count):
+        self.frames += 1
+        self.messages += count
+
+
+# Function to build a synthetic capture of roughly size_mb megabytes from the sample's packets, renumbered.
+def build_capture(file_path, size_mb):
+    sample = [line.split(None, 1) for line, _ in
+              Traffic_Reader.iter_lines(os.path.join(project_path, "Local_Sample.txt"))]
+    target = size_mb * 1024 * 1024
+    number = 0
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write("No.     Time           Source                Destination           Protocol Length Info\n")
+        while file.tell() < target:
+            block = []
+            for _, rest in sample * 100:
+                number += 1
+                block.append(f"{number} {rest}\n")
+            file.write("".join(block))
+
+
+# Function to time one configuration and print its throughput; returns the packets per second.
+def measure(name, function, baseline=None):
+    sink = CountingSink()
+    start = time.perf_counter()
+    packets = function(sink)
+    elapsed = time.perf_counter() - start
+    rate = packets / elapsed
+    speedup = f"{rate / baseline:5.2f}x" if baseline else "  1.00x"
+    print(f"{name:<22} {packets:>12,} packets {elapsed:8.1f} s {rate:>12,.0f} packets/s  {speedup}")
+    return rate
+
+
+# Function running every chunk one after the other on this thread (the same work, without the process pool).
+def single_thread(file_path, sink):
+    total = 0
+    for start, end in Parallel_Ingest.chunk_ranges(file_path):
+        frames, packets, skipped, seconds = Parallel_Ingest.ingest_chunk(file_path, start, end, *topics, "text",
+                                                                         max_batch)
+        for topic, payload, count in frames:
+            sink.send_payload(topic, payload, count)
+        total += packets
+    return total
+
+
+# Main function: build the capture once, then time the single-threaded path and every worker count.
+def run():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    worker_counts = [int(count) for count in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 2, 4, 8]
+    file_path = os.path.join(tempfile.gettempdir(), f"Benchmark_Ingest_{size_mb}MB.txt")
+    if not os.path.exists(file_path):
+        print(f"Building a {size_mb} MB synthetic capture at {file_path}...")
+        build_capture(file_path, size_mb)
+
+    print(f"Capture size: {os.path.getsize(file_path) / 1024 / 1024:.0f} MB, {os.cpu_count()} CPU(s), "
+          f"chunks of {Parallel_Ingest.chunk_size // 1024 // 1024} MB")
+    with open(file_path, 'rb') as file:
+        while file.read(64 * 1024 * 1024):
+            pass  # Warm the page cache, so the first configuration is not penalised by disk reads
+    baseline = measure("single thread", lambda sink: single_thread(file_path, sink))
+    for workers in worker_counts:
+        measure(f"{workers} worker(s), ordered",
+                lambda sink: Parallel_Ingest.ingest(file_path, sink, topics, workers, True, "text", max_batch),
+                baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,220 @@
+# Benchmark_Load.py
+# Load generator and end-to-end latency benchmark.
+# N publisher processes replay Local_Sample.txt-style packets at a target total rate (or as fast as possible)
+# to the Suspicious Traffic topic; the messages are received and handled by Private_Monitor_Client.on_message
+# (with its real response pipeline) in this process. Each packet's Time field carries its send time
+# (time.time()), so the monitor side can measure the end-to-end latency of every message.
+#
+# By default an in-process stand-in broker (Local_Broker.py) is used, so no network is needed; pass --host/--port
+# to run against a local mosquitto instead. Results are printed, and written as JSON with --output, so they can be
+# compared between releases.
+#
+# Usage: python benchmarks/Benchmark_Load.py [--publishers 4] [--rate 0] [--duration 10] [--format text|binary]
+#                                            [--output results.json] [--host HOST --port PORT]
+
+# Importing necessary libraries for the publisher processes, timing and the JSON report.
+import os                           # File paths
+import sys                          # Interpreter path, module path and standard output
+import json                         # Publisher results and the final report
+import time                         # Send timestamps, pacing and durations
+import array                        # Compact storage of the latency samples
+import asyncio                      # Publisher event loop
+import argparse                     # Command line options
+import platform                     # Recorded in the report
+import threading                    # Protects the latency samples
+import contextlib                   # Silences the monitor's per-message output during the run
+import subprocess                   # Runs the publishers in their own processes
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+os.chdir(project_path)  # The scripts read Local_Sample.txt and Recommendations.txt from the working directory
+
+import Async_MQTT                   # asyncio publisher client
+import Local_Broker                 # In-process MQTT broker stand-in
+import MQTT_Connection              # Shared broker settings
+import Private_Monitor_Client       # The subscriber being measured
+import Response_Pipeline            # The monitor's response worker pool
+import Simulate_Devices             # Loads the sample packets
+import Traffic_Batcher              # Unpacks batches
+import Traffic_Codec                # Binary records
+import Traffic_Parser               # Text messages
+
+# How long (in seconds) to wait for the last messages to arrive after the publishers have finished.
+drain_timeout = 10
+
+
+# Publisher process: send packets for 'duration' seconds at 'rate' messages/s (0 = as fast as possible),
+# then print a JSON line with the number of messages acknowledged by the broker and failed.
+async def publisher(index, host, port, rate, duration, wire_format):
+    packets = Simulate_Devices.load_packets()
+    client = Async_MQTT.AsyncMQTTClient(f"load-{index}-{os.getpid()}")
+    await client.connect(host, port)
+    topic = Private_Monitor_Client.private_sub_topic2
+    if wire_format == "binary":
+        topic += Traffic_Codec.binary_topic_suffix
+
+    counters = {"sent": 0, "failed": 0}
+
+    async def send(payload):
+        try:
+            await client.publish(topic, payload)
+            counters["sent"] += 1
+        except ConnectionError:
+            counters["failed"] += 1
+
+    tasks = set()
+    started = time.monotonic()
+    count = 0
+    while True:
+        now = time.monotonic()
+        if now - started >= duration:
+            break
+        if rate:
+            # Stay on schedule: message 'count' is due at started + count / rate.
+            delay = started + count / rate - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+        # The packet's Time field carries the send time, for the end-to-end latency measurement.
+        packet = packets[count % len(packets)]._replace(time=time.time())
+        if wire_format == "binary":
+            payload = Traffic_Codec.encode_packet(packet, "load")
+        else:
+            payload = Traffic_Parser.format_packet_message(packet, "load")
+        task = asyncio.ensure_future(send(payload))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        count += 1
+        if not rate:
+            await asyncio.sleep(0)  # Let acknowledgements be processed; the client bounds the in-flight messages
+    await asyncio.gather(*tasks)
+    counters["elapsed"] = time.monotonic() - started
+    await client.disconnect()
+    print(json.dumps(counters))
+
+
+# Class recording when each message reached the monitor, after Private_Monitor_Client.on_message handled it.
+class LatencyRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = array.array('d')
+        self.received = 0
+        self.first_received = self.last_received = None
+
+    # Function wrapping the monitor's message handler.
+    def on_message(self, client, userdata, msg):
+        Private_Monitor_Client.on_message(client, userdata, msg)
+        handled_at = time.time()
+
+        sent_times = []
+        binary = msg.topic.endswith(Traffic_Codec.binary_topic_suffix)
+        for payload in Traffic_Batcher.decode_batch(msg.payload):
+            packet = Traffic_Codec.decode_packet(payload) if binary else \
+                Traffic_Parser.parse_packet_message(payload.decode('utf-8'))
+            if packet is not None:
+                sent_times.append(packet.time)
+        with self.lock:
+            self.latencies.extend(handled_at - sent for sent in sent_times)
+            self.received += len(sent_times)
+            if self.first_received is None:
+                self.first_received = handled_at
+            self.last_received = handled_at
+
+    # Function to return latency percentiles in milliseconds.
+    def percentiles(self):
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {}
+        result = {}
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999), ("max", 1.0)):
+            result[name] = round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 3)
+        result["mean"] = round(sum(latencies) / len(latencies) * 1000, 3)
+        return result
+
+
+# Main function: start the broker and monitor, run the publishers, wait for the messages to drain and report.
+def run(arguments):
+    broker = None
+    host, port = arguments.host, arguments.port
+    if host is None:
+        broker, port = Local_Broker.start_in_thread()
+        host = "127.0.0.1"
+    MQTT_Connection.broker_host, MQTT_Connection.broker_port = host, port
+
+    # The monitor: the real connection, message handler and response pipeline, with its output silenced.
+    recorder = LatencyRecorder()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        monitor = Private_Monitor_Client.connect_mqtt()
+        pipeline = Response_Pipeline.ResponsePipeline(
+            lambda job: Private_Monitor_Client.respond_to_alerts(monitor, job),
+            Private_Monitor_Client.response_workers, Private_Monitor_Client.response_queue_size,
+            Private_Monitor_Client.response_policy)
+        monitor.user_data_set(pipeline)
+        monitor.on_message = recorder.on_message
+        monitor.loop_start()
+        time.sleep(1)  # Let the monitor subscribe before the publishers start
+
+        per_publisher_rate = arguments.rate / arguments.publishers
+        processes = [subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--publisher", str(index), "--host", host, "--port", str(port),
+             "--rate", str(per_publisher_rate), "--duration", str(arguments.duration), "--format", arguments.format],
+            stdout=subprocess.PIPE, text=True) for index in range(arguments.publishers)]
+        results = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+
+        # Wait until every acknowledged message has reached the monitor, or the drain timeout passes.
+        sent = sum(result["sent"] for result in results)
+        deadline = time.monotonic() + drain_timeout
+        while recorder.received < sent and time.monotonic() < deadline:
+            time.sleep(0.1)
+        pipeline.close()
+        monitor.loop_stop()
+        monitor.disconnect()
+
+    elapsed = (recorder.last_received - recorder.first_received) if recorder.received > 1 else 0
+    report = {
+        "benchmark": "end_to_end_load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {
+            "publishers": arguments.publishers,
+            "target_rate": arguments.rate or "max",
+            "duration_s": arguments.duration,
+            "format": arguments.format,
+            "broker": "local stand-in" if broker is not None else f"{host}:{port}",
+        },
+        "sent": sent,
+        "failed": sum(result["failed"] for result in results),
+        "received": recorder.received,
+        "dropped": sent - recorder.received,
+        "publish_rate": round(sent / max(result["elapsed"] for result in results), 1),
+        "throughput": round(recorder.received / elapsed, 1) if elapsed else None,
+        "latency_ms": recorder.percentiles(),
+        "response_pipeline": pipeline.stats(),
+    }
+    if broker is not None:
+        report["broker"] = broker.stats()
+
+    print(json.dumps(report, indent=2))
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {arguments.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="End-to-end load and latency benchmark.")
+    parser.add_argument("--publishers", type=int, default=4, help="number of publisher processes")
+    parser.add_argument("--rate", type=float, default=0, help="total messages/s, 0 for as fast as possible")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to publish for")
+    parser.add_argument("--format", choices=("text", "binary"), default="text")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--host", default=None, help="external broker (default: in-process stand-in)")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--publisher", type=int, default=None, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.publisher is not None:
+        asyncio.run(publisher(arguments.publisher, arguments.host, arguments.port, arguments.rate,
+                              arguments.duration, arguments.format))
+    else:
+        run(arguments)
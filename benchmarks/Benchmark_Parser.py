@@ -0,0 +1,76 @@
+# Benchmark_Parser.py
+# Measures how many capture lines per second each parsing path handles, on Local_Sample.txt scaled up 1000x.
+#
+# Usage: python benchmarks/Benchmark_Parser.py [scale, default 1000]
+
+# Importing necessary libraries for timing and locating the project modules.
+import os                           # File paths
+import sys                          # Command line arguments and module path
+import time                         # Timing of each parsing path
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+import Traffic_Parser               # The parser being measured
+import Traffic_Reader               # Reads the sample capture
+
+
+# The original split/join path from Publish_Private.process_network_traffic_line, without the publish call.
+def split_join_message(line):
+    elements = line.split()
+    if len(elements) >= 7:
+        no = elements[0]
+        time = elements[1]
+        source = elements[2]
+        destination = elements[3]
+        protocol = elements[4]
+        length = elements[5]
+        info = ' '.join(elements[6:])
+        return f"No.: {no}, Time: {time}, Source: {source}, Destination: {destination}, Protocol: {protocol}, Length: {length}, Info: {info}"
+
+
+# The new path: parse into a Packet, then format the message.
+def parser_message(line):
+    packet = Traffic_Parser.parse_packet_line(line)
+    if packet is not None:
+        return Traffic_Parser.format_packet_message(packet)
+
+
+# The publisher's path: split once, build the Packet (for the classifier) and format the message from the columns.
+def fields_message(line):
+    fields = Traffic_Parser.split_packet_line(line)
+    if fields is not None and Traffic_Parser.packet_from_fields(fields) is not None:
+        return Traffic_Parser.format_fields_message(fields)
+
+
+# Number of times each path is timed; the fastest run is reported, as the others were slowed by something else.
+repeats = 5
+
+
+# Function to time one parsing path over all lines and print its throughput.
+def measure(name, function, lines):
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(lines)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{name:<32} {len(lines) / elapsed:>12,.0f} lines/sec   ({elapsed:.3f} s)")
+
+
+# Main function: build the scaled line list once and time every path on it.
+def run():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sample = [line for line, _ in Traffic_Reader.iter_lines(os.path.join(project_path, "Local_Sample.txt"))]
+    lines = sample * scale
+    print(f"{len(lines):,} lines ({len(sample)} sample lines x {scale})")
+
+    measure("split/join + message (original)", lambda lines: [split_join_message(line) for line in lines], lines)
+    measure("parse_packet_line + message", lambda lines: [parser_message(line) for line in lines], lines)
+    measure("split + Packet + fields message", lambda lines: [fields_message(line) for line in lines], lines)
+    measure("parse_packet_line only", lambda lines: [Traffic_Parser.parse_packet_line(line) for line in lines], lines)
+    measure("parse_packet_batch (columnar)", Traffic_Parser.parse_packet_batch, lines)
+
+
+if __name__ == '__main__':
+    run()
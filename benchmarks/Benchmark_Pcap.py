@@ -0,0 +1,98 @@
+# Benchmark_Pcap.py
+# Measures how many packets per second become Packet records when reading a capture directly (Pcap_Reader.py) from
+# a memory-mapped .pcap or .pcapng file, or from a stream as with `tcpdump -w -`, compared with the text-export path
+# (Traffic_Reader.iter_lines and Traffic_Parser.parse_packet_line). All inputs hold the packets of Local_Sample.txt
+# repeated 'scale' times, with increasing timestamps.
+#
+# Usage: python benchmarks/Benchmark_Pcap.py [scale, default 1000]
+
+# Importing necessary libraries for timing and locating the project modules.
+import os                           # File paths and sizes
+import sys                          # Command line arguments and module path
+import time                         # Timing of each reading path
+import tempfile                     # Location of the synthetic captures
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+import Generate_Sample_Captures     # Rebuilds the sample's packets as Ethernet frames
+import Pcap_Reader                  # The capture decoder being measured
+import Traffic_Parser               # The text-export parser it is compared with
+import Traffic_Reader               # Reads the text export
+
+
+# Function to write the text export and both capture formats, each holding the sample 'scale' times.
+def build_inputs(directory, scale):
+    sample_path = os.path.join(project_path, "Local_Sample.txt")
+    lines = [line.split(None, 1)[1] for line, _ in Traffic_Reader.iter_lines(sample_path)
+             if Traffic_Parser.parse_packet_line(line) is not None]
+    frames = Generate_Sample_Captures.build_frames(sample_path)
+    span = frames[-1][0] - frames[0][0] + 10**9     # Each repetition starts a second after the previous one ends
+
+    text_path = os.path.join(directory, "Benchmark_Pcap.txt")
+    with open(text_path, 'w', encoding='utf-8') as file:
+        file.write("No.     Time           Source                Destination           Protocol Length Info\n")
+        file.write("".join(f"{number} {rest}\n" for number, rest in enumerate(lines * scale, 1)))
+
+    repeated = [(timestamp + repetition * span, frame) for repetition in range(scale) for timestamp, frame in frames]
+    pcap_path = os.path.join(directory, "Benchmark_Pcap.pcap")
+    pcapng_path = os.path.join(directory, "Benchmark_Pcap.pcapng")
+    Generate_Sample_Captures.write_pcap(pcap_path, repeated)
+    Generate_Sample_Captures.write_pcapng(pcapng_path, repeated)
+    return text_path, pcap_path, pcapng_path
+
+
+# The text-export path: stream the lines of the file and parse each one into a Packet.
+def text_packets(file_path):
+    parse = Traffic_Parser.parse_packet_line
+    count = 0
+    for line, _ in Traffic_Reader.iter_lines(file_path):
+        if parse(line) is not None:
+            count += 1
+    return count
+
+
+# The capture path on a memory-mapped file.
+def file_packets(file_path):
+    count = 0
+    for _ in Pcap_Reader.iter_file_packets(file_path):
+        count += 1
+    return count
+
+
+# The capture path on a stream, read as `tcpdump -w -` output would be on stdin.
+def stream_packets(file_path):
+    count = 0
+    with open(file_path, 'rb') as stream:
+        for _ in Pcap_Reader.iter_stream_packets(stream):
+            count += 1
+    return count
+
+
+# Function to time one reading path and print its throughput; returns the packets per second.
+def measure(name, function, file_path, baseline=None):
+    start = time.perf_counter()
+    packets = function(file_path)
+    elapsed = time.perf_counter() - start
+    rate = packets / elapsed
+    speedup = f"{rate / baseline:5.2f}x" if baseline else "  1.00x"
+    size = os.path.getsize(file_path) / 1024 / 1024
+    print(f"{name:<22} {size:7.1f} MB {packets:>10,} packets {elapsed:7.2f} s {rate:>12,.0f} packets/s  {speedup}")
+    return rate
+
+
+# Main function: build the inputs once, then time the text path and every capture path.
+def run():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as directory:
+        text_path, pcap_path, pcapng_path = build_inputs(directory, scale)
+        baseline = measure("text export", text_packets, text_path)
+        measure("pcap, mmap", file_packets, pcap_path, baseline)
+        measure("pcapng, mmap", file_packets, pcapng_path, baseline)
+        measure("pcap, stream", stream_packets, pcap_path, baseline)
+        measure("pcapng, stream", stream_packets, pcapng_path, baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,82 @@
+# Benchmark_Reader.py
+# Compares the streaming, memory-mapped reader used by Publish_Private.py with the original list-based reader.
+# Each reader runs in its own process so the peak resident memory (RSS) of one does not hide the other.
+#
+# Usage: python benchmarks/Benchmark_Reader.py [size in MB, default 512]
+
+# Importing necessary libraries for timing, memory measurement and running the readers in subprocesses.
+import os                           # File paths and sizes
+import sys                          # Command line arguments and the current interpreter
+import time                         # Timing of the readers
+import resource                     # Peak resident memory of the reader process
+import tempfile                     # Location of the synthetic capture file
+import subprocess                   # Runs each reader in a fresh process
+
+# Make the project modules importable when the benchmark is run from the repository root or this folder.
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+# Path of the sample capture the synthetic file is built from.
+sample_path = os.path.join(project_path, "Local_Sample.txt")
+
+
+# The original reader: builds a full list of stripped lines before anything can be published.
+def list_reader(file_path):
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+# The streaming reader now used by Publish_Private.py.
+def streaming_reader(file_path):
+    import Publish_Private
+    return Publish_Private.read_network_traffic_from_file(file_path)
+
+
+# Function to build a synthetic capture of roughly size_mb megabytes by repeating the sample's packet lines.
+def build_capture(file_path, size_mb):
+    with open(sample_path, 'rb') as file:
+        header, *packets = file.read().splitlines(keepends=True)
+    if not packets[-1].endswith(b'\n'):
+        packets[-1] += b'\r\n'
+    block = b''.join(packets)
+    with open(file_path, 'wb') as file:
+        file.write(header)
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            file.write(block)
+
+
+# Function run inside the child process: time to first line, total time, line count and peak RSS.
+def measure(reader_name, file_path):
+    reader = {"list": list_reader, "streaming": streaming_reader}[reader_name]
+    reader(sample_path)  # Warm up: imports are not part of the time to first line
+    start = time.perf_counter()
+    first_line = None
+    count = 0
+    for _ in reader(file_path):
+        if first_line is None:
+            first_line = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{reader_name:<10} lines={count:<10} first line={first_line * 1000:9.2f} ms   "
+          f"total={total:7.2f} s   peak RSS={peak_rss_mb:8.1f} MB")
+
+
+# Main function: build the capture once, then measure each reader in its own process.
+def run():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    file_path = os.path.join(tempfile.gettempdir(), f"Benchmark_Capture_{size_mb}MB.txt")
+    if not os.path.exists(file_path):
+        print(f"Building a {size_mb} MB synthetic capture at {file_path}...")
+        build_capture(file_path, size_mb)
+
+    print(f"Capture size: {os.path.getsize(file_path) / 1024 / 1024:.1f} MB")
+    for reader_name in ("list", "streaming"):
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", reader_name, file_path], check=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        run()